@@ -2,8 +2,10 @@
 Productivity Coach - App Principal
 """
 import streamlit as st
+from modules import tracing
 import time
-from modules.supabase_client import SupabaseClient
+from modules.storage_backend import create_storage_backend
+from modules.habit_streaks import to_local_date
 from modules.agent import ProductivityAgent
 from modules.auth import AuthManager, check_authentication, logout
 import os
@@ -20,6 +22,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Trazas de este script run (ver modules/tracing.py)
+tracing.begin_run('Inicio', (st.session_state.get('user') or {}).get('id'))
+
 # Inicializar AuthManager (CRÍTICO: Debe ser antes del check)
 if 'auth' not in st.session_state:
     st.session_state.auth = AuthManager(
@@ -46,12 +51,8 @@ if not check_authentication():
 # Inicializar clientes en session_state (solo si está autenticado)
 if 'db' not in st.session_state:
     user_id = st.session_state.user.get('id')
-    # 1. Inicializar cliente temporal
-    temp_client = SupabaseClient(
-        url=os.getenv('SUPABASE_URL'),
-        key=os.getenv('SUPABASE_KEY'),
-        user_id=user_id
-    )
+    # 1. Inicializar cliente temporal (backend según STORAGE_BACKEND)
+    temp_client = create_storage_backend(user_id=user_id)
     
     # 2. Obtener timezone del usuario
     settings = temp_client.get_user_settings()
@@ -73,7 +74,10 @@ if 'agent' not in st.session_state:
         timezone=current_tz
     )
 
-# Obtener contexto actual
+# Snapshot del día: se recarga solo si hubo escrituras, cambió el día o expiró el TTL
+snapshot = st.session_state.db.get_day_snapshot()
+
+# Obtener contexto actual (reutiliza el snapshot)
 context = st.session_state.agent._get_current_context()
 
 # Header
@@ -87,7 +91,7 @@ else:
     st.success(f"{identity_emoji} **Identidad activa:** {context['identity']}")
 
 # Mostrar Breadcrumbs de ayer (si existen) - Colapsable
-breadcrumbs_ayer = st.session_state.db.get_breadcrumbs_from_yesterday()
+breadcrumbs_ayer = snapshot.breadcrumbs_yesterday
 if breadcrumbs_ayer:
     st.markdown(f"""<details style="background-color: #1a2a3a; padding: 12px; border-radius: 8px; margin: 10px 0; border-left: 3px solid #60a5fa;">
 <summary style="color: #60a5fa; font-weight: bold; cursor: pointer; list-style: none;">
@@ -112,7 +116,7 @@ with st.sidebar:
         # Usar un popover o expander para mostrar el ritual antes de marcarlo
         with st.expander("🌅 Morning Mastery", expanded=True):
             # Obtener texto personalizado
-            mm_text = st.session_state.agent.get_morning_mastery_text()
+            mm_text = snapshot.morning_mastery_text
             st.markdown(mm_text)
             
             if st.button("✅ Completar Ritual", use_container_width=True, type="primary"):
@@ -149,30 +153,10 @@ with st.sidebar:
             # Check si ya se completó hoy (usando last_completed_at)
             is_done_today = False
             if habit.get('last_completed_at'):
-                try:
-                    # Convertir timestamp a zona horaria del usuario antes de comparar
-                    from datetime import datetime as dt_module
-                    last_completed_str = habit['last_completed_at']
-                    # Parsear el timestamp ISO
-                    if 'Z' in last_completed_str:
-                        last_completed_dt = dt_module.fromisoformat(last_completed_str.replace('Z', '+00:00'))
-                    elif '+' in last_completed_str or last_completed_str.count('-') > 2:
-                        last_completed_dt = dt_module.fromisoformat(last_completed_str)
-                    else:
-                        # Formato simple sin timezone, asumir timezone del usuario
-                        last_completed_dt = dt_module.fromisoformat(last_completed_str)
-                        last_completed_dt = st.session_state.db.timezone.localize(last_completed_dt)
-
-                    # Convertir a zona horaria del usuario
-                    last_completed_local = last_completed_dt.astimezone(st.session_state.db.timezone)
-                    last_date = last_completed_local.strftime('%Y-%m-%d')
-                except Exception as e:
-                    # Fallback al método simple si hay error
-                    last_date = habit['last_completed_at'].split('T')[0]
-
-                if last_date == context['date']:
-                    is_done_today = True
-            
+                # Fecha local del usuario (mismo criterio que productivity_complete_habit)
+                last_date = to_local_date(habit['last_completed_at'], st.session_state.db.timezone)
+                is_done_today = last_date is not None and last_date.isoformat() == context['date']
+
             c1, c2 = st.columns([3, 1])
             with c1:
                 st.caption(f"{habit['name']}")
@@ -193,7 +177,7 @@ with st.sidebar:
 
 # Recuperar Nombres de Identidad (Personalización)
 if 'user_settings' not in st.session_state and 'db' in st.session_state:
-    st.session_state.user_settings = st.session_state.db.get_user_settings()
+    st.session_state.user_settings = dict(snapshot.settings)
 
 user_settings = st.session_state.get('user_settings', {})
 id1_name = user_settings.get('identity_1_name', 'Empresario Exitoso')
@@ -247,6 +231,9 @@ with col1:
     # Asegurar que sea una lista válida de 3 elementos
     if not isinstance(d3_details, list):
         d3_details = []
+
+    # Copia local: el snapshot es de solo lectura
+    d3_details = list(d3_details)
     
     # Rellenar hasta 3 si falta alguno
     while len(d3_details) < 3:
@@ -265,7 +252,7 @@ with col1:
 
     # Construir UI con desbloqueo progresivo
     d3_inputs = []
-    morning_feedback = st.session_state.agent.get_task_feedback("morning")
+    morning_feedback = snapshot.get_task_feedback("morning")
 
     for i in range(3):
         c1, c2 = st.columns([0.05, 0.95])
@@ -338,6 +325,7 @@ with col1:
         if legacy_list and isinstance(legacy_list, list):
             p_details = [{"text": t, "done": False} for t in legacy_list]
     if not isinstance(p_details, list): p_details = []
+    p_details = list(p_details)
     while len(p_details) < 3: p_details.append({"text": "", "done": False})
 
     def auto_save_priorities():
@@ -350,7 +338,7 @@ with col1:
 
     # Construir UI con desbloqueo progresivo
     p_inputs = []
-    afternoon_feedback = st.session_state.agent.get_task_feedback("afternoon")
+    afternoon_feedback = snapshot.get_task_feedback("afternoon")
 
     for i in range(3):
         c1, c2 = st.columns([0.05, 0.95])
@@ -416,7 +404,7 @@ with col1:
     st.caption("¿Qué dejaste preparado? Escribe pistas para tu yo de mañana.")
 
     # Obtener breadcrumbs actuales (si ya escribió algo hoy)
-    current_breadcrumbs = st.session_state.db.get_breadcrumbs_today()
+    current_breadcrumbs = snapshot.breadcrumbs_today
 
     breadcrumbs_input = st.text_area(
         "¿Qué dejé preparado para mañana?",
@@ -448,9 +436,7 @@ with col2:
 
     if st.button("Enviar", use_container_width=True):
         if quick_message:
-            with st.spinner("Pensando..."):
-                response = st.session_state.agent.chat(quick_message)
-            st.write(response)
+            st.write_stream(st.session_state.agent.chat_stream(quick_message))
 
 # Footer con instrucciones
 st.divider()
@@ -0,0 +1,55 @@
+"""
+Benchmark de modules/metrics.py: 5 años x 1.000 usuarios (~1,8M filas día-usuario)
+
+Uso: python benchmarks/bench_metrics.py [--users 1000] [--years 5]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datasets import multi_user_frame
+from modules import metrics
+
+
+def timed(label: str, fn, repeat: int = 3):
+    """Mejor tiempo de `repeat` ejecuciones"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--years', type=int, default=5)
+    args = parser.parse_args()
+
+    frame = timed('generar frame', lambda: multi_user_frame(args.users, 365 * args.years), repeat=1)
+    print(f"filas: {len(frame):,}  memoria: {frame.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+
+    timed('summary_by_user (ventana completa)', lambda: metrics.summary_by_user(frame))
+
+    one_user = frame[frame['user_id'] == 0].reset_index(drop=True)
+    timed('summary (1 usuario, 5 años)', lambda: metrics.summary(one_user))
+    timed('rolling_completion (1 usuario, 7d)', lambda: metrics.rolling_completion(one_user, 7))
+
+    records = [
+        {'date': (date(2021, 1, 1) + timedelta(days=i)).isoformat(),
+         'identity_1_daily_3_completed': i % 4, 'identity_2_priorities_completed': (i + 1) % 4,
+         'code_commit_done': bool(i % 2), 'morning_mastery_done': bool(i % 3)}
+        for i in range(365 * args.years)
+    ]
+    timed('day_frame (1 usuario desde registros)',
+          lambda: metrics.day_frame(records, date(2021, 1, 1), date(2021, 1, 1) + timedelta(days=365 * args.years - 1)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Generadores de datos sintéticos para los benchmarks (de 7 días a 5 años, de 1 a 10.000 usuarios)
+
+Las filas tienen el mismo formato que devuelven los backends (ver modules/storage_backend.py),
+así que sirven tanto para las funciones puras como para sembrar una base SQLite de prueba.
+Todo es determinista por semilla para poder comparar corridas entre commits.
+"""
+import json
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+# Tamaños del historial y de la base cubiertos por la suite
+DAY_SIZES = [7, 30, 365, 365 * 5]
+USER_SIZES = [1, 100, 1000, 10000]
+
+# Probabilidades diarias de completar cada cosa (usuario "constante pero humano")
+TASK_DONE_P = 0.7
+CODE_DONE_P = 0.6
+MORNING_MASTERY_P = 0.8
+HABIT_DONE_P = 0.75
+
+TASK_TEXTS = [
+    'Llamar a 3 prospectos', 'Escribir propuesta comercial', 'Revisar métricas de campaña',
+    'Preparar demo del cliente', 'Publicar post en LinkedIn', 'Refactor del pipeline de datos',
+    'Documentar la integración', 'Responder tickets de soporte', 'Planificar el sprint'
+]
+
+
+def user_ids(users: int) -> List[str]:
+    """UUIDs deterministas (el índice del usuario es reproducible entre corridas)"""
+    return [str(uuid.UUID(int=i + 1)) for i in range(users)]
+
+
+def habit_ids(habits: int, user_index: int = 0) -> List[str]:
+    """UUIDs deterministas de los hábitos de un usuario"""
+    return [str(uuid.UUID(int=(user_index + 1) << 32 | (h + 1))) for h in range(habits)]
+
+
+def _task_details(rng: np.random.Generator, done: np.ndarray) -> List[Dict]:
+    texts = rng.choice(TASK_TEXTS, size=len(done), replace=False)
+    return [{'text': str(text), 'done': bool(flag)} for text, flag in zip(texts, done)]
+
+
+def tracking_rows(days: int, end: date, user_id: str = None, seed: int = 42) -> List[Dict]:
+    """Filas de 01_productivity_daily_tracking de los últimos `days` días hasta `end`"""
+    rng = np.random.default_rng(seed)
+    user_id = user_id or user_ids(1)[0]
+    start = end - timedelta(days=days - 1)
+
+    tasks = rng.random((days, 2, 3)) < TASK_DONE_P
+    code = rng.random(days) < CODE_DONE_P
+    morning = rng.random(days) < MORNING_MASTERY_P
+
+    rows = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        rows.append({
+            'user_id': user_id,
+            'date': day.isoformat(),
+            'day_of_week': day.strftime('%A'),
+            'identity_1_daily_3_completed': int(tasks[i, 0].sum()),
+            'identity_1_daily_3_details': _task_details(rng, tasks[i, 0]),
+            'identity_2_priorities_completed': int(tasks[i, 1].sum()),
+            'identity_2_priorities_details': _task_details(rng, tasks[i, 1]),
+            'code_commit_done': bool(code[i]),
+            'morning_mastery_done': bool(morning[i]),
+            'identity_1_feedback': [],
+            'identity_2_feedback': []
+        })
+    return rows
+
+
+def habit_logs(habits: List[str], days: int, end: date, user_id: str = None,
+               seed: int = 42, done_p: float = HABIT_DONE_P) -> List[Dict]:
+    """Filas de 01_productivity_habit_logs (un log por hábito y día hecho)"""
+    rng = np.random.default_rng(seed)
+    user_id = user_id or user_ids(1)[0]
+    start = end - timedelta(days=days - 1)
+    done = rng.random((len(habits), days)) < done_p
+
+    logs = []
+    for h, habit_id in enumerate(habits):
+        for i in np.flatnonzero(done[h]):
+            day = start + timedelta(days=int(i))
+            logs.append({
+                'habit_id': habit_id,
+                'user_id': user_id,
+                'completed_at': datetime.combine(day, datetime.min.time()).replace(hour=7).isoformat(),
+                'date_logged': day.isoformat()
+            })
+    return logs
+
+
+def multi_user_frame(users: int, days: int, end: date = date(2026, 1, 1), seed: int = 42) -> pd.DataFrame:
+    """Frame columnar multi-usuario con el mismo layout que metrics.day_frame (+ user_id)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=end, periods=days, freq='D')
+    n = len(dates) * users
+
+    return pd.DataFrame({
+        'user_id': np.repeat(np.arange(users, dtype=np.int32), len(dates)),
+        'weekday': np.tile(dates.dayofweek < 5, users),
+        'daily_3': rng.binomial(3, TASK_DONE_P, n).astype(np.int16),
+        'priorities': rng.binomial(3, TASK_DONE_P, n).astype(np.int16),
+        'code_done': (rng.random(n) < CODE_DONE_P).astype(np.int16),
+        'morning_mastery': (rng.random(n) < MORNING_MASTERY_P).astype(np.int16)
+    })
+
+
+def running_timers(count: int, now: datetime, seed: int = 42) -> List[Dict]:
+    """Timers activos en el formato de TimerManager.create_timer (un cuarto en pausa)"""
+    rng = np.random.default_rng(seed)
+    durations = rng.choice([5, 15, 25, 60], size=count)
+    elapsed = rng.random(count)
+    paused = rng.random(count) < 0.25
+
+    timers = []
+    for minutes, fraction, is_paused in zip(durations, elapsed, paused):
+        start = now - timedelta(minutes=float(minutes) * float(fraction))
+        timers.append({
+            'task_name': 'Benchmark',
+            'timer_type': 'pomodoro',
+            'duration_minutes': int(minutes),
+            'start_time': start,
+            'end_time': start + timedelta(minutes=int(minutes)),
+            'status': 'paused' if is_paused else 'running',
+            'paused_at': now if is_paused else None,
+            'paused_seconds': 0,
+            'elapsed_seconds': 0
+        })
+    return timers
+
+
+def seed_sqlite(conn, users: int, days: int, end: date, habits: int = 3, seed: int = 42) -> List[str]:
+    """
+    Sembrar una base SQLite (esquema de modules/sqlite_client.py) con `users` usuarios,
+    `days` días de tracking y `habits` hábitos con sus logs cada uno. Retorna los user_ids.
+    """
+    ids = user_ids(users)
+    tracking_columns = [
+        'user_id', 'date', 'day_of_week', 'identity_1_daily_3_completed', 'identity_1_daily_3_details',
+        'identity_2_priorities_completed', 'identity_2_priorities_details', 'code_commit_done',
+        'morning_mastery_done', 'identity_1_feedback', 'identity_2_feedback'
+    ]
+    tracking_sql = (
+        f'INSERT INTO "01_productivity_daily_tracking" ({", ".join(tracking_columns)}) '
+        f'VALUES ({", ".join("?" for _ in tracking_columns)})'
+    )
+    with conn:
+        for index, user_id in enumerate(ids):
+            rows = tracking_rows(days, end, user_id, seed=seed + index)
+            conn.executemany(tracking_sql, [
+                tuple(json.dumps(row[c], ensure_ascii=False) if isinstance(row[c], list)
+                      else int(row[c]) if isinstance(row[c], bool) else row[c]
+                      for c in tracking_columns)
+                for row in rows
+            ])
+
+            user_habits = habit_ids(habits, index)
+            conn.executemany(
+                'INSERT INTO "01_productivity_habits" (id, user_id, name, streak_count, last_completed_at, active) '
+                'VALUES (?, ?, ?, 0, NULL, 1)',
+                [(habit_id, user_id, f'Hábito {h + 1}') for h, habit_id in enumerate(user_habits)]
+            )
+            conn.executemany(
+                'INSERT INTO "01_productivity_habit_logs" (habit_id, user_id, completed_at, date_logged) '
+                'VALUES (?, ?, ?, ?)',
+                [(log['habit_id'], log['user_id'], log['completed_at'], log['date_logged'])
+                 for log in habit_logs(user_habits, days, end, user_id, seed=seed + index)]
+            )
+    return ids
@@ -0,0 +1,351 @@
+"""
+Suite de benchmarks por módulo con datasets sintéticos (7 días a 5 años, 1 a 10.000 usuarios)
+
+Cubre la carga del frame y los gráficos de DashboardBuilder, las stats semanales, la lógica
+de rachas de mark_habit_done, _build_context_prompt y TimerManager.get_remaining_time.
+Cada corrida se guarda como JSON en benchmarks/results/ para comparar tendencias entre commits.
+
+Uso:
+    python benchmarks/run.py                       # suite completa
+    python benchmarks/run.py --quick               # hasta 1 año y 100 usuarios
+    python benchmarks/run.py --filter dashboard    # solo casos cuyo nombre contiene 'dashboard'
+    python benchmarks/run.py --compare benchmarks/results/<anterior>.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Sin trazas ni caches del usuario: todo vive en un directorio temporal
+WORK_DIR = tempfile.mkdtemp(prefix='productivity_bench_')
+os.environ.setdefault('LOCAL_CACHE_DIR', WORK_DIR)
+os.environ['TRACE_LOG_PATH'] = ''
+
+import pytz
+
+from benchmarks import datasets
+from modules.sqlite_client import SQLiteClient
+from modules.dashboard_builder import DashboardBuilder, HABIT_HISTORY_DAYS, _FIGURE_BUILDERS
+from modules.habit_bitmap import HabitBitmaps
+from modules.habit_streaks import next_streak, to_local_date
+from modules.timer_manager import TimerManager
+from modules import metrics
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+TIMEZONE = 'America/Caracas'
+HABITS_PER_USER = 3
+
+# Casos con más filas día-usuario que esto se saltan (10.000 usuarios x 5 años son 18M filas)
+DEFAULT_MAX_ROWS = 1_000_000
+QUICK_MAX_DAYS = 365
+QUICK_MAX_USERS = 100
+
+# Registro de casos: (nombre, función que arma la ronda, grilla de parámetros)
+CASES: List[Tuple[str, Callable, List[Dict]]] = []
+
+
+def case(name: str, **grid):
+    """Registrar un caso; la grilla es el producto de las listas de parámetros"""
+    combos = [{}]
+    for param, values in grid.items():
+        combos = [dict(combo, **{param: value}) for combo in combos for value in values]
+
+    def register(fn):
+        CASES.append((name, fn, combos))
+        return fn
+    return register
+
+
+class BenchContext:
+    """Recursos compartidos entre casos: bases SQLite sembradas por (usuarios, días)"""
+
+    def __init__(self):
+        self.timezone = pytz.timezone(TIMEZONE)
+        self.today = datetime.now(self.timezone).date()
+        self._databases: Dict[Tuple[int, int], Tuple[str, List[str]]] = {}
+
+    def database(self, users: int, days: int) -> Tuple[str, List[str]]:
+        """Ruta y user_ids de una base SQLite con `users` usuarios y `days` días de historial"""
+        key = (users, days)
+        if key not in self._databases:
+            path = os.path.join(WORK_DIR, f'bench_{users}u_{days}d.db')
+            client = SQLiteClient(path, 'seed', TIMEZONE)
+            ids = datasets.seed_sqlite(client.conn, users, days, self.today, habits=HABITS_PER_USER)
+            self._databases[key] = (path, ids)
+        return self._databases[key]
+
+    def client(self, users: int, days: int) -> SQLiteClient:
+        """SQLiteClient del primer usuario de la base (users, days)"""
+        path, ids = self.database(users, days)
+        return SQLiteClient(path, ids[0], TIMEZONE)
+
+
+# --- DashboardBuilder ---
+
+@case('dashboard.load_frame', days=datasets.DAY_SIZES, users=datasets.USER_SIZES)
+def bench_load_frame(ctx: BenchContext, days: int, users: int):
+    """Consulta + frame completo de N días (builder nuevo: sin cache)"""
+    db = ctx.client(users, days)
+    return lambda: DashboardBuilder(db).get_last_n_days_data(days)
+
+
+@case('dashboard.chart_build', chart=list(_FIGURE_BUILDERS), days=datasets.DAY_SIZES)
+def bench_chart_build(ctx: BenchContext, chart: str, days: int):
+    """Construcción de la figura y su JSON (lo que se cachea por contenido del frame)"""
+    builder = DashboardBuilder(ctx.client(1, days))
+    if chart == 'heatmap':
+        df = builder.get_completion_matrix(days)[['date', 'total']]
+    else:
+        df = builder.get_last_n_days_data(days)
+    build = _FIGURE_BUILDERS[chart]
+    return lambda: build(df.copy(), builder.id1_name, builder.id2_name, days).to_json()
+
+
+@case('dashboard.chart_cached', chart=list(_FIGURE_BUILDERS), days=datasets.DAY_SIZES)
+def bench_chart_cached(ctx: BenchContext, chart: str, days: int):
+    """Gráfico por la API pública con frame y JSON ya cacheados (re-render típico)"""
+    builder = DashboardBuilder(ctx.client(1, days))
+    create = {
+        'consistency': lambda: builder.create_weekly_consistency_chart(days),
+        'balance': lambda: builder.create_identity_balance_chart(days),
+        'heatmap': lambda: builder.create_habit_completion_heatmap('total', days)
+    }[chart]
+    create()
+    return create
+
+
+@case('dashboard.completion_matrix', days=datasets.DAY_SIZES)
+def bench_completion_matrix(ctx: BenchContext, days: int):
+    """Matriz día x métrica del heatmap (frame y bitsets ya cargados)"""
+    builder = DashboardBuilder(ctx.client(1, days))
+    builder.get_completion_matrix(days)
+
+    def run():
+        builder._matrix_key = None
+        return builder.get_completion_matrix(days)
+    return run
+
+
+# --- Stats semanales y métricas ---
+
+@case('stats.weekly_sqlite', days=datasets.DAY_SIZES, users=datasets.USER_SIZES)
+def bench_weekly_sqlite(ctx: BenchContext, days: int, users: int):
+    """get_weekly_stats del backend local (consulta de 7 días sobre un historial de N)"""
+    db = ctx.client(users, days)
+    return db.get_weekly_stats
+
+
+@case('stats.summarize_records', days=datasets.DAY_SIZES)
+def bench_summarize_records(ctx: BenchContext, days: int):
+    """Kernel de las stats semanales aplicado a una ventana de N días de registros"""
+    rows = datasets.tracking_rows(days, ctx.today)
+    start = ctx.today - timedelta(days=days - 1)
+    return lambda: metrics.summarize_records(rows, start, ctx.today)
+
+
+@case('stats.summary_by_user', days=datasets.DAY_SIZES, users=datasets.USER_SIZES)
+def bench_summary_by_user(ctx: BenchContext, days: int, users: int):
+    """Resumen de todos los usuarios a la vez (reportes agregados)"""
+    frame = datasets.multi_user_frame(users, days, ctx.today)
+    return lambda: metrics.summary_by_user(frame)
+
+
+# --- Hábitos ---
+
+@case('habits.mark_habit_done', days=datasets.DAY_SIZES, users=[1, 100])
+def bench_mark_habit_done(ctx: BenchContext, days: int, users: int):
+    """mark_habit_done en SQLite con la racha viva (completado ayer): transacción completa"""
+    db = ctx.client(users, days)
+    habit_id = datasets.habit_ids(HABITS_PER_USER)[0]
+    yesterday = datetime.now(ctx.timezone) - timedelta(days=1)
+
+    def reset():
+        with db.conn:
+            db.conn.execute(
+                'UPDATE "01_productivity_habits" SET streak_count = 10, last_completed_at = ? WHERE id = ?',
+                (yesterday.isoformat(), habit_id)
+            )
+    return lambda: db.mark_habit_done(habit_id), reset
+
+
+@case('habits.next_streak', users=datasets.USER_SIZES)
+def bench_next_streak(ctx: BenchContext, users: int):
+    """Transición de racha (to_local_date + next_streak) para un hábito por usuario"""
+    now = datetime.now(pytz.utc)
+    last_completed = [(now - timedelta(hours=6 * (i % 12))).isoformat() for i in range(users)]
+
+    def run():
+        return [next_streak(5, to_local_date(value, ctx.timezone), ctx.today) for value in last_completed]
+    return run
+
+
+@case('habits.bitmap_summary', days=datasets.DAY_SIZES)
+def bench_bitmap_summary(ctx: BenchContext, days: int):
+    """Rachas, consistencia y 'never miss twice' de todos los hábitos desde los logs"""
+    habits = datasets.habit_ids(HABITS_PER_USER)
+    logs = datasets.habit_logs(habits, days, ctx.today)
+    first_day = ctx.today - timedelta(days=max(days, HABIT_HISTORY_DAYS) - 1)
+
+    def run():
+        bitmaps = HabitBitmaps.from_logs(logs, first_day, ctx.today, habits)
+        return bitmaps.summary(ctx.today, min(days, 30))
+    return run
+
+
+# --- Agente ---
+
+@case('agent.context_prompt', cache=['cold', 'warm'])
+def bench_context_prompt(ctx: BenchContext, cache: str):
+    """_build_context_prompt con el snapshot del día (cold: sin el cuerpo memoizado)"""
+    from modules.agent import ProductivityAgent
+
+    db = ctx.client(1, 30)
+    agent = ProductivityAgent('benchmark-key', db, TIMEZONE)
+    context = agent._get_current_context()
+    agent._build_context_prompt(context)
+
+    def run():
+        if cache == 'cold':
+            agent._context_body_cache = None
+        return agent._build_context_prompt(context)
+    return run
+
+
+# --- Timer ---
+
+@case('timer.get_remaining_time', users=datasets.USER_SIZES)
+def bench_remaining_time(ctx: BenchContext, users: int):
+    """Tiempo restante de un timer activo por usuario (running y en pausa)"""
+    manager = TimerManager()
+    timers = datasets.running_timers(users, datetime.now(pytz.utc))
+    return lambda: [manager.get_remaining_time(timer) for timer in timers]
+
+
+# --- Runner ---
+
+def measure(run: Callable, before: Optional[Callable], min_time: float, max_rounds: int) -> Dict:
+    """Rondas hasta acumular `min_time` segundos (mínimo 3); `before` corre fuera del tiempo"""
+    samples = []
+    total = 0.0
+    while len(samples) < 3 or (total < min_time and len(samples) < max_rounds):
+        if before:
+            before()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        total += elapsed
+
+    return {
+        'rounds': len(samples),
+        'min_ms': round(min(samples) * 1000, 4),
+        'median_ms': round(statistics.median(samples) * 1000, 4),
+        'mean_ms': round(statistics.mean(samples) * 1000, 4),
+        'stdev_ms': round(statistics.stdev(samples) * 1000, 4)
+    }
+
+
+def skip_reason(params: Dict, quick: bool, max_rows: int) -> Optional[str]:
+    """Motivo para saltar una combinación (None si se corre)"""
+    days = params.get('days', 1)
+    users = params.get('users', 1)
+    if days * users > max_rows:
+        return f'{days * users:,} filas > --max-rows {max_rows:,}'
+    if quick and (days > QUICK_MAX_DAYS or users > QUICK_MAX_USERS):
+        return '--quick'
+    return None
+
+
+def case_id(name: str, params: Dict) -> str:
+    """Identificador estable del caso (clave para comparar corridas)"""
+    return name + ''.join(f'[{key}={value}]' for key, value in params.items())
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], previous_path: str):
+    """Tabla de cambios de mediana contra una corrida anterior"""
+    with open(previous_path, encoding='utf-8') as f:
+        previous = {case_id(r['name'], r['params']): r for r in json.load(f)['results']}
+
+    print(f"\nComparación con {previous_path} (mediana, <1.00 = más rápido)")
+    for result in results:
+        key = case_id(result['name'], result['params'])
+        before = previous.get(key)
+        if before and before['median_ms'] > 0:
+            ratio = result['median_ms'] / before['median_ms']
+            print(f"{key:<70} {before['median_ms']:>10.3f} -> {result['median_ms']:>10.3f} ms  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filter', default='', help='Correr solo casos cuyo nombre contiene este texto')
+    parser.add_argument('--quick', action='store_true',
+                        help=f'Hasta {QUICK_MAX_DAYS} días y {QUICK_MAX_USERS} usuarios')
+    parser.add_argument('--max-rows', type=int, default=DEFAULT_MAX_ROWS,
+                        help='Máximo de filas día-usuario por caso')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Segundos medidos por caso')
+    parser.add_argument('--max-rounds', type=int, default=1000)
+    parser.add_argument('--output', help='Archivo JSON de resultados (default: benchmarks/results/<fecha>.json)')
+    parser.add_argument('--compare', help='JSON de una corrida anterior para comparar')
+    args = parser.parse_args()
+
+    # cache_data fuera de `streamlit run` avisa en cada llamada
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    ctx = BenchContext()
+    results, skipped = [], []
+    for name, setup, combos in CASES:
+        if args.filter not in name:
+            continue
+        for params in combos:
+            key = case_id(name, params)
+            reason = skip_reason(params, args.quick, args.max_rows)
+            if reason:
+                skipped.append({'name': name, 'params': params, 'reason': reason})
+                continue
+
+            prepared = setup(ctx, **params)
+            run, before = prepared if isinstance(prepared, tuple) else (prepared, None)
+            stats = measure(run, before, args.min_time, args.max_rounds)
+            results.append({'name': name, 'params': params, **stats})
+            print(f"{key:<70} {stats['median_ms']:>12.3f} ms  (min {stats['min_ms']:.3f}, {stats['rounds']} rondas)")
+
+    report = {
+        'created_at': datetime.now(pytz.utc).isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'args': vars(args),
+        'results': results,
+        'skipped': skipped
+    }
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n{len(results)} casos, {len(skipped)} saltados -> {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+-- =====================================================================
+-- 001 - Registro diario único por usuario y fecha
+-- Necesario para los upserts (on_conflict='user_id,date') de SupabaseClient
+-- =====================================================================
+
+-- 1. Eliminar duplicados creados por la condición de carrera "SELECT y luego INSERT"
+--    (se conserva la fila creada más tarde de cada (user_id, date); id desempata.
+--    ctid no sirve para esto: un UPDATE mueve la fila y su orden no es cronológico)
+DELETE FROM "01_productivity_daily_tracking"
+WHERE ctid IN (
+    SELECT ctid
+    FROM (
+        SELECT ctid,
+               ROW_NUMBER() OVER (
+                   PARTITION BY user_id, date
+                   ORDER BY created_at DESC NULLS LAST, id DESC
+               ) AS position
+        FROM "01_productivity_daily_tracking"
+    ) ranked
+    WHERE ranked.position > 1
+);
+
+-- 2. Restricción única usada como objetivo del ON CONFLICT
+ALTER TABLE "01_productivity_daily_tracking"
+    ADD CONSTRAINT daily_tracking_user_date_key UNIQUE (user_id, date);
+
+-- 3. Defaults para que una fila creada por upsert parcial tenga los mismos
+--    valores iniciales que get_today_tracking()
+ALTER TABLE "01_productivity_daily_tracking"
+    ALTER COLUMN identity_1_daily_3_completed SET DEFAULT 0,
+    ALTER COLUMN identity_2_priorities_completed SET DEFAULT 0,
+    ALTER COLUMN code_commit_done SET DEFAULT FALSE,
+    ALTER COLUMN morning_mastery_done SET DEFAULT FALSE;
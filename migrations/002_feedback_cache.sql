@@ -0,0 +1,11 @@
+-- =====================================================================
+-- 002 - Cache persistente de feedback de tareas
+-- Clave: sha256(versión del prompt | periodo | texto normalizado), ver modules/feedback_cache.py
+-- No guarda el texto de la tarea ni el user_id: solo el hash y el feedback generado
+-- =====================================================================
+
+CREATE TABLE IF NOT EXISTS "01_productivity_feedback_cache" (
+    cache_key TEXT PRIMARY KEY,
+    feedback TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
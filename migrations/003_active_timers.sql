@@ -0,0 +1,20 @@
+-- =====================================================================
+-- 003 - Timer activo del Focus Timer (uno por usuario)
+-- Permite rehidratar la sesión tras refrescar el navegador o reiniciar el worker
+-- Ver SupabaseClient.get_active_timer / save_active_timer / clear_active_timer
+-- =====================================================================
+
+CREATE TABLE IF NOT EXISTS "01_productivity_active_timers" (
+    user_id UUID PRIMARY KEY,
+    task_name TEXT NOT NULL DEFAULT '',
+    timer_type TEXT NOT NULL DEFAULT 'pomodoro',
+    duration_minutes INTEGER NOT NULL,
+    -- Instantes en UTC; end_time se extiende al reanudar tras una pausa
+    start_time TIMESTAMPTZ NOT NULL,
+    end_time TIMESTAMPTZ NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'paused', 'completed')),
+    paused_at TIMESTAMPTZ,
+    -- Segundos acumulados en pausa (contabilidad de pausas)
+    paused_seconds INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
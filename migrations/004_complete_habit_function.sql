@@ -0,0 +1,68 @@
+-- =====================================================================
+-- 004 - Completar hábito en una sola llamada (RPC)
+-- Usada por SupabaseClient.mark_habit_done; la versión Python equivalente
+-- está en modules/habit_streaks.py (backend SQLite)
+--
+-- Calcula la racha en la zona horaria del usuario, actualiza el hábito y
+-- agrega el log en una sola transacción. El SELECT ... FOR UPDATE serializa
+-- dobles clics: el segundo ve last_completed_at de hoy y no suma otra vez.
+-- =====================================================================
+
+CREATE OR REPLACE FUNCTION productivity_complete_habit(
+    p_habit_id UUID,
+    p_user_id UUID,
+    p_timezone TEXT DEFAULT 'America/Caracas'
+)
+RETURNS JSON
+LANGUAGE plpgsql
+SECURITY INVOKER  -- Respeta las políticas RLS del usuario que llama
+AS $$
+DECLARE
+    v_habit "01_productivity_habits"%ROWTYPE;
+    v_now TIMESTAMPTZ := NOW();
+    v_today DATE := (v_now AT TIME ZONE p_timezone)::DATE;
+    v_last_date DATE;
+    v_new_streak INTEGER;
+BEGIN
+    SELECT * INTO v_habit
+    FROM "01_productivity_habits"
+    WHERE id = p_habit_id AND user_id = p_user_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN json_build_object('success', FALSE, 'message', 'Hábito no encontrado');
+    END IF;
+
+    IF v_habit.last_completed_at IS NULL THEN
+        v_new_streak := 1;  -- Primer día
+    ELSE
+        v_last_date := (v_habit.last_completed_at AT TIME ZONE p_timezone)::DATE;
+
+        IF v_today - v_last_date <= 0 THEN
+            RETURN json_build_object(
+                'success', TRUE,
+                'message', 'Ya completado hoy',
+                'streak', v_habit.streak_count
+            );
+        ELSIF v_today - v_last_date = 1 THEN
+            v_new_streak := COALESCE(v_habit.streak_count, 0) + 1;
+        ELSE
+            v_new_streak := 1;  -- Rota la cadena (>1 día perdido)
+        END IF;
+    END IF;
+
+    UPDATE "01_productivity_habits"
+    SET streak_count = v_new_streak,
+        last_completed_at = v_now
+    WHERE id = p_habit_id;
+
+    INSERT INTO "01_productivity_habit_logs" (habit_id, user_id, completed_at, date_logged)
+    VALUES (p_habit_id, p_user_id, v_now, v_today);
+
+    RETURN json_build_object(
+        'success', TRUE,
+        'streak', v_new_streak,
+        'message', '¡Racha: ' || v_new_streak || ' días!'
+    );
+END;
+$$;
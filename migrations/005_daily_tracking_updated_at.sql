@@ -0,0 +1,29 @@
+-- =====================================================================
+-- 005 - updated_at en el registro diario para sincronización incremental
+-- HistoryCache (modules/history_cache.py) solo pide las filas con
+-- updated_at posterior al último sync: días nuevos y ediciones de días pasados
+-- =====================================================================
+
+-- 1. Columna con default para filas nuevas
+ALTER TABLE "01_productivity_daily_tracking"
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+-- 2. Mantenerla al día en cada UPDATE (incluye el DO UPDATE de los upserts)
+CREATE OR REPLACE FUNCTION productivity_touch_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS daily_tracking_touch_updated_at ON "01_productivity_daily_tracking";
+CREATE TRIGGER daily_tracking_touch_updated_at
+    BEFORE UPDATE ON "01_productivity_daily_tracking"
+    FOR EACH ROW EXECUTE FUNCTION productivity_touch_updated_at();
+
+-- 3. Índice para "cambios desde el watermark" por usuario
+CREATE INDEX IF NOT EXISTS daily_tracking_user_updated_at_idx
+    ON "01_productivity_daily_tracking" (user_id, updated_at);
@@ -1,11 +1,76 @@
 """
 Agente de Productividad con Anthropic Claude (sin LangChain legacy)
 """
-from anthropic import Anthropic
+from collections import deque
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime
 import pytz
-from typing import Dict, Optional, List
+import threading
+import time
+from typing import Dict, Iterator, Optional, List
 import os
+from modules.clients import get_anthropic_client, get_llm_executor, get_feedback_cache
+from modules.conversation_window import ConversationWindow
+from modules.feedback_cache import feedback_cache_key
+from modules import tracing
+
+
+# Presupuesto de tokens del historial literal y del resumen acumulado del chat
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv('CHAT_HISTORY_TOKEN_BUDGET', '8000'))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv('CHAT_SUMMARY_TOKEN_BUDGET', '500'))
+
+SUMMARY_SYSTEM_PROMPT = """Resume la conversación entre un usuario y su coach de productividad.
+Conserva compromisos, tareas, bloqueos y decisiones del usuario. Escribe en español,
+en viñetas breves, sin saludos ni relleno. Integra el resumen previo si existe."""
+
+# Espera máxima del resumen en segundo plano al empezar el siguiente turno (luego: resumen extractivo)
+SUMMARY_WAIT_SECONDS = float(os.getenv('LLM_SUMMARY_WAIT', '10'))
+
+# Llamadas recientes conservadas en usage_log
+USAGE_LOG_SIZE = 50
+
+# Timeout por tarea para el feedback de "Mínimo No Negociable"
+FEEDBACK_TIMEOUT_SECONDS = float(os.getenv('LLM_FEEDBACK_TIMEOUT', '20'))
+
+# Plazo total de generate_task_feedback (incluye la espera en la cola del pool LLM compartido)
+FEEDBACK_DEADLINE_SECONDS = float(os.getenv('LLM_FEEDBACK_DEADLINE', '30'))
+
+# Versión del prompt de feedback: cambiarla al editar el prompt invalida el cache
+FEEDBACK_PROMPT_VERSION = "mnn-2"
+
+FEEDBACK_SYSTEM_PROMPT = "Eres Productivity Coach, un coach de productividad directo y pragmático. Tu filosofía: Sistemas > Fuerza de Voluntad. Aplica el concepto de Mínimo No Negociable con precisión."
+
+# Instrucciones estáticas para analizar tareas (prefijo cacheable: la tarea va en el mensaje de usuario)
+FEEDBACK_INSTRUCTIONS = """Analiza la tarea que te envíe el usuario según el concepto de "Mínimo No Negociable" (Rob Dial).
+
+## Concepto Clave:
+El "Mínimo No Negociable" es la versión RIDÍCULAMENTE PEQUEÑA de una tarea, diseñada para eliminar la resistencia inicial. Debe cumplir estos criterios:
+- Tomar máximo 2-5 minutos
+- Estar 100% bajo tu control (no depender de terceros, horarios externos, etc.)
+- Ser algo que puedas hacer AHORA MISMO sin preparación
+
+## Ejemplos:
+- ✅ "Abrir el documento y escribir el título" (ridículamente pequeña)
+- ✅ "Hacer 1 llamada de prospección" (acción concreta bajo tu control)
+- ❌ "Ir a cita médica" (compromiso externo, no está bajo tu control total)
+- ❌ "Diseñar toda la oferta" (demasiado grande, genera resistencia)
+
+## Tu Feedback:
+1. Si la tarea ES ridículamente pequeña y bajo control del usuario: felicita brevemente.
+2. Si la tarea es una acción concreta pero podría ser más pequeña: sugiere la versión mini.
+3. Si la tarea es un compromiso externo (citas, reuniones, etc.): indica que es un "compromiso agendado", no un Mínimo No Negociable, y está bien tenerlo pero no confundirlo con el concepto.
+4. Si la tarea es muy grande: sugiere dividirla y di cuál sería el primer micro-paso.
+
+IMPORTANTE:
+- Responde SOLO con el feedback, sin prefijos ni etiquetas
+- Usa máximo 2 oraciones
+- Incluye 1 emoji relevante
+- Sé específico y honesto"""
+
+FEEDBACK_TASK_TEMPLATE = 'Tarea: "{task_text}"'
+
+# Breakpoint de prompt caching: todo lo anterior al bloque marcado se sirve desde el cache del proveedor
+CACHE_CONTROL = {"type": "ephemeral"}
 
 
 class ProductivityAgent:
@@ -15,15 +80,42 @@ class ProductivityAgent:
         self.db = db_client  # Supabase client
         self.timezone = pytz.timezone(timezone)
 
-        # Inicializar cliente de Anthropic directamente
-        self.client = Anthropic(api_key=api_key)
+        # Cliente de Anthropic compartido por el proceso (un solo pool de conexiones)
+        self.client = get_anthropic_client(api_key)
         self.model = "claude-sonnet-4-20250514"
 
-        # Historial de conversación en memoria
-        self.conversation_history = []
+        # Historial de conversación en memoria (ventana por tokens + resumen acumulado)
+        self.memory = ConversationWindow(
+            token_budget=CHAT_HISTORY_TOKEN_BUDGET,
+            summary_token_budget=CHAT_SUMMARY_TOKEN_BUDGET,
+            summarizer=self._summarize_history
+        )
 
-        # Cargar historial previo
-        self._rehydrate_memory()
+        # Cuerpo del prompt de contexto memoizado por versión del snapshot
+        self._context_body_cache = None
+
+        # Uso de tokens por llamada (incluye lecturas/escrituras del prompt cache)
+        self._usage_lock = threading.Lock()
+        self.usage_log = deque(maxlen=USAGE_LOG_SIZE)
+        self.usage_totals = {
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'cache_creation_input_tokens': 0,
+            'cache_read_input_tokens': 0
+        }
+
+        # Cargar historial previo en segundo plano: no bloquea el primer render,
+        # el primer chat espera a que termine (_ensure_memory_loaded)
+        self.rehydration_ms: Optional[float] = None
+        self.rehydration_wait_ms: Optional[float] = None
+        self._rehydrated_messages: List[Dict] = []
+        self._memory_loaded = False
+        self._rehydration_thread = threading.Thread(
+            target=tracing.bind(self._rehydrate_memory),
+            name='agent-rehydrate',
+            daemon=True
+        )
+        self._rehydration_thread.start()
 
         # Cargar prompt del sistema
         self.system_prompt = self._load_system_prompt()
@@ -46,27 +138,39 @@ class ProductivityAgent:
             Usa un tono directo, práctico y motivador. Ayuda al usuario a cumplir sus metas diarias."""
 
     def _rehydrate_memory(self):
-        """Cargar historial previo en la memoria del agente"""
+        """Traer historial previo de Supabase (corre en un hilo de fondo)"""
+        start = time.perf_counter()
         try:
-            recent_messages = self.db.get_recent_conversations(limit=5)
+            with tracing.span('agent', 'rehydrate', 'conversations') as current:
+                self._rehydrated_messages = self.db.get_recent_conversations(limit=5)
+                current.set(rows=len(self._rehydrated_messages))
+        except Exception as e:
+            print(f"Error al rehidratar memoria: {e}")
+        finally:
+            self.rehydration_ms = round((time.perf_counter() - start) * 1000, 1)
 
-            if not recent_messages:
-                return
+    def _ensure_memory_loaded(self):
+        """Esperar la rehidratación y volcarla en la memoria (solo la primera vez)"""
+        if self._memory_loaded:
+            return
 
-            for msg in recent_messages:
-                role = msg.get('role')
-                content = msg.get('content')
+        start = time.perf_counter()
+        with tracing.span('agent', 'rehydrate_wait', 'conversations'):
+            self._rehydration_thread.join()
+        self.rehydration_wait_ms = round((time.perf_counter() - start) * 1000, 1)
+        self._memory_loaded = True
 
-                if role and content:
-                    self.conversation_history.append({
-                        "role": role,
-                        "content": content
-                    })
+        recent_messages = self._rehydrated_messages
+        self._rehydrated_messages = []
+        if not recent_messages:
+            return
 
-            print(f"Memoria rehidratada con {len(recent_messages)} mensajes previos.")
+        self.memory.extend(recent_messages)
+        # Sin LLM en la rehidratación: lo que exceda el presupuesto se resume de forma extractiva
+        self.memory.compact(use_summarizer=False)
 
-        except Exception as e:
-            print(f"Error al rehidratar memoria: {e}")
+        print(f"Memoria rehidratada con {len(recent_messages)} mensajes previos "
+              f"(carga {self.rehydration_ms} ms, espera {self.rehydration_wait_ms} ms).")
 
     def _get_current_context(self) -> Dict:
         """Obtener contexto actual (hora, día, identidad activa)"""
@@ -83,14 +187,8 @@ class ProductivityAgent:
         else:
             identity = "Profesional MarTech"
 
-        # Obtener tracking del día
-        tracking = self.db.get_today_tracking()
-
-        # Obtener racha de código (LEGACY - Mantener por compatibilidad si es necesario o eliminar)
-        code_streak = self.db.get_code_streak()
-
-        # Obtener nuevos hábitos (Fase 3)
-        habits = self.db.get_habits()
+        # Snapshot del día (tracking, racha de código y hábitos) compartido en este render
+        snapshot = self.db.get_day_snapshot()
 
         return {
             'now': now,
@@ -99,20 +197,38 @@ class ProductivityAgent:
             'date': now.strftime('%Y-%m-%d'),
             'is_weekend': is_weekend,
             'identity': identity,
-            'tracking': tracking,
-            'code_streak': code_streak,
-            'habits': habits
+            'snapshot': snapshot,
+            'tracking': snapshot.today,
+            'code_streak': snapshot.code_streak,
+            'habits': list(snapshot.habits)
         }
 
     def _build_context_prompt(self, context: Dict) -> str:
         """Construir prompt de contexto para el agente"""
+        header = f"""
+CONTEXTO ACTUAL:
+- Fecha: {context['date']}
+- Día: {context['day']}
+- Hora: {context['time']}
+- Identidad activa: {context['identity'] if context['identity'] else 'Fin de semana - Sin protocolo estricto'}
+"""
+        # El resto solo depende de los datos del día: se reconstruye cuando cambia el snapshot
+        snapshot = context['snapshot']
+        cache_key = (snapshot.date, snapshot.version, snapshot.fetched_at)
+        if self._context_body_cache is None or self._context_body_cache[0] != cache_key:
+            self._context_body_cache = (cache_key, self._build_context_body(context))
+
+        return header + self._context_body_cache[1]
+
+    def _build_context_body(self, context: Dict) -> str:
+        """Secciones de tracking, tareas con feedback y racha del prompt de contexto"""
         tracking = context['tracking']
 
         # Obtener tareas y feedback
         morning_tasks = tracking.get('identity_1_daily_3_details', [])
         afternoon_tasks = tracking.get('identity_2_priorities_details', [])
-        morning_feedback = self.db.get_task_feedback("morning")
-        afternoon_feedback = self.db.get_task_feedback("afternoon")
+        morning_feedback = context['snapshot'].get_task_feedback("morning")
+        afternoon_feedback = context['snapshot'].get_task_feedback("afternoon")
 
         # Construir sección de tareas con feedback
         morning_tasks_text = ""
@@ -137,13 +253,7 @@ class ProductivityAgent:
                     if fb:
                         afternoon_tasks_text += f"     Feedback: {fb}\n"
 
-        prompt = f"""
-CONTEXTO ACTUAL:
-- Fecha: {context['date']}
-- Día: {context['day']}
-- Hora: {context['time']}
-- Identidad activa: {context['identity'] if context['identity'] else 'Fin de semana - Sin protocolo estricto'}
-
+        return f"""
 TRACKING DE HOY:
 - Daily 3 completadas: {tracking.get('identity_1_daily_3_completed', 0)}/3
 - Prioridades tarde completadas: {tracking.get('identity_2_priorities_completed', 0)}/3
@@ -160,56 +270,121 @@ RACHA DE CÓDIGO: {context['code_streak']} días
 
 ---
 """
-        return prompt
 
-    def chat(self, user_message: str) -> str:
-        """Procesar mensaje del usuario y generar respuesta"""
+    def _record_usage(self, call: str, usage):
+        """Registrar tokens de una llamada, incluyendo lecturas y escrituras del prompt cache"""
+        entry = {
+            'call': call,
+            'at': datetime.now(self.timezone).isoformat(),
+            'input_tokens': getattr(usage, 'input_tokens', 0) or 0,
+            'output_tokens': getattr(usage, 'output_tokens', 0) or 0,
+            'cache_creation_input_tokens': getattr(usage, 'cache_creation_input_tokens', 0) or 0,
+            'cache_read_input_tokens': getattr(usage, 'cache_read_input_tokens', 0) or 0
+        }
+        # El feedback se genera en hilos del pool compartido
+        with self._usage_lock:
+            self.usage_log.append(entry)
+            for key in self.usage_totals:
+                self.usage_totals[key] += entry[key]
+
+    @property
+    def conversation_history(self) -> List[Dict]:
+        """Mensajes literales de la ventana actual (solo lectura)"""
+        return self.memory.as_messages()
+
+    def _summarize_history(self, previous_summary: str, messages: List[Dict]) -> str:
+        """Plegar mensajes antiguos en el resumen acumulado (usado por ConversationWindow)"""
+        transcript = "\n".join(
+            f"{'Usuario' if m['role'] == 'user' else 'Coach'}: {m['content']}" for m in messages
+        )
+        prompt = f"RESUMEN PREVIO:\n{previous_summary or '(vacío)'}\n\nNUEVOS MENSAJES:\n{transcript}"
+
+        with tracing.span('anthropic', 'messages.create', 'summary', model=self.model) as current:
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=CHAT_SUMMARY_TOKEN_BUDGET,
+                system=SUMMARY_SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            current.set_usage(response.usage)
+        self._record_usage('summary', response.usage)
+        return response.content[0].text.strip()
+
+    def _prepare_chat(self, user_message: str):
+        """Construir contexto, system prompt y mensajes a enviar para un turno de chat"""
+        self._ensure_memory_loaded()
+        # Resumen lanzado al cerrar el turno anterior
+        self.memory.apply_pending(timeout=SUMMARY_WAIT_SECONDS)
+
         # Obtener contexto actual
         context = self._get_current_context()
 
-        # Construir prompt completo del sistema
+        # Construir prompt del sistema: prefijo estático cacheado + contexto dinámico
         context_prompt = self._build_context_prompt(context)
-        full_system = f"{self.system_prompt}\n\n{context_prompt}"
-
-        # Agregar mensaje del usuario al historial
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
+        if self.memory.summary:
+            context_prompt += f"\nRESUMEN DE LA CONVERSACIÓN PREVIA:\n{self.memory.summary}\n"
+        full_system = [
+            {"type": "text", "text": self.system_prompt, "cache_control": CACHE_CONTROL},
+            {"type": "text", "text": context_prompt}
+        ]
+
+        # Turnos recientes literales dentro del presupuesto de tokens
+        messages_to_send = self.memory.messages_for_request(user_message)
+
+        return context, full_system, messages_to_send
+
+    def _commit_turn(self, context: Dict, user_message: str, assistant_message: str):
+        """Agregar el turno completo al historial y guardarlo en Supabase"""
+        self.memory.append("user", user_message)
+        self.memory.append("assistant", assistant_message)
+        # El resumen con LLM corre en el pool compartido: no retrasa el fin del stream
+        self.memory.compact(submit=lambda fn, *args: get_llm_executor().submit(tracing.bind(fn), *args))
+
+        self.db.log_conversation(
+            identity=context['identity'],
+            messages=[
+                {'role': 'user', 'content': user_message},
+                {'role': 'assistant', 'content': assistant_message}
+            ]
+        )
 
-        # Limitar historial a últimos 20 mensajes para no exceder tokens
-        messages_to_send = self.conversation_history[-20:]
+    def chat_stream(self, user_message: str) -> Iterator[str]:
+        """
+        Procesar mensaje del usuario y generar la respuesta token a token.
+        El historial y el log se guardan solo cuando el stream termina completo:
+        si el consumidor cierra el generador (rerun o stop de Streamlit), la
+        conexión con Claude se cierra y el turno se descarta.
+        """
+        context, full_system, messages_to_send = self._prepare_chat(user_message)
+        chunks = []
 
         try:
-            # Llamar a Claude
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=2000,
-                system=full_system,
-                messages=messages_to_send
-            )
-
-            assistant_message = response.content[0].text
-
-            # Agregar respuesta al historial
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
-
-            # Guardar conversación en Supabase
-            self.db.log_conversation(
-                identity=context['identity'],
-                messages=[
-                    {'role': 'user', 'content': user_message},
-                    {'role': 'assistant', 'content': assistant_message}
-                ]
-            )
+            with tracing.span('anthropic', 'messages.stream', 'chat', model=self.model) as current, \
+                    self.client.messages.stream(
+                        model=self.model,
+                        max_tokens=2000,
+                        system=full_system,
+                        messages=messages_to_send
+                    ) as stream:
+                for text in stream.text_stream:
+                    if not chunks:
+                        current.set(first_token_ms=round((time.perf_counter() - current.started) * 1000, 2))
+                    chunks.append(text)
+                    # El span no queda activo en el hilo mientras el consumidor procesa el token
+                    with tracing.suspended(current):
+                        yield text
+                usage = stream.get_final_message().usage
+                current.set_usage(usage)
+                self._record_usage('chat', usage)
+        except Exception as e:
+            yield f"Error al generar respuesta: {e}"
+            return
 
-            return assistant_message
+        self._commit_turn(context, user_message, "".join(chunks))
 
-        except Exception as e:
-            return f"Error al generar respuesta: {e}"
+    def chat(self, user_message: str) -> str:
+        """Procesar mensaje del usuario y generar respuesta completa"""
+        return "".join(self.chat_stream(user_message))
 
     def get_morning_greeting(self) -> str:
         """Generar saludo de mañana automático"""
@@ -259,14 +434,12 @@ RACHA DE CÓDIGO: {context['code_streak']} días
         return self.chat(prompt)
 
     def mark_daily_3(self, tasks: List[str]):
-        """Marcar Daily 3 como completadas"""
-        completed = len([t for t in tasks if t.strip()])
-        self.db.update_daily_3(completed, tasks)
+        """Marcar Daily 3 como completadas (las tareas con texto cuentan como hechas)"""
+        self.db.update_daily_3([{'text': t, 'done': bool(t.strip())} for t in tasks])
 
     def mark_priorities(self, priorities: List[str]):
-        """Marcar prioridades de tarde como completadas"""
-        completed = len([p for p in priorities if p.strip()])
-        self.db.update_priorities(completed, priorities)
+        """Marcar prioridades de tarde como completadas (las que tienen texto cuentan como hechas)"""
+        self.db.update_priorities([{'text': p, 'done': bool(p.strip())} for p in priorities])
 
     def mark_code_done(self, commit_time: Optional[str] = None):
         """Marcar código como completado"""
@@ -298,60 +471,73 @@ RACHA DE CÓDIGO: {context['code_streak']} días
     def update_morning_mastery_text(self, text: str):
         return self.db.update_morning_mastery_text(text)
 
+    def _generate_single_feedback(self, task_text: str) -> str:
+        """Generar feedback para una sola tarea (se ejecuta en el pool compartido)"""
+        with tracing.span('anthropic', 'messages.create', 'task_feedback', model=self.model) as current:
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=250,
+                system=[{
+                    "type": "text",
+                    "text": f"{FEEDBACK_SYSTEM_PROMPT}\n\n{FEEDBACK_INSTRUCTIONS}",
+                    "cache_control": CACHE_CONTROL
+                }],
+                messages=[{"role": "user", "content": FEEDBACK_TASK_TEMPLATE.format(task_text=task_text)}],
+                timeout=FEEDBACK_TIMEOUT_SECONDS
+            )
+            current.set_usage(response.usage)
+        self._record_usage('task_feedback', response.usage)
+        return response.content[0].text.strip()
+
     def generate_task_feedback(self, tasks: List[Dict], period: str = "morning") -> List[str]:
         """
         Generar feedback personalizado para cada tarea.
         period: 'morning' o 'afternoon'
-        Retorna lista de strings con feedback para cada tarea.
+        Retorna lista de strings con feedback para cada tarea (en el mismo orden).
+        Las tareas sin cambios se responden desde el cache de feedback; el resto se
+        analiza en paralelo en el pool LLM compartido del proceso, cada una con su
+        propio timeout y sin que un error afecte a las demás. Todo el lote tiene un
+        plazo total (FEEDBACK_DEADLINE_SECONDS): las tareas que no terminan a tiempo
+        se cancelan si aún esperan en la cola y se responden con el texto de error.
         """
-        feedbacks = []
-
-        for i, task in enumerate(tasks):
-            task_text = task.get('text', '').strip()
-            if not task_text:
-                feedbacks.append("")
-                continue
-
-            # Construir prompt para analizar la tarea usando la misma filosofía del sistema
-            analysis_prompt = f"""Analiza esta tarea según el concepto de "Mínimo No Negociable" (Rob Dial):
-
-Tarea: "{task_text}"
-
-## Concepto Clave:
-El "Mínimo No Negociable" es la versión RIDÍCULAMENTE PEQUEÑA de una tarea, diseñada para eliminar la resistencia inicial. Debe cumplir estos criterios:
-- Tomar máximo 2-5 minutos
-- Estar 100% bajo tu control (no depender de terceros, horarios externos, etc.)
-- Ser algo que puedas hacer AHORA MISMO sin preparación
-
-## Ejemplos:
-- ✅ "Abrir el documento y escribir el título" (ridículamente pequeña)
-- ✅ "Hacer 1 llamada de prospección" (acción concreta bajo tu control)
-- ❌ "Ir a cita médica" (compromiso externo, no está bajo tu control total)
-- ❌ "Diseñar toda la oferta" (demasiado grande, genera resistencia)
-
-## Tu Feedback:
-1. Si la tarea ES ridículamente pequeña y bajo control del usuario: felicita brevemente.
-2. Si la tarea es una acción concreta pero podría ser más pequeña: sugiere la versión mini.
-3. Si la tarea es un compromiso externo (citas, reuniones, etc.): indica que es un "compromiso agendado", no un Mínimo No Negociable, y está bien tenerlo pero no confundirlo con el concepto.
-4. Si la tarea es muy grande: sugiere dividirla y di cuál sería el primer micro-paso.
-
-IMPORTANTE:
-- Responde SOLO con el feedback, sin prefijos ni etiquetas
-- Usa máximo 2 oraciones
-- Incluye 1 emoji relevante
-- Sé específico y honesto"""
-
+        cache = get_feedback_cache()
+
+        task_texts = [task.get('text', '').strip() for task in tasks]
+        keys = [feedback_cache_key(text, period, FEEDBACK_PROMPT_VERSION) if text else None for text in task_texts]
+        cached = cache.get_many(list(dict.fromkeys(k for k in keys if k)), self.db)
+
+        # Lanzar en paralelo solo las tareas sin feedback cacheado (una vez por clave)
+        executor = get_llm_executor()
+        futures = {}
+        for text, key in zip(task_texts, keys):
+            if key and key not in cached and key not in futures:
+                futures[key] = executor.submit(tracing.bind(self._generate_single_feedback), text)
+
+        results = {}
+        deadline = time.monotonic() + FEEDBACK_DEADLINE_SECONDS
+        for key, future in futures.items():
             try:
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=250,
-                    system="Eres Productivity Coach, un coach de productividad directo y pragmático. Tu filosofía: Sistemas > Fuerza de Voluntad. Aplica el concepto de Mínimo No Negociable con precisión.",
-                    messages=[{"role": "user", "content": analysis_prompt}]
-                )
-                feedback = response.content[0].text.strip()
-                feedbacks.append(feedback)
+                results[key] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FuturesTimeoutError:
+                # Si sigue en la cola no llega a ocupar un worker; si ya corre, su resultado se descarta
+                future.cancel()
+                results[key] = TimeoutError(f"sin respuesta en {FEEDBACK_DEADLINE_SECONDS:g}s")
             except Exception as e:
-                feedbacks.append(f"No se pudo generar feedback: {e}")
+                results[key] = e
+
+        # Solo se cachea el feedback generado con éxito
+        cache.put_many({k: v for k, v in results.items() if isinstance(v, str)}, self.db)
+
+        feedbacks = []
+        for key in keys:
+            if key is None:
+                feedbacks.append("")
+            elif key in cached:
+                feedbacks.append(cached[key])
+            elif isinstance(results[key], str):
+                feedbacks.append(results[key])
+            else:
+                feedbacks.append(f"No se pudo generar feedback: {results[key]}")
 
         return feedbacks
 
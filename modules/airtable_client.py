@@ -8,7 +8,11 @@ from typing import Dict, List, Optional
 
 
 class AirtableClient:
-    """Cliente para interactuar con Airtable"""
+    """
+    Cliente para interactuar con Airtable (legacy).
+    Solo cubre tracking diario, racha de código y conversaciones: no implementa
+    StorageBackend completo, por eso no está disponible en create_storage_backend.
+    """
 
     def __init__(self, api_key: str, base_id: str):
         self.api = Api(api_key)
@@ -47,8 +51,11 @@ class AirtableClient:
                 'code_commit_done': False
             }
 
-    def update_daily_3(self, completed: int, tasks_list: List[str]):
-        """Actualizar Daily 3 completadas"""
+    def update_daily_3(self, tasks_data: List[Dict]):
+        """
+        Actualizar Daily 3 (mismo contrato que StorageBackend.update_daily_3)
+        tasks_data: Lista de dicts [{'text': str, 'done': bool}]
+        """
         today = date.today().isoformat()
         records = self.daily_tracking.all(formula=f"{{date}}='{today}'")
 
@@ -56,13 +63,16 @@ class AirtableClient:
             self.daily_tracking.update(
                 records[0]['id'],
                 {
-                    'identity_1_daily_3_completed': completed,
-                    'identity_1_daily_3_list': json.dumps(tasks_list, ensure_ascii=False)
+                    'identity_1_daily_3_completed': sum(1 for t in tasks_data if t.get('done', False)),
+                    'identity_1_daily_3_list': json.dumps([t.get('text', '') for t in tasks_data], ensure_ascii=False)
                 }
             )
 
-    def update_priorities(self, completed: int, priorities_list: List[str]):
-        """Actualizar prioridades de tarde completadas"""
+    def update_priorities(self, priorities_data: List[Dict]):
+        """
+        Actualizar prioridades de tarde (mismo contrato que StorageBackend.update_priorities)
+        priorities_data: Lista de dicts [{'text': str, 'done': bool}]
+        """
         today = date.today().isoformat()
         records = self.daily_tracking.all(formula=f"{{date}}='{today}'")
 
@@ -70,8 +80,8 @@ class AirtableClient:
             self.daily_tracking.update(
                 records[0]['id'],
                 {
-                    'identity_2_priorities_completed': completed,
-                    'identity_2_priorities_list': json.dumps(priorities_list, ensure_ascii=False)
+                    'identity_2_priorities_completed': sum(1 for p in priorities_data if p.get('done', False)),
+                    'identity_2_priorities_list': json.dumps([p.get('text', '') for p in priorities_data], ensure_ascii=False)
                 }
             )
 
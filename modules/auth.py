@@ -10,12 +10,15 @@ import extra_streamlit_components as stx
 import time
 from datetime import datetime, timedelta
 import json
+from modules import tracing
 
 
 class AuthManager:
     """Gestor de autenticación usando Supabase Auth"""
 
     def __init__(self, url: str, key: str):
+        # Cliente propio por sesión: GoTrue guarda aquí los tokens del usuario,
+        # por eso no se usa el cliente compartido de modules.clients
         self.client: Client = create_client(url, key)
         self.cookie_manager = stx.CookieManager()
 
@@ -76,7 +79,8 @@ class AuthManager:
                     
                     if access_token and refresh_token:
                         print("DEBUG: Tokens found in cookie, attempting restore...")
-                        response = self.client.auth.set_session(access_token, refresh_token)
+                        with tracing.span('auth', 'set_session', 'auth'):
+                            response = self.client.auth.set_session(access_token, refresh_token)
                         if response.user:
                             return {
                                 "id": response.user.id,
@@ -110,10 +114,11 @@ class AuthManager:
              return False, "⚠️ Acceso restringido: Este email no está en la lista de permitidos."
 
         try:
-            response = self.client.auth.sign_up({
-                "email": email,
-                "password": password
-            })
+            with tracing.span('auth', 'sign_up', 'auth'):
+                response = self.client.auth.sign_up({
+                    "email": email,
+                    "password": password
+                })
 
             if response.user:
                 return True, "Usuario registrado exitosamente. Revisa tu email para confirmar la cuenta."
@@ -139,10 +144,11 @@ class AuthManager:
              return False, "⚠️ Acceso restringido: Este email no está autorizado.", None
 
         try:
-            response = self.client.auth.sign_in_with_password({
-                "email": email,
-                "password": password
-            })
+            with tracing.span('auth', 'sign_in', 'auth'):
+                response = self.client.auth.sign_in_with_password({
+                    "email": email,
+                    "password": password
+                })
 
             if response.user:
                 user_data = {
@@ -174,7 +180,8 @@ class AuthManager:
         Returns: (success: bool, message: str)
         """
         try:
-            self.client.auth.sign_out()
+            with tracing.span('auth', 'sign_out', 'auth'):
+                self.client.auth.sign_out()
             self.clear_session()
             return True, "Sesión cerrada exitosamente"
         except Exception as e:
@@ -186,7 +193,8 @@ class AuthManager:
         Returns: user dict or None
         """
         try:
-            response = self.client.auth.get_user()
+            with tracing.span('auth', 'get_user', 'auth'):
+                response = self.client.auth.get_user()
             if response and response.user:
                 return {
                     "id": response.user.id,
@@ -203,7 +211,8 @@ class AuthManager:
         Returns: (success: bool, message: str)
         """
         try:
-            self.client.auth.reset_password_email(email)
+            with tracing.span('auth', 'reset_password', 'auth'):
+                self.client.auth.reset_password_email(email)
             return True, "Se ha enviado un email con instrucciones para restablecer tu contraseña"
         except Exception as e:
             return False, f"Error: {str(e)}"
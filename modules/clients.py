@@ -0,0 +1,121 @@
+"""
+Registro de clientes compartidos por todo el proceso (Supabase, Anthropic, pool LLM, caches y cola de escritura)
+
+Los clientes de transporte (pool HTTP con keep-alive, TLS ya negociado) se crean
+una sola vez por proceso. Lo que depende del usuario (user_id, timezone, historial,
+tokens de auth) vive en los wrappers por sesión: SupabaseClient, ProductivityAgent
+y AuthManager.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from anthropic import Anthropic
+from supabase import create_client, Client
+from modules.feedback_cache import FeedbackCache
+from modules.history_cache import HistoryCache
+from modules.write_behind import WriteBehindQueue
+from modules import tracing
+from typing import Any, Callable, Dict, Tuple
+
+
+# Directorio local para archivos auxiliares (journal de escrituras diferidas, historial)
+LOCAL_CACHE_DIR = os.getenv(
+    'LOCAL_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+)
+
+# Las factories no piden otros clientes: las dependencias se resuelven antes de tomar el
+# lock, para no invertir el orden con los locks por función de st.cache_resource
+_registry_lock = threading.Lock()
+_registry: Dict[Tuple, Any] = {}
+
+
+def _get_or_create(key: Tuple, factory: Callable[[], Any]) -> Any:
+    """
+    Instancia única por proceso para `key`.
+    st.cache_resource no cachea fuera de un ScriptRunContext (hilos de fondo,
+    scripts de benchmark), así que el registro propio garantiza una sola
+    instancia también en esos casos.
+    """
+    with _registry_lock:
+        if key not in _registry:
+            _registry[key] = factory()
+        return _registry[key]
+
+
+@st.cache_resource(show_spinner=False)
+def get_supabase_client(url: str, key: str) -> Client:
+    """
+    Cliente de datos de Supabase compartido entre sesiones.
+    Solo para PostgREST: no llamar a .auth sobre él, porque GoTrue guarda la
+    sesión del usuario dentro del cliente y se filtraría entre sesiones.
+    """
+    return _get_or_create(('supabase', url, key), lambda: _traced_supabase_client(url, key))
+
+
+def _traced_supabase_client(url: str, key: str) -> Client:
+    """Cliente de datos con el hook de httpx que anota status y bytes en el span en curso"""
+    client = create_client(url, key)
+    client.postgrest.session.event_hooks['response'].append(tracing.on_http_response)
+    return client
+
+
+@st.cache_resource(show_spinner=False)
+def get_anthropic_client(api_key: str) -> Anthropic:
+    """Cliente de Anthropic compartido (su pool httpx es thread-safe)"""
+    return _get_or_create(('anthropic', api_key), lambda: Anthropic(
+        api_key=api_key,
+        max_retries=int(os.getenv('ANTHROPIC_MAX_RETRIES', '2'))
+    ))
+
+
+@st.cache_resource(show_spinner=False)
+def get_llm_executor() -> ThreadPoolExecutor:
+    """
+    Pool de hilos compartido para llamadas concurrentes al LLM.
+    Su tamaño (LLM_MAX_CONCURRENCY) es el límite de llamadas simultáneas de todo
+    el proceso, no por sesión, para no exceder el rate limit de la API.
+    """
+    max_workers = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+    return _get_or_create(('llm_executor', max_workers), lambda: ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix='llm'
+    ))
+
+
+@st.cache_resource(show_spinner=False)
+def get_feedback_cache() -> FeedbackCache:
+    """Cache de feedback de tareas compartido por todas las sesiones"""
+    max_entries = int(os.getenv('FEEDBACK_CACHE_MAX_ENTRIES', '1024'))
+    cache = _get_or_create(('feedback_cache', max_entries), lambda: FeedbackCache(max_entries))
+    tracing.register_collector('feedback_cache', cache.stats)
+    return cache
+
+
+@st.cache_resource(show_spinner=False)
+def get_write_behind_queue(url: str, key: str) -> WriteBehindQueue:
+    """
+    Cola de escritura diferida compartida por el proceso (un hilo escritor por backend).
+    Los registros llevan su user_id, así que todas las sesiones comparten la cola.
+    """
+    client = get_supabase_client(url, key)
+    queue = _get_or_create(('write_behind', url, key), lambda: WriteBehindQueue(
+        client,
+        max_size=int(os.getenv('WRITE_BEHIND_MAX_QUEUE', '1000')),
+        batch_size=int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '50')),
+        flush_interval=float(os.getenv('WRITE_BEHIND_FLUSH_SECONDS', '2')),
+        journal_retry_interval=float(os.getenv('WRITE_BEHIND_JOURNAL_RETRY_SECONDS', '30')),
+        journal_path=os.getenv('WRITE_BEHIND_JOURNAL', os.path.join(LOCAL_CACHE_DIR, 'write_behind_journal.jsonl'))
+    ))
+    tracing.register_collector('write_behind', queue.stats)
+    return queue
+
+
+@st.cache_resource(show_spinner=False)
+def get_history_cache() -> HistoryCache:
+    """Cache en disco del historial diario (un archivo para todos los usuarios del proceso)"""
+    path = os.getenv('HISTORY_CACHE_PATH', os.path.join(LOCAL_CACHE_DIR, 'history.db'))
+    cache = _get_or_create(('history_cache', path), lambda: HistoryCache(path))
+    tracing.register_collector('history_cache', cache.stats)
+    return cache
@@ -0,0 +1,194 @@
+"""
+Ventana de conversación con presupuesto de tokens y resumen acumulado
+"""
+import re
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+
+# Estimación local de tokens: ~4 caracteres por token (evita una llamada a la API por mensaje)
+CHARS_PER_TOKEN = 4
+
+# Caracteres por mensaje en el resumen extractivo de respaldo
+FALLBACK_SNIPPET_CHARS = 160
+
+# Fin de oración o de línea: punto de corte al acotar un resumen
+SENTENCE_END = re.compile(r'[.!?…](?=\s)|\n')
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimar tokens de un texto"""
+    return max(1, (len(text or '') + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+class ConversationWindow:
+    """
+    Historial del chat acotado por tokens.
+    Los turnos recientes se mantienen literales hasta `token_budget`; los más
+    antiguos se pliegan en un resumen acumulado de como máximo
+    `summary_token_budget` tokens, así la memoria de una sesión larga no crece.
+    Con `submit` (p. ej. executor.submit) el resumen se genera en segundo plano y
+    se aplica en el siguiente turno con apply_pending().
+    """
+
+    def __init__(self, token_budget: int = 8000, summary_token_budget: int = 500,
+                 summarizer: Optional[Callable[[str, List[Dict]], str]] = None):
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        # summarizer(resumen_anterior, mensajes_a_plegar) -> nuevo resumen
+        self.summarizer = summarizer
+
+        self.messages: List[Dict] = []
+        self.summary = ""
+        self._tokens = 0
+        # Resumen en curso: (future, resumen anterior, mensajes plegados)
+        self._pending: Optional[tuple] = None
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    @property
+    def tokens(self) -> int:
+        """Tokens estimados de los mensajes literales"""
+        return self._tokens
+
+    def append(self, role: str, content: str):
+        """Agregar un mensaje al final de la ventana"""
+        tokens = estimate_tokens(content)
+        self.messages.append({'role': role, 'content': content, 'tokens': tokens})
+        self._tokens += tokens
+
+    def extend(self, messages: List[Dict]):
+        """Agregar varios mensajes {'role', 'content'} ignorando los incompletos"""
+        for msg in messages:
+            if msg.get('role') and msg.get('content'):
+                self.append(msg['role'], msg['content'])
+
+    def clear(self):
+        """Vaciar mensajes y resumen (descarta un resumen en curso)"""
+        if self._pending:
+            self._pending[0].cancel()
+        self._pending = None
+        self.messages = []
+        self.summary = ""
+        self._tokens = 0
+
+    @property
+    def has_pending(self) -> bool:
+        """Hay mensajes plegados cuyo resumen aún no se aplicó"""
+        return self._pending is not None
+
+    def as_messages(self) -> List[Dict]:
+        """Mensajes literales en formato de la API"""
+        return [{'role': m['role'], 'content': m['content']} for m in self.messages]
+
+    def messages_for_request(self, user_message: str) -> List[Dict]:
+        """
+        Mensajes a enviar: la ventana reciente más el mensaje nuevo.
+        La API exige empezar con 'user', así que se omiten asistentes iniciales.
+        """
+        messages = self.as_messages()
+        while messages and messages[0]['role'] != 'user':
+            messages.pop(0)
+        messages.append({'role': 'user', 'content': user_message})
+        return messages
+
+    def compact(self, use_summarizer: bool = True,
+                submit: Optional[Callable[..., Future]] = None):
+        """
+        Plegar los mensajes más antiguos en el resumen hasta volver al presupuesto.
+        Siempre se conserva al menos el último turno (usuario + asistente).
+        Con `submit` el summarizer corre fuera del hilo actual y el resultado queda
+        pendiente hasta apply_pending(); la ventana se acota de inmediato igual.
+        """
+        folded = self._fold()
+        if not folded:
+            return
+
+        if not (use_summarizer and self.summarizer and submit):
+            self.summary = self.summarize(self.summary, folded, use_summarizer)
+            return
+
+        previous = self.summary
+        if self._pending:
+            # Un resumen anterior sin aplicar: se rehace junto con los mensajes nuevos
+            future, previous, pending_folded = self._pending
+            future.cancel()
+            folded = pending_folded + folded
+        self._pending = (submit(self.summarize, previous, folded), previous, folded)
+
+    def apply_pending(self, timeout: Optional[float] = None):
+        """
+        Aplicar el resumen generado en segundo plano. Si no termina en `timeout`
+        segundos se usa el resumen extractivo de los mismos mensajes.
+        """
+        if self._pending is None:
+            return
+        future, previous, folded = self._pending
+        self._pending = None
+        try:
+            self.summary = future.result(timeout=timeout)
+        except Exception as e:
+            future.cancel()
+            print(f"Error al resumir historial: {e}")
+            self.summary = self.summarize(previous, folded, use_summarizer=False)
+
+    def summarize(self, previous: str, folded: List[Dict], use_summarizer: bool = True) -> str:
+        """Nuevo resumen acotado a partir del anterior y los mensajes plegados"""
+        if use_summarizer and self.summarizer:
+            try:
+                summary = self.summarizer(previous, folded)
+                if summary:
+                    return self._truncate_head(summary)
+            except Exception as e:
+                print(f"Error al resumir historial: {e}")
+
+        return self._fallback_summary(previous, folded)
+
+    def _fold(self) -> List[Dict]:
+        """Sacar de la ventana los mensajes que exceden el presupuesto"""
+        folded = []
+        while self._tokens > self.token_budget and len(self.messages) > 2:
+            msg = self.messages.pop(0)
+            self._tokens -= msg['tokens']
+            folded.append(msg)
+
+        # La ventana debe empezar con un mensaje del usuario
+        while self.messages and self.messages[0]['role'] != 'user' and len(self.messages) > 1:
+            msg = self.messages.pop(0)
+            self._tokens -= msg['tokens']
+            folded.append(msg)
+
+        return [{'role': m['role'], 'content': m['content']} for m in folded]
+
+    @property
+    def _max_summary_chars(self) -> int:
+        return self.summary_token_budget * CHARS_PER_TOKEN
+
+    def _truncate_head(self, summary: str) -> str:
+        """Conservar el inicio del resumen del LLM, cortando en el último fin de oración que entra"""
+        max_chars = self._max_summary_chars
+        if len(summary) <= max_chars:
+            return summary
+        head = summary[:max_chars]
+        ends = [m.end() for m in SENTENCE_END.finditer(head)]
+        if ends and ends[-1] >= max_chars // 2:
+            return head[:ends[-1]].rstrip()
+        # Sin fin de oración razonable: cortar en el último espacio
+        return head.rsplit(None, 1)[0] if ' ' in head else head
+
+    def _fallback_summary(self, previous: str, messages: List[Dict]) -> str:
+        """
+        Resumen extractivo (sin LLM): inicio de cada mensaje plegado.
+        Al pasarse del límite se descartan líneas completas, empezando por las más antiguas.
+        """
+        lines = previous.splitlines() if previous else []
+        for msg in messages:
+            who = 'Usuario' if msg['role'] == 'user' else 'Coach'
+            snippet = ' '.join(msg['content'].split())[:FALLBACK_SNIPPET_CHARS]
+            lines.append(f"- {who}: {snippet}")
+
+        max_chars = self._max_summary_chars
+        while len(lines) > 1 and len("\n".join(lines)) > max_chars:
+            lines.pop(0)
+        return "\n".join(lines)[:max_chars]
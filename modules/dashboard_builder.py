@@ -3,62 +3,132 @@ Constructor de Dashboard con visualizaciones de consistencia
 """
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
+import streamlit as st
+import time
 from datetime import datetime, timedelta, date
+import numpy as np
 import pandas as pd
 from typing import Dict, List
+from modules.day_snapshot import SNAPSHOT_TTL_SECONDS
+from modules import metrics
+from modules.habit_bitmap import HabitBitmaps
+
+
+# Ventanas de historial disponibles en el dashboard (días)
+HISTORY_WINDOWS = {
+    7: 'Última semana',
+    30: 'Últimos 30 días',
+    90: 'Últimos 90 días',
+    365: 'Último año'
+}
+
+# Historial de hábitos para rachas y consistencia (un año cabe en 48 bytes por hábito)
+HABIT_HISTORY_DAYS = 365
+
+# Heatmap calendario: un año en grilla semanas x días de la semana.
+# Sus celdas de hábitos salen de los mismos bitsets (lectura paginada de logs): no pasar de HABIT_HISTORY_DAYS
+HEATMAP_DAYS = HABIT_HISTORY_DAYS
+WEEKDAY_LABELS = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
 
 
 class DashboardBuilder:
     """Constructor de gráficos para el dashboard de productividad"""
 
     def __init__(self, db_client, identity_1_name: str = "Empresario", identity_2_name: str = "Profesional"):
-        self.db = db_client  # Supabase client
+        self.db = db_client  # Backend de datos (ver modules/storage_backend.py)
         self.id1_name = identity_1_name
         self.id2_name = identity_2_name
 
+        # Un solo frame por render: (clave, instante de carga, frame de la ventana más amplia pedida)
+        self._frame_key = None
+        self._frame_loaded_at = 0.0
+        self._frame: pd.DataFrame = pd.DataFrame()
+
+        # Bitsets de hábitos con la misma clave que el frame
+        self._habits_key = None
+        self._habits_loaded_at = 0.0
+        self._habit_bitmaps: HabitBitmaps = None
+
+        # Matriz día x métrica del heatmap (se rearma cuando cambian el frame o los bitsets)
+        self._matrix_key = None
+        self._matrix: pd.DataFrame = pd.DataFrame()
+
     def get_last_7_days_data(self) -> pd.DataFrame:
         """Obtener datos de los últimos 7 días"""
+        return self.get_last_n_days_data(7)
+
+    def get_last_n_days_data(self, days: int = 7) -> pd.DataFrame:
+        """
+        Frame de los últimos N días compartido por todos los gráficos y stats.
+        Se carga una vez por clave (usuario, día, versión de datos) y TTL; las ventanas
+        más cortas son cortes del frame ya cargado. No modificar el frame devuelto.
+        """
+        key = (self.db.user_id, datetime.now(self.db.timezone).date(), self.db.data_version)
+        if (key == self._frame_key
+                and len(self._frame) >= days
+                and time.monotonic() - self._frame_loaded_at < SNAPSHOT_TTL_SECONDS):
+            return self._frame.tail(days).reset_index(drop=True)
+
+        # Recargar con la ventana más amplia ya usada: las demás salen del mismo frame
+        load_days = max(days, len(self._frame))
+        df = self._load_frame(load_days)
+        if df.empty:
+            return df
+        self._frame_key = key
+        self._frame_loaded_at = time.monotonic()
+        self._frame = df
+        return df.tail(days).reset_index(drop=True)
+
+    def get_habit_bitmaps(self) -> HabitBitmaps:
+        """
+        Bitsets del último año de todos los hábitos del usuario (una consulta de logs por clave y TTL).
+        Rachas, consistencia, 'never miss twice' y el heatmap salen de aquí.
+        """
+        today_tz = datetime.now(self.db.timezone).date()
+        key = (self.db.user_id, today_tz, self.db.data_version)
+        if (key == self._habits_key and self._habit_bitmaps is not None
+                and time.monotonic() - self._habits_loaded_at < SNAPSHOT_TTL_SECONDS):
+            return self._habit_bitmaps
+
+        habit_ids = [habit['id'] for habit in self.db.get_day_snapshot().habits]
         try:
-            # Obtener registros de los últimos 7 días desde Supabase
-            records = self.db.get_last_n_days_tracking(days=7)
-
-            # Convertir a DataFrame
-            data = []
-            for record in records:
-                data.append({
-                    'date': record.get('date'),
-                    'day': record.get('day_of_week', ''),
-                    'daily_3': record.get('identity_1_daily_3_completed', 0),
-                    'priorities': record.get('identity_2_priorities_completed', 0),
-                    'code_done': 1 if record.get('code_commit_done', False) else 0,
-                    'morning_mastery': 1 if record.get('morning_mastery_done', False) else 0
-                })
-
-            if not data:
-                df = pd.DataFrame(columns=['date', 'day', 'daily_3', 'priorities', 'code_done', 'morning_mastery'])
-            else:
-                df = pd.DataFrame(data)
-
-            # Asegurar que tenemos todos los 7 días (Timezone Aware)
-            # Usar datetime.now(tz) para obtener la fecha correcta del usuario
+            logs = self.db.get_habit_logs_last_n_days(HABIT_HISTORY_DAYS)
+        except Exception as e:
+            print(f"Error al obtener logs de hábitos: {e}")
+            logs = []
+
+        self._habit_bitmaps = HabitBitmaps.from_logs(
+            logs, today_tz - timedelta(days=HABIT_HISTORY_DAYS - 1), today_tz, habit_ids=habit_ids
+        )
+        self._habits_key = key
+        self._habits_loaded_at = time.monotonic()
+        return self._habit_bitmaps
+
+    def get_habit_summary(self, window_days: int = 30) -> Dict[str, Dict]:
+        """
+        Por hábito: current_streak, longest_streak, consistency (% en la ventana) y missed_twice.
+        Los bitsets cubren HABIT_HISTORY_DAYS: una racha que llega al inicio de esa ventana
+        puede haber empezado antes, y ahí manda el streak_count guardado si es mayor.
+        """
+        summary = self.get_habit_bitmaps().summary(datetime.now(self.db.timezone).date(), window_days)
+        for habit in self.db.get_day_snapshot().habits:
+            habit_summary = summary.get(habit['id'])
+            # Hasta ayer hay HABIT_HISTORY_DAYS - 1 días cargados (hoy puede estar pendiente)
+            if habit_summary and habit_summary['current_streak'] >= HABIT_HISTORY_DAYS - 1:
+                habit_summary['current_streak'] = max(habit_summary['current_streak'], habit.get('streak_count') or 0)
+                habit_summary['longest_streak'] = max(habit_summary['longest_streak'], habit_summary['current_streak'])
+        return summary
+
+    def _load_frame(self, days: int) -> pd.DataFrame:
+        """Consultar el historial de N días y completarlo con los días sin registro"""
+        try:
+            records = self.db.get_last_n_days_tracking(days=days)
+
+            # Frame columnar con todos los N días (Timezone Aware: día local del usuario)
             today_tz = datetime.now(self.db.timezone).date()
-            start_date = today_tz - timedelta(days=6)
-            
-            all_dates = pd.date_range(start=start_date, end=today_tz, freq='D')
-            df_complete = pd.DataFrame({'date': all_dates.strftime('%Y-%m-%d')})
-            
-            # Merge y fillna
-            df_complete = df_complete.merge(df, on='date', how='left')
-
-            # Rellenar valores nulos con 0 para métricas numéricas
-            cols_to_fill = ['daily_3', 'priorities', 'code_done', 'morning_mastery']
-            df_complete[cols_to_fill] = df_complete[cols_to_fill].fillna(0)
-            
-            # Asegurar tipos numéricos explícitos para evitar errores de concatenación o cálculo
-            for col in cols_to_fill:
-                df_complete[col] = pd.to_numeric(df_complete[col])
-            
-            return df_complete
+            start_date = today_tz - timedelta(days=days-1)
+            return metrics.day_frame(records, start_date, today_tz)
 
         except Exception as e:
             import streamlit as st
@@ -69,26 +139,20 @@ class DashboardBuilder:
             # Retornar DataFrame vacío
             return pd.DataFrame()
 
-    def create_weekly_consistency_chart(self) -> go.Figure:
-        """Crear gráfico de consistencia semanal"""
-        df = self.get_last_7_days_data()
+    def create_weekly_consistency_chart(self, days: int = 7) -> go.Figure:
+        """Crear gráfico de consistencia (semanal por defecto)"""
+        return self._figure('consistency', self.get_last_n_days_data(days), days)
 
-        if df.empty:
-            # Gráfico vacío
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay datos disponibles",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
+    @staticmethod
+    def _build_consistency_figure(df: pd.DataFrame, id1_name: str, id2_name: str, days: int) -> go.Figure:
+        """Figura de consistencia a partir del frame (ver _figure_json)"""
 
         # Crear gráfico de barras agrupadas
         fig = go.Figure()
 
         # Daily 3 (Identity 1)
         fig.add_trace(go.Bar(
-            name=f'{self.id1_name} (AM)',
+            name=f'{id1_name} (AM)',
             x=df['date'],
             y=df['daily_3'],
             marker_color='#00D4AA',
@@ -98,7 +162,7 @@ class DashboardBuilder:
 
         # Priorities (Identity 2)
         fig.add_trace(go.Bar(
-            name=f'{self.id2_name} (PM)',
+            name=f'{id2_name} (PM)',
             x=df['date'],
             y=df['priorities'],
             marker_color='#FF6B6B',
@@ -107,7 +171,7 @@ class DashboardBuilder:
         ))
 
         fig.update_layout(
-            title='Consistencia Semanal',
+            title='Consistencia Semanal' if days == 7 else f'Consistencia - {HISTORY_WINDOWS.get(days, f"{days} días")}',
             xaxis_title='Fecha',
             yaxis_title='Completadas',
             barmode='group',
@@ -153,101 +217,111 @@ class DashboardBuilder:
 
         return fig
 
-    def create_habit_completion_heatmap(self) -> go.Figure:
-        """Crear heatmap de completitud de hábitos"""
-        df = self.get_last_7_days_data()
-
+    def get_completion_matrix(self, days: int = HEATMAP_DAYS) -> pd.DataFrame:
+        """
+        Matriz día x métrica (% de completitud) compartida por todas las variantes del heatmap.
+        Columnas: date, total, identity_1, identity_2 y una por hábito (id). Se arma una vez por
+        frame y bitsets cargados; no modificar el frame devuelto.
+        """
+        df = self.get_last_n_days_data(days)
+        bitmaps = self.get_habit_bitmaps()
+        key = (id(self._frame), self._frame_loaded_at, id(bitmaps), days)
+        if key == self._matrix_key:
+            return self._matrix
         if df.empty:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay datos disponibles",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
-
-        # Traer logs de hábitos dinámicos para sumar
-        try:
-            habit_logs = self.db.get_habit_logs_last_n_days(7)
-            
-            # Agrupar por fecha
-            # Estructura log: {'date_logged': 'YYYY-MM-DD', 'habit_id': ...}
-            habit_counts = {}
-            for log in habit_logs:
-                d = log.get('date_logged')
-                habit_counts[d] = habit_counts.get(d, 0) + 1
-        except:
-            habit_counts = {}
-
-        # Calcular porcentaje de completitud por día
-        # Asegurar que las columnas existen y son numéricas (redundante pero seguro)
-        for col in ['daily_3', 'priorities', 'code_done', 'morning_mastery']:
-            if col not in df.columns:
-                df[col] = 0
-            df[col] = pd.to_numeric(df[col])
-
-        # Crear columna de hábitos dinámicos mapeada por fecha
-        df['dynamic_habits'] = df['date'].map(habit_counts).fillna(0)
-
-        # Fórmula ajustada: (Base (10 pts) + Dynamic Habits) / (10 + Dynamic Habits Max Teórico??)
-        # Para simplificar y no complicar el denominador, sumaremos un "bonus" por hábito
-        # O asumiremos que el usuario tiene X hábitos activos.
-        # Por ahora, mantengamos el denominador base 10 pero permitamos que suba >100% si hacen mucho extra
-        # O mejor, sumemos al numerador y aumentemos denominador ligeramente.
-        
-        # Enfoque: Base tasks valen 10 puntos total. Cada hábito extra vale 1 punto.
-        # Score = (Puntos Obtenidos) / (10 + Puntos Extra Posibles)
-        # Como no sabemos cuántos hábitos "debía" hacer ese día histórico, usaremos un denominador fijo + dinámico
-        # Simplificación para UX: Score = (Base + Habits) / 10 * 100. Puede pasar de 100%, ¡eso motiva!
-        
-        df['total_scorable'] = df['daily_3'] + df['priorities'] + df['code_done'] * 3 + df['morning_mastery'] + df['dynamic_habits']
-        df['completion_rate'] = (df['total_scorable'] / 10) * 100
-        
-        # Cap visual al 100% o dejar que "brille"? Dejemos cap en 100 para heatmap standard, o 110?
-        # Mejor cap en 100 para consistencia visual
-        # df['completion_rate'] = df['completion_rate'].clip(upper=100) 
-        
-        # Crear heatmap
-        # Importante: z debe ser lista de listas de tipos nativos (int/float), no numpy arrays
-        z_values = [df['completion_rate'].fillna(0).tolist()]
-        
+            return df
+
+        # Hábitos hechos por día: (hábitos x días) alineado a la derecha con el frame
+        start_date = date.fromisoformat(df['date'].iloc[0])
+        end_date = date.fromisoformat(df['date'].iloc[-1])
+        habits_done = bitmaps.days_matrix(start_date, end_date)
+        habits_done = np.pad(habits_done, ((0, 0), (len(df) - habits_done.shape[1], 0)))
+
+        matrix = pd.DataFrame({
+            'date': df['date'],
+            # Puntaje total: tareas base valen 10 puntos (código 3) y cada hábito suma 1.
+            # Puede pasar de 100%, ¡eso motiva! (la escala de color se corta en 100)
+            'total': (df['daily_3'] + df['priorities'] + df['code_done'] * 3 + df['morning_mastery']
+                      + habits_done.sum(axis=0)) / 10 * 100,
+            'identity_1': df['daily_3'] / metrics.TASKS_PER_DAY * 100,
+            'identity_2': df['priorities'] / metrics.TASKS_PER_DAY * 100
+        })
+        for habit_id, done in zip(bitmaps.habit_ids, habits_done):
+            matrix[habit_id] = done * 100.0
+
+        self._matrix_key = key
+        self._matrix = matrix
+        return matrix
+
+    def get_heatmap_variants(self) -> Dict[str, str]:
+        """Variantes del heatmap: {columna de la matriz: etiqueta}"""
+        variants = {
+            'total': 'Completitud total',
+            'identity_1': f'ID #1: {self.id1_name}',
+            'identity_2': f'ID #2: {self.id2_name}'
+        }
+        for habit in self.db.get_day_snapshot().habits:
+            variants[habit['id']] = habit['name']
+        return variants
+
+    def create_habit_completion_heatmap(self, variant: str = 'total', days: int = HEATMAP_DAYS) -> go.Figure:
+        """Heatmap calendario (semanas x días de la semana) de una variante de la matriz"""
+        matrix = self.get_completion_matrix(days)
+        if matrix.empty or variant not in matrix.columns:
+            return _empty_figure()
+
+        label = self.get_heatmap_variants().get(variant, variant)
+        df = matrix[['date', variant]].rename(columns={variant: label})
+        return self._figure('heatmap', df, days)
+
+    @staticmethod
+    def _build_heatmap_figure(df: pd.DataFrame, id1_name: str, id2_name: str, days: int) -> go.Figure:
+        """Figura calendario a partir de (date, valor %) (ver create_habit_completion_heatmap)"""
+        label = df.columns[1]
+        dates = pd.to_datetime(df['date'])
+
+        # Posición de cada día en la grilla: filas = lunes..domingo, columnas = semanas
+        offset = dates.iloc[0].dayofweek
+        positions = np.arange(len(df)) + offset
+        weeks, weekdays = positions // 7, positions % 7
+        n_weeks = int(weeks[-1]) + 1
+
+        z = np.full((7, n_weeks), np.nan)
+        z[weekdays, weeks] = df[label].to_numpy(dtype=float)
+        hover_dates = np.full((7, n_weeks), '', dtype=object)
+        hover_dates[weekdays, weeks] = df['date'].to_numpy()
+        week_starts = pd.date_range(start=dates.iloc[0] - pd.Timedelta(days=offset), periods=n_weeks, freq='7D')
+
         fig = go.Figure(data=go.Heatmap(
-            z=z_values,
-            x=df['date'].tolist(),
-            y=['Completitud'],
-            colorscale='RdYlGn',     # Escala estándar Red-Yellow-Green
-            text=[[f"{val:.0f}%" for val in z_values[0]]],
-            texttemplate="%{text}",
-            textfont={"size": 14, "color": "white"}, # Forzar texto blanco
-            colorbar=dict(title="% Completado"),
-            hovertemplate='%{x}<br>Completitud: %{z:.0f}%<extra></extra>',
+            z=z,
+            x=week_starts.strftime('%Y-%m-%d'),
+            y=WEEKDAY_LABELS,
+            customdata=hover_dates,
+            colorscale='Greens',
             zmin=0, zmax=100,
-            xgap=3, # Separación entre celdas
-            ygap=3
+            xgap=2, ygap=2,
+            colorbar=dict(title="% Completado"),
+            hovertemplate='%{customdata}<br>Completitud: %{z:.0f}%<extra></extra>'
         ))
 
         fig.update_layout(
-            title='Mapa de Calor - Completitud Diaria',
-            xaxis_title='Fecha',
-            height=200,
-            # plot_bgcolor='rgba(0,0,0,0)', # Comentado para ver si ayuda el contraste
-            # paper_bgcolor='rgba(0,0,0,0)',
+            title=f'Mapa de Calor - {label}',
+            height=250,
+            yaxis=dict(autorange='reversed'),
+            xaxis=dict(tickformat='%b', dtick='M1', type='date'),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
         )
 
         return fig
 
-    def create_identity_balance_chart(self) -> go.Figure:
+    def create_identity_balance_chart(self, days: int = 7) -> go.Figure:
         """Crear gráfico de balance entre identidades"""
-        df = self.get_last_7_days_data()
+        return self._figure('balance', self.get_last_n_days_data(days), days)
 
-        if df.empty:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay datos disponibles",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
+    @staticmethod
+    def _build_balance_figure(df: pd.DataFrame, id1_name: str, id2_name: str, days: int) -> go.Figure:
+        """Figura de balance entre identidades a partir del frame (ver _figure_json)"""
 
         # Calcular totales
         total_daily_3 = df['daily_3'].sum()
@@ -255,14 +329,14 @@ class DashboardBuilder:
 
         # Crear gráfico de dona
         fig = go.Figure(data=[go.Pie(
-            labels=[f'ID #1: {self.id1_name}', f'ID #2: {self.id2_name}'],
+            labels=[f'ID #1: {id1_name}', f'ID #2: {id2_name}'],
             values=[total_daily_3, total_priorities],
             hole=.4,
             marker_colors=['#00D4AA', '#FF6B6B']
         )])
 
         fig.update_layout(
-            title='Balance entre Identidades (Última Semana)',
+            title=f'Balance entre Identidades ({HISTORY_WINDOWS.get(days, f"{days} días")})',
             annotations=[dict(text='Balance', x=0.5, y=0.5, font_size=20, showarrow=False)],
             height=300,
             paper_bgcolor='rgba(0,0,0,0)',
@@ -270,23 +344,44 @@ class DashboardBuilder:
 
         return fig
 
+    def _figure(self, chart: str, df: pd.DataFrame, days: int) -> go.Figure:
+        """Figura desde el JSON cacheado por contenido del frame (vacía si no hay datos)"""
+        if df.empty:
+            return _empty_figure()
+        return pio.from_json(_figure_json(chart, df, self.id1_name, self.id2_name, days))
+
     def get_weekly_summary_stats(self) -> Dict:
-        """Obtener estadísticas resumidas de la semana"""
-        df = self.get_last_7_days_data()
+        """Obtener estadísticas resumidas de la semana (definiciones en modules/metrics.py)"""
+        return self.get_summary_stats(7)
 
+    def get_summary_stats(self, days: int = 7) -> Dict:
+        """Totales, metas y tasas de los últimos N días"""
+        df = self.get_last_n_days_data(days)
         if df.empty:
-            return {
-                'total_daily_3': 0,
-                'total_priorities': 0,
-                'code_days': 0,
-                'morning_mastery_days': 0,
-                'avg_completion_rate': 0
-            }
+            today_tz = datetime.now(self.db.timezone).date()
+            df = metrics.day_frame([], today_tz - timedelta(days=days-1), today_tz)
+        return metrics.summary(df)
 
-        return {
-            'total_daily_3': int(df['daily_3'].sum()),
-            'total_priorities': int(df['priorities'].sum()),
-            'code_days': int(df['code_done'].sum()),
-            'morning_mastery_days': int(df['morning_mastery'].sum()),
-            'avg_completion_rate': ((df['daily_3'].sum() + df['priorities'].sum()) / (len(df) * 6)) * 100
-        }
+
+def _empty_figure() -> go.Figure:
+    """Gráfico vacío"""
+    fig = go.Figure()
+    fig.add_annotation(
+        text="No hay datos disponibles",
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False
+    )
+    return fig
+
+
+_FIGURE_BUILDERS = {
+    'consistency': DashboardBuilder._build_consistency_figure,
+    'heatmap': DashboardBuilder._build_heatmap_figure,
+    'balance': DashboardBuilder._build_balance_figure
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def _figure_json(chart: str, df: pd.DataFrame, id1_name: str, id2_name: str, days: int) -> str:
+    """JSON de la figura; se reconstruye solo si cambia el contenido del frame o los nombres"""
+    return _FIGURE_BUILDERS[chart](df.copy(), id1_name, id2_name, days).to_json()
@@ -0,0 +1,103 @@
+"""
+Snapshot inmutable del día para una ejecución del script de Streamlit
+"""
+import copy
+import os
+import time
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple
+
+
+# Tiempo máximo que se reutiliza el snapshot del día sin escrituras locales
+SNAPSHOT_TTL_SECONDS = float(os.getenv('SNAPSHOT_TTL_SECONDS', '60'))
+
+DEFAULT_TRACKING = {
+    'identity_1_daily_3_completed': 0,
+    'identity_2_priorities_completed': 0,
+    'code_commit_done': False,
+    'morning_mastery_done': False
+}
+
+DEFAULT_SETTINGS = {
+    'identity_1_name': 'Empresario Exitoso',
+    'identity_2_name': 'Profesional MarTech'
+}
+
+
+def _freeze(data: Dict) -> Mapping:
+    """Envolver un dict en una vista de solo lectura"""
+    return MappingProxyType(dict(data or {}))
+
+
+@dataclass(frozen=True)
+class DaySnapshot:
+    """
+    Foto de los datos del usuario para el día actual.
+    La leen el agente, el sidebar y las páginas; se reutiliza entre renders
+    mientras no haya escrituras (version) ni expire el TTL (fetched_at).
+    Los mappings son de solo lectura: copiar antes de modificar listas internas.
+    """
+    date: str
+    yesterday_date: str
+    today: Mapping
+    yesterday: Mapping
+    settings: Mapping
+    habits: Tuple[Mapping, ...]
+    code_streak: int
+    # Sello de versión: contador de escrituras locales del cliente al cargar el snapshot
+    version: int = 0
+    # Momento de carga (time.monotonic) para expirar por TTL
+    fetched_at: float = 0.0
+
+    @classmethod
+    def build(cls, date: str, yesterday_date: str, today: Dict, yesterday: Dict,
+              settings: Dict, habits: List[Dict], code_streak: int,
+              version: int = 0, fetched_at: float = 0.0) -> 'DaySnapshot':
+        """Construir snapshot congelando los dicts recibidos"""
+        return cls(
+            date=date,
+            yesterday_date=yesterday_date,
+            today=_freeze({**DEFAULT_TRACKING, **(today or {})}),
+            yesterday=_freeze(yesterday),
+            settings=_freeze({**DEFAULT_SETTINGS, **(settings or {})}),
+            habits=tuple(_freeze(h) for h in (habits or [])),
+            code_streak=code_streak or 0,
+            version=version,
+            fetched_at=fetched_at
+        )
+
+    def with_today(self, fields: Dict, version: int) -> 'DaySnapshot':
+        """
+        Copia con columnas de hoy ya escritas en la base (upsert confirmado) y el nuevo sello
+        de versión. fetched_at no cambia: el TTL para cambios de otros dispositivos sigue corriendo.
+        """
+        # Copia profunda: el llamador puede seguir modificando sus listas de tareas
+        return replace(self, today=_freeze({**self.today, **copy.deepcopy(fields)}), version=version)
+
+    def is_fresh(self, date: str, version: int) -> bool:
+        """Sigue vigente: mismo día, sin escrituras locales posteriores y dentro del TTL"""
+        return (self.date == date
+                and self.version == version
+                and time.monotonic() - self.fetched_at < SNAPSHOT_TTL_SECONDS)
+
+    def get_task_feedback(self, period: str = "morning") -> List[str]:
+        """Feedback guardado de tareas (mismo formato que SupabaseClient.get_task_feedback)"""
+        column_name = 'identity_1_feedback' if period == 'morning' else 'identity_2_feedback'
+        feedback = self.today.get(column_name)
+        return list(feedback) if feedback else ["", "", ""]
+
+    @property
+    def breadcrumbs_today(self) -> str:
+        """Breadcrumbs escritos hoy para mañana"""
+        return self.today.get('breadcrumbs_tomorrow', '') or ''
+
+    @property
+    def breadcrumbs_yesterday(self) -> str:
+        """Breadcrumbs escritos ayer para hoy"""
+        return self.yesterday.get('breadcrumbs_tomorrow', '') or ''
+
+    @property
+    def morning_mastery_text(self) -> str:
+        """Texto personalizado de Morning Mastery"""
+        return self.settings.get('morning_mastery_text', '') or ''
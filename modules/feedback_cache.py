@@ -0,0 +1,88 @@
+"""
+Cache direccionado por contenido para el feedback de tareas (LRU en memoria + tabla persistente)
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+
+def normalize_task_text(text: str) -> str:
+    """Normalizar texto de tarea: minúsculas y espacios colapsados"""
+    return ' '.join((text or '').lower().split())
+
+
+def feedback_cache_key(task_text: str, period: str, prompt_version: str) -> str:
+    """Clave del cache: hash del texto normalizado, el periodo y la versión del prompt"""
+    raw = f"{prompt_version}|{period}|{normalize_task_text(task_text)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class FeedbackCache:
+    """
+    Cache de feedback compartido por el proceso.
+    Primero busca en un LRU en memoria y luego en la tabla persistente
+    (vía db.get_cached_feedback / db.save_cached_feedback).
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Contadores expuestos en stats()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, feedback: str):
+        """Guardar en el LRU (llamar con el lock tomado)"""
+        self._entries[key] = feedback
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys: List[str], db) -> Dict[str, str]:
+        """Obtener el feedback cacheado de las claves dadas (solo devuelve los hits)"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+            self.memory_hits += len(found)
+
+        missing = [k for k in keys if k not in found]
+        if not missing:
+            return found
+
+        stored = db.get_cached_feedback(missing)
+        with self._lock:
+            for key, feedback in stored.items():
+                self._remember(key, feedback)
+            self.persistent_hits += len(stored)
+            self.misses += len(missing) - len(stored)
+
+        found.update(stored)
+        return found
+
+    def put_many(self, entries: Dict[str, str], db):
+        """Guardar feedback nuevo en memoria y en la tabla persistente"""
+        if not entries:
+            return
+        with self._lock:
+            for key, feedback in entries.items():
+                self._remember(key, feedback)
+        db.save_cached_feedback(entries)
+
+    def stats(self) -> Dict:
+        """Contadores de hits/misses y tamaño actual del LRU"""
+        with self._lock:
+            lookups = self.memory_hits + self.persistent_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'persistent_hits': self.persistent_hits,
+                'misses': self.misses,
+                'hit_rate': round((lookups - self.misses) / lookups * 100, 2) if lookups else 0.0,
+                'entries': len(self._entries)
+            }
@@ -0,0 +1,151 @@
+"""
+Bitsets de completitud de hábitos (un uint32 por hábito y mes, bit d-1 = día d)
+
+Un año de un hábito ocupa 12 * 4 = 48 bytes. Todas las métricas se calculan para
+todos los hábitos del usuario a la vez sobre la matriz (hábitos x días):
+racha actual, racha más larga, consistencia en cualquier ventana y "never miss twice".
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+
+def _month_index(day: date) -> int:
+    """Meses absolutos (año * 12 + mes - 1)"""
+    return day.year * 12 + day.month - 1
+
+
+def _month_start(index: int) -> date:
+    """Primer día del mes absoluto"""
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class HabitBitmaps:
+    """
+    Completitudes de varios hábitos entre first_month y last_month (inclusive).
+    `bits`: matriz uint32 (hábitos x meses); el bit d-1 del mes indica el día d hecho.
+    """
+
+    def __init__(self, habit_ids: List[str], first_day: date, last_day: date):
+        self.habit_ids = list(habit_ids)
+        self._rows = {habit_id: i for i, habit_id in enumerate(self.habit_ids)}
+        self.first_month = _month_index(first_day)
+        self.last_month = _month_index(last_day)
+        self.bits = np.zeros((len(self.habit_ids), self.last_month - self.first_month + 1), dtype=np.uint32)
+
+    @classmethod
+    def from_logs(cls, logs: Iterable[Dict], first_day: date, last_day: date,
+                  habit_ids: Optional[List[str]] = None) -> 'HabitBitmaps':
+        """
+        Construir desde filas de 01_productivity_habit_logs (habit_id, date_logged).
+        Con habit_ids se fija el orden de las filas y se ignoran logs de otros hábitos.
+        """
+        logs = list(logs)
+        if habit_ids is None:
+            habit_ids = list(dict.fromkeys(log['habit_id'] for log in logs))
+        bitmaps = cls(habit_ids, first_day, last_day)
+        for log in logs:
+            logged = log.get('date_logged')
+            if log.get('habit_id') in bitmaps._rows and logged:
+                bitmaps.set(log['habit_id'], date.fromisoformat(str(logged)[:10]))
+        return bitmaps
+
+    def set(self, habit_id: str, day: date):
+        """Marcar el día como hecho (fuera del rango cubierto se ignora)"""
+        month = _month_index(day) - self.first_month
+        if 0 <= month < self.bits.shape[1]:
+            self.bits[self._rows[habit_id], month] |= np.uint32(1 << (day.day - 1))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes de los bitsets (sin el índice de hábitos)"""
+        return self.bits.nbytes
+
+    def days_matrix(self, start: date, end: date) -> np.ndarray:
+        """Matriz booleana (hábitos x días) de [start, end] recortada al rango cubierto"""
+        first = max(start, _month_start(self.first_month))
+        if end < first:
+            return np.zeros((len(self.habit_ids), 0), dtype=bool)
+
+        # Desempaquetar los 32 bits de cada mes: (hábitos, meses, 32)
+        unpacked = np.unpackbits(
+            self.bits.astype('<u4').view(np.uint8).reshape(len(self.habit_ids), -1, 4),
+            axis=2, bitorder='little'
+        ).astype(bool)
+
+        # Índices (mes, día-1) de cada fecha del rango: salta los días 29-31 inexistentes
+        days = np.arange(np.datetime64(first), np.datetime64(end) + 1, dtype='datetime64[D]')
+        months = days.astype('datetime64[M]')
+        month_pos = months.astype(np.int64) + 1970 * 12 - self.first_month
+        day_pos = (days - months).astype(np.int64)
+
+        inside = month_pos < self.bits.shape[1]
+        matrix = np.zeros((len(self.habit_ids), len(days)), dtype=bool)
+        matrix[:, inside] = unpacked[:, month_pos[inside], day_pos[inside]]
+        return matrix
+
+    def current_streaks(self, today: date) -> np.ndarray:
+        """
+        Racha actual por hábito: días seguidos hechos hasta hoy.
+        Si hoy aún no está hecho, la racha que termina ayer sigue viva.
+        """
+        matrix = self.days_matrix(_month_start(self.first_month), today)
+        if matrix.shape[1] == 0:
+            return np.zeros(len(self.habit_ids), dtype=np.int64)
+        pending_today = ~matrix[:, -1]
+        matrix[pending_today, -1] = True  # Hoy pendiente no rompe la racha
+        streaks = _trailing_ones(matrix)
+        return streaks - pending_today
+
+    def longest_streaks(self, start: date, end: date) -> np.ndarray:
+        """Racha más larga de cada hábito dentro de [start, end]"""
+        matrix = self.days_matrix(start, end)
+        if matrix.shape[1] == 0:
+            return np.zeros(len(self.habit_ids), dtype=np.int64)
+        return _run_lengths(matrix).max(axis=1)
+
+    def consistency(self, start: date, end: date) -> np.ndarray:
+        """Porcentaje de días hechos en [start, end] (mismo criterio que metrics.habit_consistency)"""
+        days = (end - start).days + 1
+        if days <= 0:
+            return np.zeros(len(self.habit_ids))
+        return np.round(self.days_matrix(start, end).sum(axis=1) / days * 100, 2)
+
+    def missed_twice(self, today: date) -> np.ndarray:
+        """'Never miss twice' en riesgo: ayer y anteayer sin hacer, y hoy todavía pendiente"""
+        recent = self.days_matrix(today - timedelta(days=2), today)
+        if recent.shape[1] < 3:
+            return np.zeros(len(self.habit_ids), dtype=bool)
+        return ~recent.any(axis=1)
+
+    def summary(self, today: date, window_days: int = 30) -> Dict[str, Dict]:
+        """Métricas por hábito en una pasada: {habit_id: {current_streak, longest_streak, consistency, missed_twice}}"""
+        start = today - timedelta(days=window_days - 1)
+        current = self.current_streaks(today)
+        longest = self.longest_streaks(_month_start(self.first_month), today)
+        consistency = self.consistency(start, today)
+        missed = self.missed_twice(today)
+        return {
+            habit_id: {
+                'current_streak': int(current[i]),
+                'longest_streak': int(longest[i]),
+                'consistency': float(consistency[i]),
+                'missed_twice': bool(missed[i])
+            }
+            for i, habit_id in enumerate(self.habit_ids)
+        }
+
+
+def _run_lengths(matrix: np.ndarray) -> np.ndarray:
+    """Largo de la racha de unos que termina en cada día (por fila)"""
+    counts = np.cumsum(matrix, axis=1)
+    # En cada cero se congela el acumulado; la racha es lo sumado desde el último cero
+    resets = np.maximum.accumulate(np.where(matrix, 0, counts), axis=1)
+    return counts - resets
+
+
+def _trailing_ones(matrix: np.ndarray) -> np.ndarray:
+    """Unos seguidos al final de cada fila"""
+    reversed_zeros = ~matrix[:, ::-1]
+    first_zero = reversed_zeros.argmax(axis=1)
+    return np.where(reversed_zeros.any(axis=1), first_zero, matrix.shape[1])
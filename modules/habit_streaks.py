@@ -0,0 +1,45 @@
+"""
+Transición de rachas de hábitos (versión Python de productivity_complete_habit)
+"""
+from datetime import date, datetime
+from typing import Optional, Union
+
+
+def to_local_date(value: Union[str, datetime, None], timezone) -> Optional[date]:
+    """
+    Fecha local (timezone pytz del usuario) de un timestamp de la base.
+    Acepta ISO con 'Z', con offset o sin zona (se asume la zona del usuario).
+    None si el valor no es una fecha reconocible.
+    """
+    if not value:
+        return None
+    try:
+        if isinstance(value, datetime):
+            parsed = value
+        else:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = timezone.localize(parsed)
+        return parsed.astimezone(timezone).date()
+    except (ValueError, TypeError):
+        pass
+    # Último recurso: la parte de fecha del string
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def next_streak(streak_count: int, last_completed_date: Optional[date], today: date) -> Optional[int]:
+    """
+    Nueva racha al completar el hábito hoy.
+    None si ya se completó hoy; +1 si fue ayer; 1 si es el primer día o se rompió la cadena.
+    """
+    if last_completed_date is None:
+        return 1
+    delta_days = (today - last_completed_date).days
+    if delta_days <= 0:
+        return None
+    if delta_days == 1:
+        return (streak_count or 0) + 1
+    return 1
@@ -0,0 +1,132 @@
+"""
+Cache local del historial diario con sincronización incremental (SQLite en disco)
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+
+# Margen al pedir cambios desde el watermark: cubre transacciones que
+# confirmaron con un updated_at algo anterior al último visto
+WATERMARK_OVERLAP_SECONDS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracking_history (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    updated_at TEXT,
+    PRIMARY KEY (user_id, date)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    user_id TEXT PRIMARY KEY,
+    covered_from TEXT NOT NULL,
+    watermark TEXT
+);
+"""
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    """Timestamp ISO de PostgREST -> datetime aware"""
+    if not value:
+        return None
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+
+
+class HistoryCache:
+    """
+    Historial de daily_tracking por usuario guardado en un archivo SQLite local.
+    Los días pasados casi no cambian, así que cada sync solo pide al backend:
+    - el rango anterior a lo ya cubierto (cuando se amplía la ventana), y
+    - las filas con updated_at posterior al último visto (días nuevos y ediciones).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Una sola conexión compartida y protegida por el lock (accesos cortos)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+        # Contadores expuestos en stats()
+        self.syncs = 0
+        self.rows_fetched = 0
+
+    def sync(self, user_id: str, start_date: date,
+             fetch_rows: Callable[..., List[Dict]], fetch_changes: bool = True) -> int:
+        """
+        Traer al cache lo que falte para cubrir desde `start_date`.
+        fetch_rows(start_date=None, end_date=None, updated_since=None) -> filas con 'date' y 'updated_at'.
+        Devuelve cuántas filas se trajeron del backend.
+        """
+        start_iso = start_date.isoformat()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT covered_from, watermark FROM sync_state WHERE user_id = ?', (user_id,)
+            ).fetchone()
+        covered_from, watermark = row if row else (None, None)
+
+        fetched: List[Dict] = []
+        if covered_from is None:
+            # Primera vez: la ventana completa
+            fetched += fetch_rows(start_date=start_iso)
+            covered_from = start_iso
+        else:
+            if start_iso < covered_from:
+                # Ventana más amplia que lo cubierto: solo el tramo anterior
+                end_iso = (date.fromisoformat(covered_from) - timedelta(days=1)).isoformat()
+                fetched += fetch_rows(start_date=start_iso, end_date=end_iso)
+                covered_from = start_iso
+            if fetch_changes:
+                since = _parse_ts(watermark)
+                since_iso = (since - timedelta(seconds=WATERMARK_OVERLAP_SECONDS)).isoformat() if since else None
+                fetched += fetch_rows(start_date=covered_from, updated_since=since_iso)
+
+        new_watermark = _parse_ts(watermark)
+        for record in fetched:
+            updated = _parse_ts(record.get('updated_at'))
+            if updated and (new_watermark is None or updated > new_watermark):
+                new_watermark = updated
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO tracking_history (user_id, date, payload, updated_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (user_id, date) DO UPDATE SET payload = excluded.payload, updated_at = excluded.updated_at',
+                [(user_id, r['date'], json.dumps(r, default=str), r.get('updated_at')) for r in fetched]
+            )
+            self._conn.execute(
+                'INSERT INTO sync_state (user_id, covered_from, watermark) VALUES (?, ?, ?) '
+                'ON CONFLICT (user_id) DO UPDATE SET covered_from = excluded.covered_from, watermark = excluded.watermark',
+                (user_id, covered_from, new_watermark.isoformat() if new_watermark else None)
+            )
+            self.syncs += 1
+            self.rows_fetched += len(fetched)
+        return len(fetched)
+
+    def get_rows(self, user_id: str, start_date: date, end_date: date) -> List[Dict]:
+        """Filas cacheadas del rango [start_date, end_date] en orden de fecha"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT payload FROM tracking_history WHERE user_id = ? AND date BETWEEN ? AND ? ORDER BY date',
+                (user_id, start_date.isoformat(), end_date.isoformat())
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def invalidate(self, user_id: str):
+        """Borrar el historial cacheado de un usuario (la próxima lectura lo trae completo)"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM tracking_history WHERE user_id = ?', (user_id,))
+            self._conn.execute('DELETE FROM sync_state WHERE user_id = ?', (user_id,))
+
+    def stats(self) -> Dict:
+        """Syncs realizados, filas traídas del backend y filas en disco"""
+        with self._lock:
+            cached = self._conn.execute('SELECT COUNT(*) FROM tracking_history').fetchone()[0]
+        return {'syncs': self.syncs, 'rows_fetched': self.rows_fetched, 'rows_cached': cached}
@@ -0,0 +1,138 @@
+"""
+Métricas de completitud (definiciones únicas para cliente, dashboard e insights)
+
+Definiciones:
+- Días hábiles: lunes a viernes. El fin de semana es descanso, así que las metas
+  solo cuentan días hábiles; lo hecho en fin de semana suma igual (puede pasar de 100%).
+- Meta Daily 3 / Prioridades: 3 por día hábil. Meta Morning Mastery: 1 por día hábil.
+- avg_completion_rate: (Daily 3 + Prioridades) / (días hábiles * 6) * 100.
+- identity_balance: Daily 3 / Prioridades (1.0 = equilibrio; sin prioridades se divide por 1).
+- Consistencia de hábito: días hechos / días de la ventana * 100.
+"""
+from datetime import date
+from typing import Dict, Iterable, List
+import numpy as np
+import pandas as pd
+
+
+TASKS_PER_DAY = 3           # Daily 3 y Prioridades: 3 tareas por identidad
+METRIC_COLUMNS = ['daily_3', 'priorities', 'code_done', 'morning_mastery']
+
+
+def day_frame(records: List[Dict], start_date: date, end_date: date) -> pd.DataFrame:
+    """
+    Frame columnar de un usuario: una fila por día de [start_date, end_date],
+    con ceros en los días sin registro. Columnas: date (ISO), day, weekday y METRIC_COLUMNS.
+    """
+    dates = pd.date_range(start=start_date, end=end_date, freq='D')
+    frame = pd.DataFrame({'date': dates.strftime('%Y-%m-%d')})
+
+    if records:
+        raw = pd.DataFrame.from_records(records)
+        raw = pd.DataFrame({
+            'date': raw['date'],
+            'daily_3': _column(raw, 'identity_1_daily_3_completed'),
+            'priorities': _column(raw, 'identity_2_priorities_completed'),
+            'code_done': _column(raw, 'code_commit_done'),
+            'morning_mastery': _column(raw, 'morning_mastery_done')
+        }).drop_duplicates('date', keep='last')
+        frame = frame.merge(raw, on='date', how='left')
+    else:
+        for col in METRIC_COLUMNS:
+            frame[col] = 0
+
+    frame[METRIC_COLUMNS] = frame[METRIC_COLUMNS].fillna(0).astype(np.int16)
+    frame['day'] = dates.day_name()
+    frame['weekday'] = dates.dayofweek < 5
+    return frame[['date', 'day', 'weekday'] + METRIC_COLUMNS]
+
+
+def _column(raw: pd.DataFrame, name: str) -> pd.Series:
+    """Columna numérica de los registros (0 si falta); booleanos como 0/1"""
+    if name not in raw.columns:
+        return pd.Series(0, index=raw.index)
+    return raw[name].fillna(0).astype('float64')
+
+
+def summary(frame: pd.DataFrame) -> Dict:
+    """Totales, metas y tasas de una ventana (frame de day_frame)"""
+    totals = frame[METRIC_COLUMNS].to_numpy(dtype=np.int64).sum(axis=0) if len(frame) else np.zeros(4, np.int64)
+    total_daily_3, total_priorities, code_days, morning_days = (int(v) for v in totals)
+    weekdays = int(frame['weekday'].sum()) if len(frame) else 0
+
+    tasks_target = weekdays * TASKS_PER_DAY
+    return {
+        'days': len(frame),
+        'weekdays': weekdays,
+        'total_daily_3': total_daily_3,
+        'total_priorities': total_priorities,
+        'code_days': code_days,
+        'morning_mastery_days': morning_days,
+        'daily_3_target': tasks_target,
+        'priorities_target': tasks_target,
+        'morning_mastery_target': weekdays,
+        'daily_3_rate': _rate(total_daily_3, tasks_target),
+        'priorities_rate': _rate(total_priorities, tasks_target),
+        'morning_mastery_rate': _rate(morning_days, weekdays),
+        'avg_completion_rate': _rate(total_daily_3 + total_priorities, tasks_target * 2),
+        'identity_balance': round(total_daily_3 / max(total_priorities, 1), 2)
+    }
+
+
+def _rate(done: int, target: int) -> float:
+    """Porcentaje redondeado a 2 decimales (0 si no hay meta)"""
+    return round(done / target * 100, 2) if target else 0.0
+
+
+def completion_rate(frame: pd.DataFrame) -> pd.Series:
+    """Completitud diaria de Daily 3 + Prioridades (%), índice alineado con el frame"""
+    return (frame['daily_3'] + frame['priorities']) / (TASKS_PER_DAY * 2) * 100
+
+
+def rolling_completion(frame: pd.DataFrame, window: int = 7) -> pd.Series:
+    """Media móvil de la completitud diaria (ventana en días; parcial al inicio)"""
+    return completion_rate(frame).rolling(window, min_periods=1).mean()
+
+
+def habit_consistency(done_dates: Iterable[str], start_date: date, end_date: date) -> float:
+    """Porcentaje de días de la ventana con el hábito hecho"""
+    days = (end_date - start_date).days + 1
+    if days <= 0:
+        return 0.0
+    done = pd.to_datetime(pd.Series(list(done_dates), dtype='object')).dt.date
+    in_window = done[(done >= start_date) & (done <= end_date)].nunique()
+    return _rate(int(in_window), days)
+
+
+def summary_by_user(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    summary() vectorizado para muchos usuarios a la vez.
+    `frame`: columnas user_id, weekday y METRIC_COLUMNS (una fila por usuario y día).
+    """
+    grouped = frame.groupby('user_id', sort=False)
+    totals = grouped[METRIC_COLUMNS].sum()
+    weekdays = grouped['weekday'].sum()
+    tasks_target = (weekdays * TASKS_PER_DAY).replace(0, np.nan)
+
+    result = pd.DataFrame({
+        'days': grouped.size(),
+        'weekdays': weekdays,
+        'total_daily_3': totals['daily_3'],
+        'total_priorities': totals['priorities'],
+        'code_days': totals['code_done'],
+        'morning_mastery_days': totals['morning_mastery'],
+        'daily_3_target': weekdays * TASKS_PER_DAY,
+        'priorities_target': weekdays * TASKS_PER_DAY,
+        'morning_mastery_target': weekdays,
+        'daily_3_rate': totals['daily_3'] / tasks_target * 100,
+        'priorities_rate': totals['priorities'] / tasks_target * 100,
+        'morning_mastery_rate': totals['morning_mastery'] / weekdays.replace(0, np.nan) * 100,
+        'avg_completion_rate': (totals['daily_3'] + totals['priorities']) / (tasks_target * 2) * 100,
+        'identity_balance': totals['daily_3'] / totals['priorities'].clip(lower=1)
+    })
+    return result.fillna(0.0).round(2)
+
+
+def summarize_records(records: List[Dict], start_date: date, end_date: date) -> Dict:
+    """Atajo: registros de daily_tracking -> summary() de la ventana"""
+    return summary(day_frame(records, start_date, end_date))
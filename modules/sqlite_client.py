@@ -0,0 +1,748 @@
+"""
+Cliente SQLite local (mismo contrato que SupabaseClient, ver modules/storage_backend.py)
+Para desarrollo, pruebas de carga y despliegues de un solo nodo sin base hosted.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import pytz
+from modules.clients import LOCAL_CACHE_DIR
+from modules.day_snapshot import DaySnapshot, DEFAULT_TRACKING, DEFAULT_SETTINGS
+from modules.habit_streaks import next_streak, to_local_date
+from modules import metrics
+
+
+DEFAULT_SQLITE_PATH = os.path.join(LOCAL_CACHE_DIR, 'productivity.db')
+
+# Columnas guardadas como JSON (TEXT) y como booleanos (INTEGER 0/1)
+JSON_COLUMNS = {
+    'identity_1_daily_3_list', 'identity_1_daily_3_details', 'identity_1_feedback',
+    'identity_2_priorities_list', 'identity_2_priorities_details', 'identity_2_feedback',
+    'conversation_log'
+}
+BOOL_COLUMNS = {'code_commit_done', 'morning_mastery_done', 'active'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS "01_productivity_daily_tracking" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    day_of_week TEXT,
+    identity_1_daily_3_completed INTEGER NOT NULL DEFAULT 0,
+    identity_1_daily_3_list TEXT,
+    identity_1_daily_3_details TEXT,
+    identity_1_feedback TEXT,
+    identity_2_priorities_completed INTEGER NOT NULL DEFAULT 0,
+    identity_2_priorities_list TEXT,
+    identity_2_priorities_details TEXT,
+    identity_2_feedback TEXT,
+    code_commit_done INTEGER NOT NULL DEFAULT 0,
+    code_commit_time TEXT,
+    morning_mastery_done INTEGER NOT NULL DEFAULT 0,
+    breadcrumbs_tomorrow TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    UNIQUE (user_id, date)
+);
+
+CREATE TABLE IF NOT EXISTS "01_productivity_habit_streaks" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    habit_name TEXT NOT NULL,
+    current_streak INTEGER NOT NULL DEFAULT 0,
+    longest_streak INTEGER NOT NULL DEFAULT 0,
+    total_completions INTEGER NOT NULL DEFAULT 0,
+    consistency_rate REAL NOT NULL DEFAULT 0,
+    last_activity_date TEXT,
+    UNIQUE (user_id, habit_name)
+);
+
+CREATE TABLE IF NOT EXISTS "01_productivity_habits" (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    streak_count INTEGER NOT NULL DEFAULT 0,
+    last_completed_at TEXT,
+    active INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_habits_user_active
+    ON "01_productivity_habits" (user_id, active, created_at);
+
+CREATE TABLE IF NOT EXISTS "01_productivity_habit_logs" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    habit_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    completed_at TEXT NOT NULL,
+    date_logged TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_habit_logs_user_date
+    ON "01_productivity_habit_logs" (user_id, date_logged);
+CREATE INDEX IF NOT EXISTS idx_habit_logs_habit
+    ON "01_productivity_habit_logs" (habit_id);
+
+CREATE TABLE IF NOT EXISTS "01_productivity_focus_sessions" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    task_name TEXT,
+    timer_type TEXT,
+    duration_minutes INTEGER NOT NULL,
+    completed_at TEXT NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_focus_sessions_user_date
+    ON "01_productivity_focus_sessions" (user_id, date, completed_at);
+
+CREATE TABLE IF NOT EXISTS "01_productivity_active_timers" (
+    user_id TEXT PRIMARY KEY,
+    task_name TEXT NOT NULL DEFAULT '',
+    timer_type TEXT NOT NULL DEFAULT 'pomodoro',
+    duration_minutes INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    paused_at TEXT,
+    paused_seconds INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS "01_productivity_identity_sessions" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    identity_active TEXT,
+    conversation_log TEXT,
+    start_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_identity_sessions_user_start
+    ON "01_productivity_identity_sessions" (user_id, start_time);
+
+CREATE TABLE IF NOT EXISTS "01_productivity_user_settings" (
+    user_id TEXT PRIMARY KEY,
+    identity_1_name TEXT,
+    identity_2_name TEXT,
+    timezone TEXT,
+    morning_mastery_text TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS "01_productivity_feedback_cache" (
+    cache_key TEXT PRIMARY KEY,
+    feedback TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+"""
+
+# Una conexión por hilo y archivo (sqlite3 no comparte conexiones entre hilos)
+_local = threading.local()
+_schema_lock = threading.Lock()
+_initialized_paths = set()
+
+
+def _get_connection(path: str) -> sqlite3.Connection:
+    """Conexión del hilo actual para `path` (crea el esquema la primera vez)"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(path)
+    if conn is None:
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        # WAL: lectores concurrentes mientras se escribe; NORMAL es seguro con WAL
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        connections[path] = conn
+
+        with _schema_lock:
+            if path not in _initialized_paths or path == ':memory:':
+                conn.executescript(SCHEMA)
+                _initialized_paths.add(path)
+    return conn
+
+
+def _decode_row(row: sqlite3.Row) -> Dict:
+    """Fila SQLite -> dict con JSON y booleanos decodificados (mismo formato que PostgREST)"""
+    data = dict(row)
+    for key, value in data.items():
+        if key in JSON_COLUMNS and isinstance(value, str):
+            try:
+                data[key] = json.loads(value)
+            except ValueError:
+                pass
+        elif key in BOOL_COLUMNS and value is not None:
+            data[key] = bool(value)
+    return data
+
+
+def _encode_value(key: str, value):
+    """Valor Python -> valor de columna SQLite"""
+    if key in JSON_COLUMNS and value is not None:
+        return json.dumps(value, ensure_ascii=False)
+    if key in BOOL_COLUMNS and value is not None:
+        return int(bool(value))
+    return value
+
+
+class SQLiteClient:
+    """Cliente para un archivo SQLite local (un solo nodo, sin latencia de red)"""
+
+    def __init__(self, path: str, user_id: str, timezone: str = 'America/Caracas'):
+        self.path = path
+        self.user_id = user_id
+        try:
+            self.timezone = pytz.timezone(timezone)
+        except:
+            self.timezone = pytz.timezone('America/Caracas')
+
+        # Mismo esquema de snapshot que SupabaseClient
+        self._snapshot: Optional[DaySnapshot] = None
+        self._data_version = 0
+
+    # --- Utilidades internas ---
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return _get_connection(self.path)
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Dict]:
+        return [_decode_row(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def _execute(self, sql: str, params: Tuple = ()):
+        with self.conn:
+            return self.conn.execute(sql, params)
+
+    def _upsert(self, table: str, record: Dict, conflict: str, ignore_duplicates: bool = False):
+        """
+        INSERT ... ON CONFLICT DO UPDATE solo con las columnas recibidas.
+        ignore_duplicates=True (como en postgrest-py): DO NOTHING si la fila ya existe.
+        """
+        columns = list(record)
+        update_columns = [] if ignore_duplicates else [c for c in columns if c not in conflict.split(',')]
+        sql = (
+            f'INSERT INTO "{table}" ({", ".join(columns)}) '
+            f'VALUES ({", ".join("?" for _ in columns)}) '
+            f'ON CONFLICT ({conflict}) '
+        )
+        sql += (f'DO UPDATE SET {", ".join(f"{c}=excluded.{c}" for c in update_columns)}'
+                if update_columns else 'DO NOTHING')
+        self._execute(sql, tuple(_encode_value(c, record[c]) for c in columns))
+
+    def set_timezone(self, timezone: str):
+        """Actualizar timezone del cliente"""
+        try:
+            self.timezone = pytz.timezone(timezone)
+            self._invalidate_snapshot()
+        except:
+            pass # Mantener anterior si falla
+
+    @property
+    def data_version(self) -> int:
+        """Contador de escrituras locales (clave de caches derivados: snapshot, frames del dashboard)"""
+        return self._data_version
+
+    def _invalidate_snapshot(self):
+        """Descartar el snapshot del día y subir la versión de datos (llamar en cada escritura)"""
+        self._snapshot = None
+        self._data_version += 1
+
+    def _get_today_iso(self) -> str:
+        """Obtener fecha actual en formato ISO respetando timezone"""
+        return datetime.now(self.timezone).date().isoformat()
+
+    def _upsert_today(self, fields: Dict):
+        """
+        Escribir columnas del registro de hoy (crea la fila si no existe).
+        Igual que SupabaseClient: el snapshot del día se actualiza en memoria con lo escrito.
+        """
+        snapshot = self._snapshot
+        self._invalidate_snapshot()
+        today = self._get_today_iso()
+        self._upsert('01_productivity_daily_tracking', {
+            'user_id': self.user_id,
+            'date': today,
+            'day_of_week': datetime.now(self.timezone).strftime('%A'),
+            **fields,
+            'updated_at': datetime.now(pytz.utc).isoformat()
+        }, 'user_id,date')
+        if snapshot is not None and snapshot.date == today:
+            self._snapshot = snapshot.with_today(fields, self._data_version)
+
+    # --- Tracking diario ---
+
+    def get_day_snapshot(self, refresh: bool = False) -> DaySnapshot:
+        """Obtener snapshot inmutable del día (ver SupabaseClient.get_day_snapshot)"""
+        today_date = datetime.now(self.timezone).date()
+        today = today_date.isoformat()
+
+        snapshot = self._snapshot
+        if not refresh and snapshot is not None and snapshot.is_fresh(today, self._data_version):
+            return snapshot
+
+        yesterday = (today_date - timedelta(days=1)).isoformat()
+
+        try:
+            rows = {row['date']: row for row in self._query(
+                'SELECT * FROM "01_productivity_daily_tracking" WHERE user_id = ? AND date IN (?, ?)',
+                (self.user_id, today, yesterday)
+            )}
+
+            self._snapshot = DaySnapshot.build(
+                date=today,
+                yesterday_date=yesterday,
+                today=rows.get(today) or self.get_today_tracking(),
+                yesterday=rows.get(yesterday, {}),
+                settings=self.get_user_settings(),
+                habits=self.get_habits(),
+                code_streak=self.get_code_streak(),
+                version=self._data_version,
+                fetched_at=time.monotonic()
+            )
+            return self._snapshot
+
+        except Exception as e:
+            print(f"Error al obtener snapshot del día: {e}")
+            return DaySnapshot.build(
+                date=today,
+                yesterday_date=yesterday,
+                today=DEFAULT_TRACKING,
+                yesterday={},
+                settings=DEFAULT_SETTINGS,
+                habits=[],
+                code_streak=0
+            )
+
+    def get_today_tracking(self) -> Dict:
+        """
+        Obtener tracking del día actual (crea el registro si no existe).
+        Solo escribe si la fila falta, y con DO NOTHING: un render no toma el lock de
+        escritura del WAL que necesitan mark_habit_done y las demás escrituras.
+        """
+        today = self._get_today_iso()
+        select_today = ('SELECT * FROM "01_productivity_daily_tracking" WHERE user_id = ? AND date = ?',
+                        (self.user_id, today))
+        try:
+            rows = self._query(*select_today)
+            if rows:
+                return rows[0]
+
+            self._upsert('01_productivity_daily_tracking', {
+                'user_id': self.user_id,
+                'date': today,
+                'day_of_week': datetime.now(self.timezone).strftime('%A')
+            }, 'user_id,date', ignore_duplicates=True)
+            rows = self._query(*select_today)
+            return rows[0] if rows else dict(DEFAULT_TRACKING)
+
+        except Exception as e:
+            print(f"Error al obtener tracking del día: {e}")
+            return dict(DEFAULT_TRACKING)
+
+    def update_daily_3(self, tasks_data: List[Dict]):
+        """Actualizar Daily 3 (Texto + Estado)"""
+        try:
+            self._upsert_today({
+                'identity_1_daily_3_details': tasks_data,
+                'identity_1_daily_3_completed': sum(1 for t in tasks_data if t.get('done', False)),
+                'identity_1_daily_3_list': [t.get('text', '') for t in tasks_data]
+            })
+        except Exception as e:
+            print(f"Error al actualizar Daily 3: {e}")
+
+    def update_priorities(self, priorities_data: List[Dict]):
+        """Actualizar Prioridades (Texto + Estado)"""
+        try:
+            self._upsert_today({
+                'identity_2_priorities_details': priorities_data,
+                'identity_2_priorities_completed': sum(1 for p in priorities_data if p.get('done', False)),
+                'identity_2_priorities_list': [p.get('text', '') for p in priorities_data]
+            })
+        except Exception as e:
+            print(f"Error al actualizar prioridades: {e}")
+
+    def mark_code_done(self, commit_time: Optional[str] = None):
+        """Marcar código como completado"""
+        if commit_time is None:
+            commit_time = datetime.now(self.timezone).strftime('%H:%M')
+
+        try:
+            self._invalidate_snapshot()
+            self._upsert_today({'code_commit_done': True, 'code_commit_time': commit_time})
+            self._update_code_streak()
+        except Exception as e:
+            print(f"Error al marcar código: {e}")
+
+    def mark_morning_mastery_done(self):
+        """Marcar Morning Mastery como completado"""
+        try:
+            self._upsert_today({'morning_mastery_done': True})
+        except Exception as e:
+            print(f"Error al marcar Morning Mastery: {e}")
+
+    def get_weekly_stats(self) -> Dict:
+        """Obtener estadísticas de los últimos 7 días"""
+        today = datetime.now(self.timezone).date()
+        return metrics.summarize_records(self.get_last_n_days_tracking(7), today - timedelta(days=6), today)
+
+    def get_last_n_days_tracking(self, days: int = 7) -> List[Dict]:
+        """Obtener tracking de los últimos N días"""
+        try:
+            start_date = (datetime.now(self.timezone).date() - timedelta(days=days-1)).isoformat()
+            return self._query(
+                'SELECT * FROM "01_productivity_daily_tracking" WHERE user_id = ? AND date >= ? ORDER BY date',
+                (self.user_id, start_date)
+            )
+        except Exception as e:
+            print(f"Error al obtener tracking histórico: {e}")
+            return []
+
+    def save_task_feedback(self, feedbacks: List[str], period: str = "morning") -> bool:
+        """Guardar feedback de tareas en daily_tracking"""
+        column_name = 'identity_1_feedback' if period == 'morning' else 'identity_2_feedback'
+        try:
+            self._upsert_today({column_name: feedbacks})
+            return True
+        except Exception as e:
+            print(f"Error guardando feedback: {e}")
+            return False
+
+    def get_task_feedback(self, period: str = "morning") -> List[str]:
+        """Obtener feedback guardado de tareas"""
+        return self.get_day_snapshot().get_task_feedback(period)
+
+    def save_breadcrumbs(self, breadcrumbs_text: str) -> bool:
+        """Guardar breadcrumbs para mañana en el registro de hoy"""
+        try:
+            self._upsert_today({'breadcrumbs_tomorrow': breadcrumbs_text})
+            return True
+        except Exception as e:
+            print(f"Error guardando breadcrumbs: {e}")
+            return False
+
+    def get_breadcrumbs_today(self) -> str:
+        """Obtener breadcrumbs de hoy (lo que escribí hoy para mañana)"""
+        return self.get_day_snapshot().breadcrumbs_today
+
+    def get_breadcrumbs_from_yesterday(self) -> str:
+        """Obtener breadcrumbs que escribí ayer"""
+        return self.get_day_snapshot().breadcrumbs_yesterday
+
+    # --- Rachas ---
+
+    def get_code_streak(self) -> int:
+        """Obtener racha actual de código"""
+        try:
+            rows = self._query(
+                'SELECT current_streak FROM "01_productivity_habit_streaks" WHERE user_id = ? AND habit_name = ?',
+                (self.user_id, 'Código')
+            )
+            return rows[0]['current_streak'] if rows else 0
+        except Exception as e:
+            print(f"Error al obtener racha de código: {e}")
+            return 0
+
+    def _update_code_streak(self):
+        """Actualizar racha de código (interno)"""
+        try:
+            self._execute(
+                'INSERT INTO "01_productivity_habit_streaks" '
+                '(user_id, habit_name, current_streak, longest_streak, total_completions, consistency_rate, last_activity_date) '
+                'VALUES (?, ?, 1, 1, 1, 100.0, ?) '
+                'ON CONFLICT (user_id, habit_name) DO UPDATE SET '
+                'current_streak = current_streak + 1, '
+                'longest_streak = MAX(longest_streak, current_streak + 1), '
+                'total_completions = total_completions + 1, '
+                'last_activity_date = excluded.last_activity_date',
+                (self.user_id, 'Código', self._get_today_iso())
+            )
+        except Exception as e:
+            print(f"Error al actualizar racha: {e}")
+
+    # --- Hábitos ---
+
+    def create_habit(self, name: str) -> Tuple[bool, str]:
+        """Crear un nuevo hábito (máximo 3 activos)"""
+        try:
+            self._invalidate_snapshot()
+            if len(self.get_habits()) >= 3:
+                return False, "Límite de 3 hábitos alcanzado"
+
+            self._execute(
+                'INSERT INTO "01_productivity_habits" (id, user_id, name, streak_count, active) VALUES (?, ?, ?, 0, 1)',
+                (str(uuid.uuid4()), self.user_id, name)
+            )
+            return True, "Hábito creado"
+        except Exception as e:
+            print(f"Error creando hábito: {e}")
+            return False, str(e)
+
+    def get_habits(self) -> List[Dict]:
+        """Obtener todos los hábitos activos del usuario"""
+        try:
+            return self._query(
+                'SELECT * FROM "01_productivity_habits" WHERE user_id = ? AND active = 1 ORDER BY created_at',
+                (self.user_id,)
+            )
+        except Exception as e:
+            print(f"Error obteniendo hábitos: {e}")
+            return []
+
+    def update_habit(self, habit_id: str, name: str) -> bool:
+        """Actualizar nombre de hábito (reinicia la racha)"""
+        try:
+            self._invalidate_snapshot()
+            self._execute(
+                'UPDATE "01_productivity_habits" SET name = ?, streak_count = 0, last_completed_at = NULL '
+                'WHERE id = ? AND user_id = ?',
+                (name, habit_id, self.user_id)
+            )
+            return True
+        except Exception as e:
+            print(f"Error actualizando hábito: {e}")
+            return False
+
+    def delete_habit(self, habit_id: str) -> bool:
+        """Eliminar hábito"""
+        try:
+            self._invalidate_snapshot()
+            self._execute(
+                'DELETE FROM "01_productivity_habits" WHERE id = ? AND user_id = ?',
+                (habit_id, self.user_id)
+            )
+            return True
+        except Exception as e:
+            print(f"Error eliminando hábito: {e}")
+            return False
+
+    def mark_habit_done(self, habit_id: str) -> Dict:
+        """Marcar hábito como hecho hoy y actualizar racha (misma lógica que la RPC de Supabase)"""
+        try:
+            self._invalidate_snapshot()
+            conn = self.conn
+            # BEGIN IMMEDIATE toma el lock de escritura antes de leer: serializa dobles clics
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    'SELECT streak_count, last_completed_at FROM "01_productivity_habits" WHERE id = ? AND user_id = ?',
+                    (habit_id, self.user_id)
+                ).fetchone()
+                if row is None:
+                    conn.rollback()
+                    return {'success': False, 'message': 'Hábito no encontrado'}
+
+                now = datetime.now(self.timezone)
+                new_streak = next_streak(
+                    row['streak_count'],
+                    to_local_date(row['last_completed_at'], self.timezone),
+                    now.date()
+                )
+                if new_streak is None:
+                    conn.rollback()
+                    return {'success': True, 'message': 'Ya completado hoy', 'streak': row['streak_count']}
+
+                conn.execute(
+                    'UPDATE "01_productivity_habits" SET streak_count = ?, last_completed_at = ? WHERE id = ?',
+                    (new_streak, now.isoformat(), habit_id)
+                )
+                conn.execute(
+                    'INSERT INTO "01_productivity_habit_logs" (habit_id, user_id, completed_at, date_logged) VALUES (?, ?, ?, ?)',
+                    (habit_id, self.user_id, now.isoformat(), now.date().isoformat())
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            return {'success': True, 'streak': new_streak, 'message': f'¡Racha: {new_streak} días!'}
+
+        except Exception as e:
+            print(f"Error marcando hábito: {e}")
+            return {'success': False, 'message': str(e)}
+
+    def get_habit_logs_last_n_days(self, days: int = 7) -> List[Dict]:
+        """Obtener logs de hábitos de los últimos N días"""
+        try:
+            start_date = (datetime.now(self.timezone).date() - timedelta(days=days-1)).isoformat()
+            return self._query(
+                'SELECT * FROM "01_productivity_habit_logs" WHERE user_id = ? AND date_logged >= ?',
+                (self.user_id, start_date)
+            )
+        except Exception as e:
+            print(f"Error obteniendo logs de hábitos: {e}")
+            return []
+
+    # --- Focus sessions y timer activo ---
+
+    def log_focus_session(self, task_name: str, timer_type: str, duration_minutes: int):
+        """Guardar sesión de focus timer (escritura local directa, sin cola)"""
+        try:
+            self._execute(
+                'INSERT INTO "01_productivity_focus_sessions" '
+                '(user_id, task_name, timer_type, duration_minutes, completed_at, date) VALUES (?, ?, ?, ?, ?, ?)',
+                (self.user_id, task_name, timer_type, duration_minutes,
+                 datetime.now(self.timezone).isoformat(), self._get_today_iso())
+            )
+        except Exception as e:
+            print(f"Error al guardar focus session: {e}")
+
+    def get_focus_sessions_today(self) -> List[Dict]:
+        """Obtener sesiones de focus del día (más recientes primero)"""
+        try:
+            return self._query(
+                'SELECT * FROM "01_productivity_focus_sessions" WHERE user_id = ? AND date = ? ORDER BY completed_at DESC',
+                (self.user_id, self._get_today_iso())
+            )
+        except Exception as e:
+            print(f"Error al obtener focus sessions: {e}")
+            return []
+
+    def get_active_timer(self) -> Optional[Dict]:
+        """Obtener el timer activo guardado (None si no hay)"""
+        try:
+            rows = self._query('SELECT * FROM "01_productivity_active_timers" WHERE user_id = ?', (self.user_id,))
+            return rows[0] if rows else None
+        except Exception as e:
+            print(f"Error al obtener timer activo: {e}")
+            return None
+
+    def save_active_timer(self, timer_record: Dict) -> bool:
+        """Guardar el timer activo; upsert por usuario"""
+        try:
+            self._upsert('01_productivity_active_timers', {
+                'user_id': self.user_id,
+                **timer_record,
+                'updated_at': datetime.now(pytz.utc).isoformat()
+            }, 'user_id')
+            return True
+        except Exception as e:
+            print(f"Error al guardar timer activo: {e}")
+            return False
+
+    def clear_active_timer(self) -> bool:
+        """Eliminar el timer activo"""
+        try:
+            self._execute('DELETE FROM "01_productivity_active_timers" WHERE user_id = ?', (self.user_id,))
+            return True
+        except Exception as e:
+            print(f"Error al eliminar timer activo: {e}")
+            return False
+
+    # --- Conversaciones ---
+
+    def log_conversation(self, identity: Optional[str], messages: List[Dict]):
+        """Guardar conversación"""
+        try:
+            self._execute(
+                'INSERT INTO "01_productivity_identity_sessions" (user_id, identity_active, conversation_log, start_time) '
+                'VALUES (?, ?, ?, ?)',
+                (self.user_id, identity if identity else 'Fin de semana',
+                 _encode_value('conversation_log', messages), datetime.now().isoformat())
+            )
+        except Exception as e:
+            print(f"Error al guardar conversación: {e}")
+
+    def get_recent_conversations(self, limit: int = 10) -> List[Dict]:
+        """Obtener mensajes de las últimas sesiones en orden cronológico"""
+        try:
+            sessions = self._query(
+                'SELECT conversation_log FROM "01_productivity_identity_sessions" '
+                'WHERE user_id = ? ORDER BY start_time DESC LIMIT ?',
+                (self.user_id, limit)
+            )
+            all_messages = []
+            for session in reversed(sessions):
+                logs = session.get('conversation_log') or []
+                if isinstance(logs, list):
+                    all_messages.extend(logs)
+            return all_messages
+        except Exception as e:
+            print(f"Error al obtener conversaciones recientes: {e}")
+            return []
+
+    # --- Settings ---
+
+    def get_user_settings(self) -> Dict:
+        """Obtener configuración de identidades del usuario"""
+        try:
+            rows = self._query('SELECT * FROM "01_productivity_user_settings" WHERE user_id = ?', (self.user_id,))
+            if rows:
+                return {**DEFAULT_SETTINGS, **{k: v for k, v in rows[0].items() if v}}
+            return dict(DEFAULT_SETTINGS)
+        except Exception as e:
+            print(f"Error obteniendo user_settings: {e}")
+            return {**DEFAULT_SETTINGS, 'timezone': 'America/Caracas'}
+
+    def update_user_settings(self, identity_1: str, identity_2: str, timezone: str = None) -> Tuple[bool, str]:
+        """Actualizar nombres de identidades y timezone"""
+        try:
+            self._invalidate_snapshot()
+            data = {
+                'user_id': self.user_id,
+                'identity_1_name': identity_1,
+                'identity_2_name': identity_2,
+                'updated_at': datetime.now().isoformat()
+            }
+            if timezone:
+                data['timezone'] = timezone
+            self._upsert('01_productivity_user_settings', data, 'user_id')
+            return True, "Configuración guardada"
+        except Exception as e:
+            print(f"Error actualizando settings: {e}")
+            return False, str(e)
+
+    def get_morning_mastery_text(self) -> str:
+        """Obtener texto personalizado de Morning Mastery"""
+        return self.get_user_settings().get('morning_mastery_text', '')
+
+    def update_morning_mastery_text(self, text: str) -> bool:
+        """Actualizar texto de Morning Mastery"""
+        try:
+            self._invalidate_snapshot()
+            self._upsert('01_productivity_user_settings', {
+                'user_id': self.user_id,
+                'morning_mastery_text': text,
+                'updated_at': datetime.now().isoformat()
+            }, 'user_id')
+            return True
+        except Exception as e:
+            print(f"Error actualizando Morning Mastery: {e}")
+            return False
+
+    # --- Feedback cache ---
+
+    def get_cached_feedback(self, cache_keys: List[str]) -> Dict[str, str]:
+        """Obtener feedback persistido para las claves dadas {cache_key: feedback}"""
+        if not cache_keys:
+            return {}
+        try:
+            rows = self._query(
+                f'SELECT cache_key, feedback FROM "01_productivity_feedback_cache" '
+                f'WHERE cache_key IN ({", ".join("?" for _ in cache_keys)})',
+                tuple(cache_keys)
+            )
+            return {row['cache_key']: row['feedback'] for row in rows}
+        except Exception as e:
+            print(f"Error obteniendo feedback cacheado: {e}")
+            return {}
+
+    def save_cached_feedback(self, entries: Dict[str, str]) -> bool:
+        """Persistir feedback generado {cache_key: feedback}"""
+        if not entries:
+            return True
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT INTO "01_productivity_feedback_cache" (cache_key, feedback) VALUES (?, ?) '
+                    'ON CONFLICT (cache_key) DO UPDATE SET feedback = excluded.feedback',
+                    list(entries.items())
+                )
+            return True
+        except Exception as e:
+            print(f"Error guardando feedback cacheado: {e}")
+            return False
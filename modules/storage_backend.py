@@ -0,0 +1,100 @@
+"""
+Interfaz común de almacenamiento y selección del backend por configuración
+"""
+import os
+from typing import Dict, List, Optional, Protocol, Tuple, runtime_checkable
+from modules.day_snapshot import DaySnapshot
+
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    """
+    Operaciones de datos que usan el agente, el sidebar y las páginas.
+    Implementaciones: SupabaseClient (hosted) y SQLiteClient (local, un solo nodo).
+    El comportamiento de ambas lo fija tests/test_storage_conformance.py.
+    Todas las fechas son del día local del usuario (ver set_timezone).
+    """
+
+    user_id: str
+    timezone: object  # pytz timezone
+
+    @property
+    def data_version(self) -> int: ...
+
+    def set_timezone(self, timezone: str): ...
+
+    # Tracking diario
+    def get_day_snapshot(self, refresh: bool = False) -> DaySnapshot: ...
+    def get_today_tracking(self) -> Dict: ...
+    def update_daily_3(self, tasks_data: List[Dict]): ...
+    def update_priorities(self, priorities_data: List[Dict]): ...
+    def mark_code_done(self, commit_time: Optional[str] = None): ...
+    def mark_morning_mastery_done(self): ...
+    def get_weekly_stats(self) -> Dict: ...
+    def get_last_n_days_tracking(self, days: int = 7) -> List[Dict]: ...
+    def save_task_feedback(self, feedbacks: List[str], period: str = "morning") -> bool: ...
+    def get_task_feedback(self, period: str = "morning") -> List[str]: ...
+    def save_breadcrumbs(self, breadcrumbs_text: str) -> bool: ...
+    def get_breadcrumbs_today(self) -> str: ...
+    def get_breadcrumbs_from_yesterday(self) -> str: ...
+
+    # Rachas
+    def get_code_streak(self) -> int: ...
+
+    # Hábitos y logs de hábitos
+    def create_habit(self, name: str) -> Tuple[bool, str]: ...
+    def get_habits(self) -> List[Dict]: ...
+    def update_habit(self, habit_id: str, name: str) -> bool: ...
+    def delete_habit(self, habit_id: str) -> bool: ...
+    def mark_habit_done(self, habit_id: str) -> Dict: ...
+    def get_habit_logs_last_n_days(self, days: int = 7) -> List[Dict]: ...
+
+    # Focus sessions y timer activo
+    def log_focus_session(self, task_name: str, timer_type: str, duration_minutes: int): ...
+    def get_focus_sessions_today(self) -> List[Dict]: ...
+    def get_active_timer(self) -> Optional[Dict]: ...
+    def save_active_timer(self, timer_record: Dict) -> bool: ...
+    def clear_active_timer(self) -> bool: ...
+
+    # Conversaciones
+    def log_conversation(self, identity: Optional[str], messages: List[Dict]): ...
+    def get_recent_conversations(self, limit: int = 10) -> List[Dict]: ...
+
+    # Settings
+    def get_user_settings(self) -> Dict: ...
+    def update_user_settings(self, identity_1: str, identity_2: str, timezone: str = None) -> Tuple[bool, str]: ...
+    def get_morning_mastery_text(self) -> str: ...
+    def update_morning_mastery_text(self, text: str) -> bool: ...
+
+    # Cache de feedback (compartido entre usuarios)
+    def get_cached_feedback(self, cache_keys: List[str]) -> Dict[str, str]: ...
+    def save_cached_feedback(self, entries: Dict[str, str]) -> bool: ...
+
+
+def create_storage_backend(user_id: str, timezone: str = 'America/Caracas') -> StorageBackend:
+    """
+    Crear el backend configurado en STORAGE_BACKEND:
+    - 'supabase' (default): SUPABASE_URL / SUPABASE_KEY
+    - 'sqlite': archivo local en SQLITE_PATH (sin latencia de red)
+    """
+    backend_name = os.getenv('STORAGE_BACKEND', 'supabase').strip().lower()
+
+    if backend_name == 'sqlite':
+        from modules.sqlite_client import SQLiteClient, DEFAULT_SQLITE_PATH
+        backend = SQLiteClient(
+            path=os.getenv('SQLITE_PATH', DEFAULT_SQLITE_PATH),
+            user_id=user_id,
+            timezone=timezone
+        )
+    elif backend_name == 'supabase':
+        from modules.supabase_client import SupabaseClient
+        backend = SupabaseClient(
+            url=os.getenv('SUPABASE_URL'),
+            key=os.getenv('SUPABASE_KEY'),
+            user_id=user_id,
+            timezone=timezone
+        )
+    else:
+        raise ValueError(f"STORAGE_BACKEND desconocido: {backend_name}")
+
+    return backend
@@ -1,35 +1,170 @@
 """
 Cliente de Supabase para gestionar datos del Productivity Coach
 """
-from supabase import create_client, Client
+from supabase import Client
+from postgrest.types import CountMethod, ReturnMethod
 from datetime import datetime, date, timedelta
 import json
+import os
 import pytz
-from typing import Dict, List, Optional
+import time
+from typing import Any, Callable, Dict, List, Optional
+from modules.clients import get_supabase_client, get_write_behind_queue, get_history_cache
+from modules.day_snapshot import DaySnapshot, DEFAULT_TRACKING, DEFAULT_SETTINGS, SNAPSHOT_TTL_SECONDS
+from modules import metrics, tracing
+
+
+# Columnas proyectadas por consulta: solo lo que usa cada llamador.
+# Evita traer los JSON grandes (details, feedback, breadcrumbs) cuando bastan dos enteros.
+DAY_COLUMNS = (
+    'date, day_of_week, '
+    'identity_1_daily_3_completed, identity_1_daily_3_list, identity_1_daily_3_details, identity_1_feedback, '
+    'identity_2_priorities_completed, identity_2_priorities_list, identity_2_priorities_details, identity_2_feedback, '
+    'code_commit_done, code_commit_time, morning_mastery_done, breadcrumbs_tomorrow'
+)
+HISTORY_COLUMNS = (
+    'date, day_of_week, identity_1_daily_3_completed, identity_2_priorities_completed, '
+    'code_commit_done, morning_mastery_done'
+)
+# Historial sincronizado incrementalmente por updated_at (requiere migrations/005)
+HISTORY_SYNC_COLUMNS = HISTORY_COLUMNS + ', updated_at'
+CODE_STREAK_COLUMNS = 'current_streak, longest_streak, total_completions'
+HABIT_COLUMNS = 'id, name, streak_count, last_completed_at, created_at'
+HABIT_LOG_COLUMNS = 'habit_id, date_logged'
+# Filas por página en lecturas paginadas (max-rows por defecto de PostgREST)
+PAGE_SIZE = int(os.getenv('SUPABASE_PAGE_SIZE', '1000'))
+FOCUS_SESSION_COLUMNS = 'task_name, timer_type, duration_minutes, completed_at'
+ACTIVE_TIMER_COLUMNS = (
+    'task_name, timer_type, duration_minutes, start_time, end_time, status, paused_at, paused_seconds'
+)
+SETTINGS_COLUMNS = 'identity_1_name, identity_2_name, timezone, morning_mastery_text'
 
 
 class SupabaseClient:
     """Cliente para interactuar con Supabase"""
 
     def __init__(self, url: str, key: str, user_id: str, timezone: str = 'America/Caracas'):
-        self.client: Client = create_client(url, key)
+        # Cliente de transporte compartido por el proceso; este wrapper solo guarda el estado del usuario
+        self.client: Client = get_supabase_client(url, key)
+        # Logs de solo-inserción (conversaciones, focus sessions) fuera del camino del usuario
+        self.writer = get_write_behind_queue(url, key)
         self.user_id = user_id
         try:
             self.timezone = pytz.timezone(timezone)
         except:
             self.timezone = pytz.timezone('America/Caracas')
 
+        # Snapshot del día reutilizado entre renders; _data_version cuenta las escrituras locales
+        self._snapshot: Optional[DaySnapshot] = None
+        self._data_version = 0
+
+        # Historial en disco compartido; _history_synced = (versión de datos, fecha, instante del último sync)
+        self.history = get_history_cache()
+        self._history_synced = (None, None, 0.0)
+
     def set_timezone(self, timezone: str):
         """Actualizar timezone del cliente"""
         try:
             self.timezone = pytz.timezone(timezone)
+            self._invalidate_snapshot()
         except:
             pass # Mantener anterior si falla
 
+    @property
+    def data_version(self) -> int:
+        """Contador de escrituras locales (clave de caches derivados: snapshot, frames del dashboard)"""
+        return self._data_version
+
+    def _execute(self, query):
+        """Ejecutar un request de PostgREST dentro de un span (tabla, operación, filas, duración)"""
+        return tracing.execute(query)
+
+    def _invalidate_snapshot(self):
+        """Descartar el snapshot del día y subir la versión de datos (llamar en cada escritura)"""
+        self._snapshot = None
+        self._data_version += 1
+
     def _get_today_iso(self) -> str:
         """Obtener fecha actual en formato ISO respetando timezone"""
         return datetime.now(self.timezone).date().isoformat()
 
+    def _upsert_today(self, fields: Dict):
+        """
+        Escribir columnas del registro de hoy en una sola petición.
+        Upsert por (user_id, date): crea la fila si no existe, sin SELECT previo.
+        Si el upsert responde bien, el snapshot del día se actualiza en memoria con
+        las mismas columnas en vez de recargarse (la escritura sigue siendo 1 request).
+        """
+        snapshot = self._snapshot
+        self._invalidate_snapshot()
+        record = {
+            'user_id': self.user_id,
+            'date': self._get_today_iso(),
+            'day_of_week': datetime.now(self.timezone).strftime('%A'),
+            **fields
+        }
+        response = self._execute(self.client.table('01_productivity_daily_tracking')\
+            .upsert(record, on_conflict='user_id,date', returning=ReturnMethod.minimal))
+        if snapshot is not None and snapshot.date == record['date']:
+            self._snapshot = snapshot.with_today(fields, self._data_version)
+        return response
+
+    def get_day_snapshot(self, refresh: bool = False) -> DaySnapshot:
+        """
+        Obtener snapshot inmutable del día (tracking de hoy y ayer, settings, hábitos y racha).
+        Reutiliza el snapshot en memoria salvo que se pida refresh, cambie el día, haya
+        escrituras locales o pasen SNAPSHOT_TTL_SECONDS (cambios desde otro dispositivo).
+        """
+        today_date = datetime.now(self.timezone).date()
+        today = today_date.isoformat()
+
+        snapshot = self._snapshot
+        if not refresh and snapshot is not None and snapshot.is_fresh(today, self._data_version):
+            return snapshot
+
+        yesterday = (today_date - timedelta(days=1)).isoformat()
+
+        try:
+            # 1. Tracking de hoy y ayer en una sola consulta
+            response = self._execute(self.client.table('01_productivity_daily_tracking').select(DAY_COLUMNS)\
+                .eq('user_id', self.user_id)\
+                .in_('date', [today, yesterday]))
+            rows = {row.get('date'): row for row in (response.data or [])}
+
+            # Crear registro de hoy si aún no existe
+            today_row = rows.get(today) or self.get_today_tracking()
+
+            # 2. Settings, hábitos y racha de código
+            settings = self.get_user_settings()
+            habits = self.get_habits()
+            code_streak = self.get_code_streak()
+
+            self._snapshot = DaySnapshot.build(
+                date=today,
+                yesterday_date=yesterday,
+                today=today_row,
+                yesterday=rows.get(yesterday, {}),
+                settings=settings,
+                habits=habits,
+                code_streak=code_streak,
+                version=self._data_version,
+                fetched_at=time.monotonic()
+            )
+            return self._snapshot
+
+        except Exception as e:
+            print(f"Error al obtener snapshot del día: {e}")
+            # No cachear el fallback para reintentar en el próximo render
+            return DaySnapshot.build(
+                date=today,
+                yesterday_date=yesterday,
+                today=DEFAULT_TRACKING,
+                yesterday={},
+                settings=DEFAULT_SETTINGS,
+                habits=[],
+                code_streak=0
+            )
+
 
     def get_today_tracking(self) -> Dict:
         """Obtener tracking del día actual"""
@@ -38,10 +173,9 @@ class SupabaseClient:
 
         try:
             # Buscar registro de hoy para este usuario
-            response = self.client.table('01_productivity_daily_tracking').select('*')\
+            response = self._execute(self.client.table('01_productivity_daily_tracking').select(DAY_COLUMNS)\
                 .eq('date', today)\
-                .eq('user_id', self.user_id)\
-                .execute()
+                .eq('user_id', self.user_id))
 
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -57,8 +191,12 @@ class SupabaseClient:
                     'morning_mastery_done': False
                 }
 
-                response = self.client.table('01_productivity_daily_tracking').insert(new_record).execute()
-                return response.data[0] if response.data else new_record
+                # ignore_duplicates evita filas duplicadas si dos renders crean el registro a la vez
+                # Sin representación de vuelta: la fila nueva es new_record + defaults
+                self._execute(self.client.table('01_productivity_daily_tracking')\
+                    .upsert(new_record, on_conflict='user_id,date', ignore_duplicates=True,
+                            returning=ReturnMethod.minimal))
+                return new_record
 
         except Exception as e:
             print(f"Error al obtener tracking del día: {e}")
@@ -74,22 +212,17 @@ class SupabaseClient:
         Actualizar Daily 3 (Texto + Estado)
         tasks_data: Lista de dicts [{'text': str, 'done': bool}]
         """
-        today = self._get_today_iso()
-        
         # Calcular derivadas para mantener compatibilidad
         completed_count = sum(1 for t in tasks_data if t.get('done', False))
         text_list = [t.get('text', '') for t in tasks_data]
 
         try:
-            # Asegurar que existe el registro
-            self.get_today_tracking()
-
             # Actualizar columnas nuevas (JSON) y viejas (Legacy para dashboard)
-            self.client.table('01_productivity_daily_tracking').update({
+            self._upsert_today({
                 'identity_1_daily_3_details': tasks_data,     # Nueva Logica
                 'identity_1_daily_3_completed': completed_count, # Legacy Compat
                 'identity_1_daily_3_list': text_list          # Legacy Compat
-            }).eq('date', today).eq('user_id', self.user_id).execute()
+            })
 
         except Exception as e:
             print(f"Error al actualizar Daily 3: {e}")
@@ -99,43 +232,31 @@ class SupabaseClient:
         Actualizar Prioridades (Texto + Estado)
         priorities_data: Lista de dicts [{'text': str, 'done': bool}]
         """
-        today = self._get_today_iso()
-        
         # Calcular derivadas
         completed_count = sum(1 for p in priorities_data if p.get('done', False))
         text_list = [p.get('text', '') for p in priorities_data]
 
         try:
-            # Asegurar que existe el registro
-            self.get_today_tracking()
-
-            # Actualizar
-            self.client.table('01_productivity_daily_tracking').update({
+            self._upsert_today({
                 'identity_2_priorities_details': priorities_data,       # Nueva Logica
                 'identity_2_priorities_completed': completed_count,     # Legacy Compat
                 'identity_2_priorities_list': text_list                 # Legacy Compat
-            }).eq('date', today).eq('user_id', self.user_id).execute()
+            })
 
         except Exception as e:
             print(f"Error al actualizar prioridades: {e}")
 
     def mark_code_done(self, commit_time: Optional[str] = None):
         """Marcar código como completado"""
-        today = self._get_today_iso()
-
-
         if commit_time is None:
             commit_time = datetime.now().strftime('%H:%M')
 
         try:
-            # Asegurar que existe el registro
-            self.get_today_tracking()
-
-            # Actualizar
-            self.client.table('01_productivity_daily_tracking').update({
+            self._invalidate_snapshot()
+            self._upsert_today({
                 'code_commit_done': True,
                 'code_commit_time': commit_time
-            }).eq('date', today).eq('user_id', self.user_id).execute()
+            })
 
             # Actualizar racha
             self._update_code_streak()
@@ -145,17 +266,10 @@ class SupabaseClient:
 
     def mark_morning_mastery_done(self):
         """Marcar Morning Mastery como completado"""
-        today = self._get_today_iso()
-
-
         try:
-            # Asegurar que existe el registro
-            self.get_today_tracking()
-
-            # Actualizar
-            self.client.table('01_productivity_daily_tracking').update({
+            self._upsert_today({
                 'morning_mastery_done': True
-            }).eq('date', today).eq('user_id', self.user_id).execute()
+            })
 
         except Exception as e:
             print(f"Error al marcar Morning Mastery: {e}")
@@ -163,10 +277,9 @@ class SupabaseClient:
     def get_code_streak(self) -> int:
         """Obtener racha actual de código"""
         try:
-            response = self.client.table('01_productivity_habit_streaks').select('*')\
+            response = self._execute(self.client.table('01_productivity_habit_streaks').select('current_streak')\
                 .eq('habit_name', 'Código')\
-                .eq('user_id', self.user_id)\
-                .execute()
+                .eq('user_id', self.user_id))
 
             if response.data and len(response.data) > 0:
                 return response.data[0].get('current_streak', 0)
@@ -180,7 +293,7 @@ class SupabaseClient:
                     'total_completions': 0,
                     'consistency_rate': 0.0
                 }
-                self.client.table('01_productivity_habit_streaks').insert(new_record).execute()
+                self._execute(self.client.table('01_productivity_habit_streaks').insert(new_record, returning=ReturnMethod.minimal))
                 return 0
 
         except Exception as e:
@@ -190,10 +303,9 @@ class SupabaseClient:
     def _update_code_streak(self):
         """Actualizar racha de código (interno)"""
         try:
-            response = self.client.table('01_productivity_habit_streaks').select('*')\
+            response = self._execute(self.client.table('01_productivity_habit_streaks').select(CODE_STREAK_COLUMNS)\
                 .eq('habit_name', 'Código')\
-                .eq('user_id', self.user_id)\
-                .execute()
+                .eq('user_id', self.user_id))
 
             if response.data and len(response.data) > 0:
                 streak_data = response.data[0]
@@ -204,16 +316,16 @@ class SupabaseClient:
                 new_streak = current_streak + 1
                 new_longest = max(new_streak, longest_streak)
 
-                self.client.table('01_productivity_habit_streaks').update({
+                self._execute(self.client.table('01_productivity_habit_streaks').update({
                     'current_streak': new_streak,
                     'longest_streak': new_longest,
                     'last_activity_date': self._get_today_iso(),
                     'total_completions': total_completions + 1
 
-                }).eq('habit_name', 'Código').eq('user_id', self.user_id).execute()
+                }, returning=ReturnMethod.minimal).eq('habit_name', 'Código').eq('user_id', self.user_id))
             else:
                 # Si no existe, crear registro inicial (Racha = 1 porque acabamos de cumplir)
-                self.client.table('01_productivity_habit_streaks').insert({
+                self._execute(self.client.table('01_productivity_habit_streaks').insert({
                     'user_id': self.user_id,
                     'habit_name': 'Código',
                     'current_streak': 1,
@@ -222,7 +334,7 @@ class SupabaseClient:
                     'total_completions': 1,
 
                     'consistency_rate': 100.0
-                }).execute()
+                }, returning=ReturnMethod.minimal))
 
         except Exception as e:
             print(f"Error al actualizar racha: {e}")
@@ -230,12 +342,13 @@ class SupabaseClient:
     def log_conversation(self, identity: Optional[str], messages: List[Dict]):
         """Guardar conversación en Supabase"""
         try:
-            self.client.table('01_productivity_identity_sessions').insert({
+            # Escritura diferida: se inserta en bloque desde el hilo de fondo
+            self.writer.enqueue('01_productivity_identity_sessions', {
                 'user_id': self.user_id,
                 'identity_active': identity if identity else 'Fin de semana',
                 'conversation_log': messages,
                 'start_time': datetime.now().isoformat()
-            }).execute()
+            })
 
         except Exception as e:
             print(f"Error al guardar conversación: {e}")
@@ -243,16 +356,15 @@ class SupabaseClient:
     def log_focus_session(self, task_name: str, timer_type: str, duration_minutes: int):
         """Guardar sesión de focus timer"""
         try:
-            self.client.table('01_productivity_focus_sessions').insert({
+            # Escritura diferida: se inserta en bloque desde el hilo de fondo
+            self.writer.enqueue('01_productivity_focus_sessions', {
                 'user_id': self.user_id,
                 'task_name': task_name,
                 'timer_type': timer_type,
                 'duration_minutes': duration_minutes,
-                'duration_minutes': duration_minutes,
                 'completed_at': datetime.now(self.timezone).isoformat(),
                 'date': self._get_today_iso()
-            }).execute()
-
+            })
 
         except Exception as e:
             print(f"Error al guardar focus session: {e}")
@@ -263,84 +375,88 @@ class SupabaseClient:
 
 
         try:
-            response = self.client.table('01_productivity_focus_sessions').select('*')\
+            response = self._execute(self.client.table('01_productivity_focus_sessions').select(FOCUS_SESSION_COLUMNS)\
                 .eq('date', today)\
                 .eq('user_id', self.user_id)\
-                .order('completed_at', desc=True)\
-                .execute()
+                .order('completed_at', desc=True))
             return response.data if response.data else []
 
         except Exception as e:
             print(f"Error al obtener focus sessions: {e}")
             return []
 
-    def get_weekly_stats(self) -> Dict:
-        """Obtener estadísticas de la semana"""
-        # Nota: La función RPC podría no filtrar por usuario si no está configurada,
-        # así que usaremos el cálculo manual por seguridad en esta versión
-        return self._calculate_weekly_stats_manually()
+    # --- ACTIVE TIMER (uno por usuario, sobrevive refrescos y reinicios) ---
 
-    def _calculate_weekly_stats_manually(self) -> Dict:
-        """Calcular stats semanales manualmente (fallback con filtro de usuario)"""
+    def get_active_timer(self) -> Optional[Dict]:
+        """Obtener el timer activo guardado (None si no hay)"""
         try:
-            # Obtener últimos 7 días
-            today_date = datetime.now(self.timezone).date()
-            start_date = (today_date - timedelta(days=6)).isoformat()
-
-
-            response = self.client.table('01_productivity_daily_tracking').select('*')\
-                .gte('date', start_date)\
+            response = self._execute(self.client.table('01_productivity_active_timers').select(ACTIVE_TIMER_COLUMNS)\
                 .eq('user_id', self.user_id)\
-                .execute()
+                .limit(1))
+            return response.data[0] if response.data else None
 
-            if not response.data:
-                return {
-                    'total_daily_3': 0,
-                    'total_priorities': 0,
-                    'code_days': 0,
-                    'morning_mastery_days': 0,
-                    'avg_completion_rate': 0.0
-                }
+        except Exception as e:
+            print(f"Error al obtener timer activo: {e}")
+            return None
 
-            data = response.data
-            total_daily_3 = sum(d.get('identity_1_daily_3_completed', 0) for d in data)
-            total_priorities = sum(d.get('identity_2_priorities_completed', 0) for d in data)
-            code_days = sum(1 for d in data if d.get('code_commit_done'))
-            morning_days = sum(1 for d in data if d.get('morning_mastery_done'))
+    def save_active_timer(self, timer_record: Dict) -> bool:
+        """Guardar el timer activo (ver TimerManager.to_record); upsert por usuario"""
+        try:
+            self._execute(self.client.table('01_productivity_active_timers').upsert({
+                'user_id': self.user_id,
+                **timer_record,
+                'updated_at': datetime.now(pytz.utc).isoformat()
+            }, on_conflict='user_id', returning=ReturnMethod.minimal))
+            return True
 
-            # Tasa basada en 3 tareas daily y 3 prioridades por día (6 total)
-            avg_rate = ((total_daily_3 + total_priorities) / (len(data) * 6) * 100) if len(data) > 0 else 0
+        except Exception as e:
+            print(f"Error al guardar timer activo: {e}")
+            return False
 
-            return {
-                'total_daily_3': total_daily_3,
-                'total_priorities': total_priorities,
-                'code_days': code_days,
-                'morning_mastery_days': morning_days,
-                'avg_completion_rate': round(avg_rate, 2)
-            }
+    def clear_active_timer(self) -> bool:
+        """Eliminar el timer activo (al detener o finalizar la sesión)"""
+        try:
+            self._execute(self.client.table('01_productivity_active_timers').delete(returning=ReturnMethod.minimal)\
+                .eq('user_id', self.user_id))
+            return True
 
         except Exception as e:
-            print(f"Error en cálculo manual: {e}")
-            return {
-                'total_daily_3': 0,
-                'total_priorities': 0,
-                'code_days': 0,
-                'morning_mastery_days': 0,
-                'avg_completion_rate': 0.0
-            }
+            print(f"Error al eliminar timer activo: {e}")
+            return False
+
+    def get_weekly_stats(self) -> Dict:
+        """Obtener estadísticas de la semana (desde el historial local, filtrado por usuario)"""
+        today = datetime.now(self.timezone).date()
+        return metrics.summarize_records(self.get_last_n_days_tracking(7), today - timedelta(days=6), today)
 
     def get_last_n_days_tracking(self, days: int = 7) -> List[Dict]:
-        """Obtener tracking de los últimos N días"""
+        """
+        Obtener tracking de los últimos N días desde el historial local.
+        Solo se piden al backend los días no cubiertos y las filas cambiadas desde
+        el último sync, así 30/90/365 días cuestan lo mismo que 7.
+        """
+        today_date = datetime.now(self.timezone).date()
+        start_date = today_date - timedelta(days=days-1)
+
         try:
-            today_date = datetime.now(self.timezone).date()
-            start_date = (today_date - timedelta(days=days-1)).isoformat()
+            synced_version, synced_date, synced_at = self._history_synced
+            # Cambios remotos: tras escrituras locales, al cambiar el día o al expirar el TTL
+            fetch_changes = (synced_version != self._data_version
+                             or synced_date != today_date
+                             or time.monotonic() - synced_at >= SNAPSHOT_TTL_SECONDS)
+            self.history.sync(self.user_id, start_date, self._fetch_tracking_rows, fetch_changes=fetch_changes)
+            if fetch_changes:
+                self._history_synced = (self._data_version, today_date, time.monotonic())
+            return self.history.get_rows(self.user_id, start_date, today_date)
 
+        except Exception as e:
+            print(f"Error en historial local, consultando directo: {e}")
 
-            response = self.client.table('01_productivity_daily_tracking').select('*')\
-                .gte('date', start_date)\
+        try:
+            response = self._execute(self.client.table('01_productivity_daily_tracking').select(HISTORY_COLUMNS)\
+                .gte('date', start_date.isoformat())\
                 .eq('user_id', self.user_id)\
-                .order('date', desc=False)\
-                .execute()
+                .order('date', desc=False))
 
             return response.data if response.data else []
 
@@ -348,16 +464,29 @@ class SupabaseClient:
             print(f"Error al obtener tracking histórico: {e}")
             return []
 
+    def _fetch_tracking_rows(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                             updated_since: Optional[str] = None) -> List[Dict]:
+        """Filas de historial para HistoryCache.sync (rango de fechas y/o cambiadas desde updated_since)"""
+        query = self.client.table('01_productivity_daily_tracking').select(HISTORY_SYNC_COLUMNS)\
+            .eq('user_id', self.user_id)
+        if start_date:
+            query = query.gte('date', start_date)
+        if end_date:
+            query = query.lte('date', end_date)
+        if updated_since:
+            query = query.gt('updated_at', updated_since)
+        response = self._execute(query.order('date', desc=False))
+        return response.data or []
+
     def get_recent_conversations(self, limit: int = 10) -> List[Dict]:
         """Obtener conversaciones recientes para rehidratar memoria"""
         try:
             # Traer las últimas N sesiones
-            response = self.client.table('01_productivity_identity_sessions')\
+            response = self._execute(self.client.table('01_productivity_identity_sessions')\
                 .select('conversation_log')\
                 .eq('user_id', self.user_id)\
                 .order('start_time', desc=True)\
-                .limit(limit)\
-                .execute()
+                .limit(limit))
             
             if not response.data:
                 return []
@@ -381,9 +510,8 @@ class SupabaseClient:
     def get_user_settings(self) -> Dict:
         """Obtener configuración de identidades del usuario"""
         try:
-            response = self.client.table('01_productivity_user_settings').select('*')\
-                .eq('user_id', self.user_id)\
-                .execute()
+            response = self._execute(self.client.table('01_productivity_user_settings').select(SETTINGS_COLUMNS)\
+                .eq('user_id', self.user_id))
             
             default_settings = {
                 'identity_1_name': 'Empresario Exitoso',
@@ -407,6 +535,7 @@ class SupabaseClient:
     def update_user_settings(self, identity_1: str, identity_2: str, timezone: str = None):
         """Actualizar nombres de identidades y timezone"""
         try:
+            self._invalidate_snapshot()
             # Prepare update data
             data = {
                 'user_id': self.user_id,
@@ -419,7 +548,7 @@ class SupabaseClient:
                 data['timezone'] = timezone
 
             # Upsert (Insert or Update)
-            self.client.table('01_productivity_user_settings').upsert(data).execute()
+            self._execute(self.client.table('01_productivity_user_settings').upsert(data, returning=ReturnMethod.minimal))
             return True, "Configuración guardada"
         except Exception as e:
             print(f"Error actualizando settings: {e}")
@@ -430,17 +559,21 @@ class SupabaseClient:
     def create_habit(self, name: str) -> bool:
         """Crear un nuevo hábito"""
         try:
-            # Validar límite de 3 hábitos
-            current_habits = self.get_habits()
-            if len(current_habits) >= 3:
+            self._invalidate_snapshot()
+            # Validar límite de 3 hábitos (solo el conteo, sin traer filas)
+            count_response = self._execute(self.client.table('01_productivity_habits')\
+                .select('id', count=CountMethod.exact, head=True)\
+                .eq('user_id', self.user_id)\
+                .eq('active', True))
+            if (count_response.count or 0) >= 3:
                 return False, "Límite de 3 hábitos alcanzado"
 
-            self.client.table('01_productivity_habits').insert({
+            self._execute(self.client.table('01_productivity_habits').insert({
                 'user_id': self.user_id,
                 'name': name,
                 'streak_count': 0,
                 'active': True
-            }).execute()
+            }, returning=ReturnMethod.minimal))
             return True, "Hábito creado"
         except Exception as e:
             print(f"Error creando hábito: {e}")
@@ -449,11 +582,10 @@ class SupabaseClient:
     def get_habits(self) -> List[Dict]:
         """Obtener todos los hábitos activos del usuario"""
         try:
-            response = self.client.table('01_productivity_habits').select('*')\
+            response = self._execute(self.client.table('01_productivity_habits').select(HABIT_COLUMNS)\
                 .eq('user_id', self.user_id)\
                 .eq('active', True)\
-                .order('created_at', desc=False)\
-                .execute()
+                .order('created_at', desc=False))
             return response.data if response.data else []
         except Exception as e:
             print(f"Error obteniendo hábitos: {e}")
@@ -462,13 +594,14 @@ class SupabaseClient:
     def update_habit(self, habit_id: str, name: str) -> bool:
         """Actualizar nombre de hábito (reinicia racha si cambia significado?? No, solo nombre aquí)"""
         try:
+            self._invalidate_snapshot()
             # Nota: El usuario pidió que si cambia el hábito, se reinicie el contador.
             # En esta implementación asumiremos que cambiar el nombre ES cambiar el hábito.
-            self.client.table('01_productivity_habits').update({
+            self._execute(self.client.table('01_productivity_habits').update({
                 'name': name,
                 'streak_count': 0, # Reset forzado por cambio de contexto
                 'last_completed_at': None 
-            }).eq('id', habit_id).eq('user_id', self.user_id).execute()
+            }, returning=ReturnMethod.minimal).eq('id', habit_id).eq('user_id', self.user_id))
             return True
         except Exception as e:
             print(f"Error actualizando hábito: {e}")
@@ -477,95 +610,67 @@ class SupabaseClient:
     def delete_habit(self, habit_id: str) -> bool:
         """Eliminar hábito (soft delete o hard delete)"""
         try:
-            self.client.table('01_productivity_habits').delete().eq('id', habit_id).eq('user_id', self.user_id).execute()
+            self._invalidate_snapshot()
+            self._execute(self.client.table('01_productivity_habits').delete(returning=ReturnMethod.minimal).eq('id', habit_id).eq('user_id', self.user_id))
             return True
         except Exception as e:
             print(f"Error eliminando hábito: {e}")
             return False
 
     def mark_habit_done(self, habit_id: str) -> Dict:
-        """Marcar hábito como hecho hoy y actualizar racha"""
+        """
+        Marcar hábito como hecho hoy y actualizar racha.
+        Una sola llamada RPC (migrations/004): calcula la racha en la zona del usuario,
+        actualiza el hábito y agrega el log en la misma transacción.
+        """
         try:
-            habit_response = self.client.table('01_productivity_habits').select('*').eq('id', habit_id).single().execute()
-            habit = habit_response.data
-            
-            if not habit:
-                return {'success': False, 'message': 'Hábito no encontrado'}
-
-            today = datetime.now(self.timezone).date()
-            last_completed_str = habit.get('last_completed_at')
-            
-            if last_completed_str:
-                # Convertir timestamp a zona horaria del usuario antes de comparar fechas
-                try:
-                    if 'Z' in last_completed_str:
-                        last_date_dt = datetime.fromisoformat(last_completed_str.replace('Z', '+00:00'))
-                    elif '+' in last_completed_str or last_completed_str.count('-') > 2:
-                        last_date_dt = datetime.fromisoformat(last_completed_str)
-                    else:
-                        # Formato simple sin timezone, asumir timezone del usuario
-                        last_date_dt = datetime.fromisoformat(last_completed_str)
-                        last_date_dt = self.timezone.localize(last_date_dt)
-
-                    # Convertir a zona horaria del usuario y extraer fecha
-                    last_date_local = last_date_dt.astimezone(self.timezone)
-                    last_date = last_date_local.date()
-                except:
-                    last_date = datetime.fromisoformat(last_completed_str).date()
-
-                delta_days = (today - last_date).days
-
-                
-                if delta_days == 0:
-                    return {'success': True, 'message': 'Ya completado hoy', 'streak': habit['streak_count']}
-                elif delta_days == 1:
-                    new_streak = habit['streak_count'] + 1
-                else:
-                    new_streak = 1 # Rota la cadena (>1 día perdido)
-            else:
-                new_streak = 1 # Primer día
-
-            # Actualizar hábito
-            now_iso = datetime.now(self.timezone).isoformat()
-            self.client.table('01_productivity_habits').update({
-
-                'streak_count': new_streak,
-                'last_completed_at': now_iso
-            }).eq('id', habit_id).execute()
-
-            # Loggear historial (opcional pero recomendado)
-            self.client.table('01_productivity_habit_logs').insert({
-                'habit_id': habit_id,
-                'user_id': self.user_id,
-                'completed_at': now_iso,
-                'date_logged': self._get_today_iso()
-
-            }).execute()
-
-            return {'success': True, 'streak': new_streak, 'message': f'¡Racha: {new_streak} días!'}
+            self._invalidate_snapshot()
+            response = self._execute(self.client.rpc('productivity_complete_habit', {
+                'p_habit_id': habit_id,
+                'p_user_id': self.user_id,
+                'p_timezone': self.timezone.zone
+            }))
+            return response.data or {'success': False, 'message': 'Sin respuesta del servidor'}
 
         except Exception as e:
             print(f"Error marcando hábito: {e}")
             return {'success': False, 'message': str(e)}
 
     def get_habit_logs_last_n_days(self, days: int = 7) -> List[Dict]:
-        """Obtener logs de hábitos de los últimos N días para el heatmap"""
+        """
+        Obtener logs de hábitos de los últimos N días (rachas, consistencia y heatmap).
+        Paginado con .range(): PostgREST corta cada respuesta en max-rows (1000 por defecto)
+        y un año de varios hábitos diarios lo supera.
+        """
         try:
             today_date = datetime.now(self.timezone).date()
             start_date = (today_date - timedelta(days=days-1)).isoformat()
-            
-            # Ajuste de query, asegurando formato de fecha sin hora si es 'date_logged' es date
-            # Ojo: date_logged se guarda con _get_today_iso() que es string YYYY-MM-DD
-            response = self.client.table('01_productivity_habit_logs').select('*')\
+
+            # date_logged se guarda como YYYY-MM-DD (ver _get_today_iso)
+            return self._select_pages(lambda: self.client.table('01_productivity_habit_logs')\
+                .select(HABIT_LOG_COLUMNS)\
                 .gte('date_logged', start_date)\
                 .eq('user_id', self.user_id)\
-                .execute()
-                
-            return response.data if response.data else []
+                .order('date_logged', desc=False)\
+                .order('id', desc=False))
         except Exception as e:
             print(f"Error obteniendo logs de hábitos: {e}")
             return []
 
+    def _select_pages(self, build_query: Callable[[], Any]) -> List[Dict]:
+        """
+        Todas las filas de una consulta, de a PAGE_SIZE filas.
+        `build_query` arma la consulta desde cero en cada página (el builder acumula parámetros)
+        y debe ordenar por una clave única para que las páginas no se solapen.
+        """
+        rows: List[Dict] = []
+        while True:
+            response = self._execute(build_query().range(len(rows), len(rows) + PAGE_SIZE - 1))
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+
     # --- MORNING MASTERY SETTINGS ---
 
     def get_morning_mastery_text(self) -> str:
@@ -576,11 +681,12 @@ class SupabaseClient:
     def update_morning_mastery_text(self, text: str) -> bool:
         """Actualizar texto de Morning Mastery"""
         try:
-            self.client.table('01_productivity_user_settings').upsert({
+            self._invalidate_snapshot()
+            self._execute(self.client.table('01_productivity_user_settings').upsert({
                 'user_id': self.user_id,
                 'morning_mastery_text': text,
                 'updated_at': datetime.now().isoformat()
-            }).execute()
+            }, returning=ReturnMethod.minimal))
             return True
         except Exception as e:
             print(f"Error actualizando Morning Mastery: {e}")
@@ -590,14 +696,10 @@ class SupabaseClient:
 
     def save_task_feedback(self, feedbacks: List[str], period: str = "morning") -> bool:
         """Guardar feedback de tareas en daily_tracking"""
-        today = self._get_today_iso()
         column_name = 'identity_1_feedback' if period == 'morning' else 'identity_2_feedback'
 
         try:
-            self.get_today_tracking()  # Asegurar que existe el registro
-            self.client.table('01_productivity_daily_tracking').update({
-                column_name: feedbacks
-            }).eq('date', today).eq('user_id', self.user_id).execute()
+            self._upsert_today({column_name: feedbacks})
             return True
         except Exception as e:
             print(f"Error guardando feedback: {e}")
@@ -609,10 +711,9 @@ class SupabaseClient:
         column_name = 'identity_1_feedback' if period == 'morning' else 'identity_2_feedback'
 
         try:
-            response = self.client.table('01_productivity_daily_tracking').select(column_name)\
+            response = self._execute(self.client.table('01_productivity_daily_tracking').select(column_name)\
                 .eq('date', today)\
-                .eq('user_id', self.user_id)\
-                .execute()
+                .eq('user_id', self.user_id))
 
             if response.data and len(response.data) > 0:
                 feedback = response.data[0].get(column_name)
@@ -622,17 +723,40 @@ class SupabaseClient:
             print(f"Error obteniendo feedback: {e}")
             return ["", "", ""]
 
+    # --- FEEDBACK CACHE (tabla compartida, direccionada por hash) ---
+
+    def get_cached_feedback(self, cache_keys: List[str]) -> Dict[str, str]:
+        """Obtener feedback persistido para las claves dadas {cache_key: feedback}"""
+        if not cache_keys:
+            return {}
+        try:
+            response = self._execute(self.client.table('01_productivity_feedback_cache').select('cache_key, feedback')\
+                .in_('cache_key', cache_keys))
+            return {row['cache_key']: row['feedback'] for row in (response.data or [])}
+        except Exception as e:
+            print(f"Error obteniendo feedback cacheado: {e}")
+            return {}
+
+    def save_cached_feedback(self, entries: Dict[str, str]) -> bool:
+        """Persistir feedback generado {cache_key: feedback}"""
+        if not entries:
+            return True
+        try:
+            self._execute(self.client.table('01_productivity_feedback_cache').upsert([
+                {'cache_key': key, 'feedback': feedback}
+                for key, feedback in entries.items()
+            ], on_conflict='cache_key', returning=ReturnMethod.minimal))
+            return True
+        except Exception as e:
+            print(f"Error guardando feedback cacheado: {e}")
+            return False
+
     # --- BREADCRUMBS METHODS ---
 
     def save_breadcrumbs(self, breadcrumbs_text: str) -> bool:
         """Guardar breadcrumbs para mañana en el registro de hoy"""
-        today = self._get_today_iso()
-
         try:
-            self.get_today_tracking()  # Asegurar que existe el registro
-            self.client.table('01_productivity_daily_tracking').update({
-                'breadcrumbs_tomorrow': breadcrumbs_text
-            }).eq('date', today).eq('user_id', self.user_id).execute()
+            self._upsert_today({'breadcrumbs_tomorrow': breadcrumbs_text})
             return True
         except Exception as e:
             print(f"Error guardando breadcrumbs: {e}")
@@ -643,10 +767,9 @@ class SupabaseClient:
         today = self._get_today_iso()
 
         try:
-            response = self.client.table('01_productivity_daily_tracking').select('breadcrumbs_tomorrow')\
+            response = self._execute(self.client.table('01_productivity_daily_tracking').select('breadcrumbs_tomorrow')\
                 .eq('date', today)\
-                .eq('user_id', self.user_id)\
-                .execute()
+                .eq('user_id', self.user_id))
 
             if response.data and len(response.data) > 0:
                 return response.data[0].get('breadcrumbs_tomorrow', '') or ''
@@ -661,10 +784,9 @@ class SupabaseClient:
             today_date = datetime.now(self.timezone).date()
             yesterday = (today_date - timedelta(days=1)).isoformat()
 
-            response = self.client.table('01_productivity_daily_tracking').select('breadcrumbs_tomorrow')\
+            response = self._execute(self.client.table('01_productivity_daily_tracking').select('breadcrumbs_tomorrow')\
                 .eq('date', yesterday)\
-                .eq('user_id', self.user_id)\
-                .execute()
+                .eq('user_id', self.user_id))
 
             if response.data and len(response.data) > 0:
                 return response.data[0].get('breadcrumbs_tomorrow', '') or ''
@@ -0,0 +1,38 @@
+"""
+Componente de countdown del Focus Timer (corre en el navegador)
+"""
+import os
+from datetime import datetime
+from typing import Dict, Optional
+import streamlit.components.v1 as components
+
+
+_COMPONENT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),  # Root del proyecto
+    'components',
+    'focus_timer'
+)
+
+_focus_countdown = components.declare_component('focus_countdown', path=_COMPONENT_PATH)
+
+
+def focus_countdown(timer: Dict) -> Optional[str]:
+    """
+    Mostrar el countdown de un timer corriendo sin reruns del servidor.
+    Devuelve 'completed' cuando el navegador llega a cero (único callback);
+    None mientras sigue corriendo.
+    """
+    # Segundos exactos (sin redondear hacia abajo): el navegador termina siempre
+    # después que el servidor, así el rerun de completado ya ve el timer vencido
+    remaining_seconds = max(0.0, (timer['end_time'] - datetime.now(timer['end_time'].tzinfo)).total_seconds())
+
+    # La key cambia con cada start/resume para montar un countdown nuevo
+    key = f"focus_countdown_{timer['start_time'].timestamp():.0f}_{timer['end_time'].timestamp():.0f}"
+
+    return _focus_countdown(
+        remaining_seconds=remaining_seconds,
+        duration_seconds=timer['duration_minutes'] * 60,
+        task_name=timer['task_name'] or 'Focus Session',
+        key=key,
+        default=None
+    )
@@ -1,11 +1,29 @@
 """
 Gestor de Timers y Pomodoro
 """
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict
 import time
 
 
+def _utc_now() -> datetime:
+    """Instante actual en UTC (aware): comparable con los timestamps guardados en la base"""
+    return datetime.now(timezone.utc)
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Convertir un timestamp ISO de la base (o datetime) a datetime aware en UTC"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
 class TimerManager:
     """Gestor de timers para focus sessions"""
 
@@ -18,21 +36,56 @@ class TimerManager:
             'custom': 0          # Custom time
         }
 
-    def create_timer(self, duration_minutes: int, task_name: str = "") -> Dict:
+    def create_timer(self, duration_minutes: int, task_name: str = "", timer_type: str = "pomodoro") -> Dict:
         """Crear un nuevo timer"""
-        start_time = datetime.now()
+        start_time = _utc_now()
         end_time = start_time + timedelta(minutes=duration_minutes)
 
         return {
             'task_name': task_name,
+            'timer_type': timer_type,
             'duration_minutes': duration_minutes,
             'start_time': start_time,
             'end_time': end_time,
             'status': 'running',
             'paused_at': None,
+            'paused_seconds': 0,
             'elapsed_seconds': 0
         }
 
+    def to_record(self, timer: Dict) -> Dict:
+        """Serializar timer para la tabla de timers activos (timestamps ISO en UTC)"""
+        return {
+            'task_name': timer.get('task_name') or '',
+            'timer_type': timer.get('timer_type') or 'pomodoro',
+            'duration_minutes': timer['duration_minutes'],
+            'start_time': timer['start_time'].isoformat(),
+            'end_time': timer['end_time'].isoformat(),
+            'status': timer['status'],
+            'paused_at': timer['paused_at'].isoformat() if timer.get('paused_at') else None,
+            'paused_seconds': int(timer.get('paused_seconds') or 0)
+        }
+
+    def from_record(self, record: Optional[Dict]) -> Optional[Dict]:
+        """Reconstruir timer desde un registro de la tabla de timers activos"""
+        if not record:
+            return None
+        try:
+            return {
+                'task_name': record.get('task_name') or '',
+                'timer_type': record.get('timer_type') or 'pomodoro',
+                'duration_minutes': record['duration_minutes'],
+                'start_time': _parse_timestamp(record['start_time']),
+                'end_time': _parse_timestamp(record['end_time']),
+                'status': record.get('status') or 'running',
+                'paused_at': _parse_timestamp(record.get('paused_at')),
+                'paused_seconds': record.get('paused_seconds') or 0,
+                'elapsed_seconds': 0
+            }
+        except Exception as e:
+            print(f"Error al reconstruir timer: {e}")
+            return None
+
     def get_remaining_time(self, timer: Dict) -> Dict:
         """Calcular tiempo restante del timer"""
         if timer['status'] == 'completed':
@@ -47,7 +100,7 @@ class TimerManager:
         if timer['status'] == 'paused':
             remaining_seconds = (timer['end_time'] - timer['paused_at']).total_seconds()
         else:
-            now = datetime.now()
+            now = _utc_now()
             remaining_seconds = (timer['end_time'] - now).total_seconds()
 
         # Si ya terminó
@@ -77,16 +130,17 @@ class TimerManager:
         """Pausar timer"""
         if timer['status'] == 'running':
             timer['status'] = 'paused'
-            timer['paused_at'] = datetime.now()
+            timer['paused_at'] = _utc_now()
         return timer
 
     def resume_timer(self, timer: Dict) -> Dict:
         """Reanudar timer pausado"""
         if timer['status'] == 'paused' and timer['paused_at']:
             # Calcular cuánto tiempo estuvo pausado
-            pause_duration = datetime.now() - timer['paused_at']
+            pause_duration = _utc_now() - timer['paused_at']
             # Extender el end_time por ese tiempo
             timer['end_time'] = timer['end_time'] + pause_duration
+            timer['paused_seconds'] = int(timer.get('paused_seconds') or 0) + int(pause_duration.total_seconds())
             timer['status'] = 'running'
             timer['paused_at'] = None
         return timer
@@ -0,0 +1,379 @@
+"""
+Trazas ligeras del hot path: spans de PostgREST, Auth y Anthropic agrupados por script run
+
+Cada span registra tipo, operación, destino (tabla, endpoint o propósito), duración,
+filas, bytes, tokens y error. Se exportan:
+- como JSONL rotativo (TRACE_LOG_PATH, default .cache/traces.jsonl), una línea por span
+- como métricas en texto Prometheus (render_prometheus), servidas en METRICS_PORT si está definido
+
+Uso: tracing.begin_run('Dashboard', user_id) al inicio de cada página y
+`with tracing.span('auth', 'sign_in', 'auth') as s: ...` alrededor de cada llamada externa.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', '1') != '0'
+TRACE_LOG_MAX_BYTES = int(os.getenv('TRACE_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+TRACE_LOG_BACKUPS = int(os.getenv('TRACE_LOG_BACKUPS', '5'))
+RECENT_SPANS = int(os.getenv('TRACE_RECENT_SPANS', '2000'))
+
+# Límites de los buckets del histograma de duración (segundos)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Verbos HTTP de PostgREST -> operación
+POSTGREST_OPS = {'GET': 'select', 'HEAD': 'count', 'POST': 'insert', 'PATCH': 'update', 'DELETE': 'delete'}
+
+TOKEN_FIELDS = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
+
+
+class Span:
+    """Un span en curso; los atributos se completan con set() antes de cerrarse"""
+
+    __slots__ = ('kind', 'op', 'target', 'attrs', 'started', 'parent')
+
+    def __init__(self, kind: str, op: str, target: str, attrs: Dict, parent: Optional['Span'] = None):
+        self.kind = kind
+        self.op = op
+        self.target = target
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        # Span que estaba en curso en el hilo al abrir este (se restaura al cerrarlo)
+        self.parent = parent
+
+    def set(self, **attrs):
+        """Agregar atributos (rows, bytes, status, count, model...)"""
+        self.attrs.update(attrs)
+
+    def set_usage(self, usage):
+        """Tokens de un objeto usage de Anthropic"""
+        if usage is None:
+            return
+        for field in TOKEN_FIELDS:
+            self.attrs[field] = getattr(usage, field, None) or 0
+
+
+class _Metrics:
+    """Agregados en memoria para el endpoint Prometheus"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations: Dict[tuple, List] = {}   # (kind, op, target) -> [buckets..., sum, count]
+        self.counters: Dict[tuple, float] = {}   # (nombre, labels...) -> valor
+
+    def observe(self, record: Dict):
+        key = (record['kind'], record['op'], record['target'])
+        seconds = record['duration_ms'] / 1000
+        with self.lock:
+            hist = self.durations.setdefault(key, [0] * (len(DURATION_BUCKETS) + 2))
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+            if record.get('error'):
+                self._inc(('errors',) + key)
+            for field in ('rows', 'bytes'):
+                if record.get(field):
+                    self._inc((field,) + key, record[field])
+            for field in TOKEN_FIELDS:
+                if record.get(field):
+                    self._inc(('tokens', record['target'], field.replace('_tokens', '')), record[field])
+
+    def count_run(self, page: str):
+        with self.lock:
+            self._inc(('runs', page))
+
+    def _inc(self, key: tuple, value: float = 1):
+        self.counters[key] = self.counters.get(key, 0) + value
+
+
+_metrics = _Metrics()
+_recent: deque = deque(maxlen=RECENT_SPANS)
+_local = threading.local()
+_collectors: Dict[str, Callable[[], Dict]] = {}
+_setup_lock = threading.Lock()
+_logger: Optional[logging.Logger] = None
+_server: Optional[ThreadingHTTPServer] = None
+_server_failed = False
+
+
+def _trace_logger() -> Optional[logging.Logger]:
+    """Logger con RotatingFileHandler (se crea la primera vez; None si no hay ruta)"""
+    global _logger
+    if _logger is not None:
+        return _logger if _logger.handlers else None
+    with _setup_lock:
+        if _logger is None:
+            from modules.clients import LOCAL_CACHE_DIR
+            path = os.getenv('TRACE_LOG_PATH', os.path.join(LOCAL_CACHE_DIR, 'traces.jsonl'))
+            logger = logging.getLogger('productivity.tracing')
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            if path and not logger.handlers:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                    handler = RotatingFileHandler(path, maxBytes=TRACE_LOG_MAX_BYTES,
+                                                  backupCount=TRACE_LOG_BACKUPS, encoding='utf-8')
+                    handler.setFormatter(logging.Formatter('%(message)s'))
+                    logger.addHandler(handler)
+                except OSError as e:
+                    print(f"Error abriendo el log de trazas: {e}")
+            _logger = logger
+    return _logger if _logger.handlers else None
+
+
+# --- Script runs ---
+
+def begin_run(page: str, user_id: Optional[str] = None) -> str:
+    """Iniciar un script run de Streamlit: los spans de este hilo quedan agrupados bajo su run_id"""
+    run = {'run_id': uuid.uuid4().hex[:12], 'page': page, 'user_id': user_id}
+    _local.run = run
+    if TRACING_ENABLED:
+        _metrics.count_run(page)
+        start_metrics_server()
+    return run['run_id']
+
+
+def set_user(user_id: Optional[str]):
+    """Asociar el usuario al run actual (cuando se conoce después de begin_run)"""
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        run['user_id'] = user_id
+
+
+def current_run() -> Optional[Dict]:
+    """Run del hilo actual (None en hilos de fondo sin bind)"""
+    return getattr(_local, 'run', None)
+
+
+def bind(fn: Callable) -> Callable:
+    """Envolver fn para que sus spans queden en el run actual aunque corra en otro hilo"""
+    run = current_run()
+
+    def bound(*args, **kwargs):
+        previous = getattr(_local, 'run', None)
+        _local.run = run
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.run = previous
+    return bound
+
+
+# --- Spans ---
+
+@contextmanager
+def span(kind: str, op: str, target: str = '', **attrs) -> Iterator[Span]:
+    """Medir una llamada externa; el error (si hay) se registra y se vuelve a lanzar"""
+    if not TRACING_ENABLED:
+        yield Span(kind, op, target, attrs)
+        return
+
+    current = Span(kind, op, target, attrs, parent=getattr(_local, 'span', None))
+    _local.span = current
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _local.span = current.parent
+        _finish(current, error)
+
+
+@contextmanager
+def suspended(current: Span) -> Iterator[None]:
+    """
+    Soltar `current` del hilo mientras un generador cede el control dentro del span
+    (`with tracing.suspended(span): yield chunk`). Entre yields el hilo ejecuta otro
+    código, cuyas respuestas HTTP no deben anotarse en el span del generador.
+    """
+    if not TRACING_ENABLED:
+        yield
+        return
+
+    _local.span = current.parent
+    try:
+        yield
+    finally:
+        _local.span = current
+
+
+def _finish(current: Span, error: Optional[str]):
+    """Cerrar el span: agregados, buffer reciente y línea JSONL"""
+    run = current_run() or {}
+    record = {
+        'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'run_id': run.get('run_id'),
+        'page': run.get('page'),
+        'user_id': run.get('user_id'),
+        'thread': threading.current_thread().name,
+        'kind': current.kind,
+        'op': current.op,
+        'target': current.target,
+        'duration_ms': round((time.perf_counter() - current.started) * 1000, 2),
+        **current.attrs
+    }
+    if error:
+        record['error'] = error
+
+    _metrics.observe(record)
+    _recent.append(record)
+    logger = _trace_logger()
+    if logger is not None:
+        logger.info(json.dumps(record, default=str))
+
+
+def execute(query):
+    """Ejecutar un request builder de postgrest dentro de un span (tabla, operación y filas)"""
+    request = getattr(query, 'request', None)
+    method = str(getattr(getattr(request, 'http_method', ''), 'value', getattr(request, 'http_method', ''))).upper()
+    path = str(getattr(getattr(request, 'path', None), 'path', '') or '')
+    target = path.split('/rest/v1/', 1)[-1]
+
+    if target.startswith('rpc/'):
+        op, target = 'rpc', target[len('rpc/'):]
+    else:
+        op = POSTGREST_OPS.get(method, method.lower())
+        prefer = request.headers.get('prefer', '') if request is not None else ''
+        if op == 'insert' and 'resolution=' in prefer:
+            op = 'upsert'
+
+    with span('postgrest', op, target) as current:
+        response = query.execute()
+        data = response.data
+        if isinstance(data, list) and data:
+            current.set(rows=len(data))
+        elif op in ('insert', 'upsert') and request is not None:
+            payload = request.json
+            current.set(rows=len(payload) if isinstance(payload, list) else 1)
+        if getattr(response, 'count', None) is not None:
+            current.set(count=response.count)
+        return response
+
+
+def on_http_response(response):
+    """Hook de httpx: status y tamaño de la respuesta para el span en curso"""
+    current = getattr(_local, 'span', None)
+    if current is None:
+        return
+    current.set(status=response.status_code)
+    length = response.headers.get('content-length')
+    if length and length.isdigit():
+        current.set(bytes=int(length))
+
+
+def recent_spans(run_id: Optional[str] = None) -> List[Dict]:
+    """Últimos spans en memoria (de un run si se indica)"""
+    spans = list(_recent)
+    if run_id is None:
+        return spans
+    return [s for s in spans if s.get('run_id') == run_id]
+
+
+# --- Métricas Prometheus ---
+
+def register_collector(name: str, collector: Callable[[], Dict]):
+    """Exponer stats() numéricos como gauges productivity_<name>_<clave>"""
+    _collectors[name] = collector
+
+
+def _labels(**labels) -> str:
+    """Etiquetas Prometheus con los valores escapados"""
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def render_prometheus() -> str:
+    """Métricas en formato de texto de Prometheus"""
+    with _metrics.lock:
+        durations = {key: list(hist) for key, hist in _metrics.durations.items()}
+        counters = dict(_metrics.counters)
+
+    lines = [
+        '# HELP productivity_span_duration_seconds Duración de llamadas externas',
+        '# TYPE productivity_span_duration_seconds histogram'
+    ]
+    for (kind, op, target), hist in sorted(durations.items()):
+        for i, bound in enumerate(DURATION_BUCKETS):
+            lines.append(f'productivity_span_duration_seconds_bucket'
+                         f'{_labels(kind=kind, op=op, target=target, le=bound)} {hist[i]}')
+        lines.append(f'productivity_span_duration_seconds_bucket{_labels(kind=kind, op=op, target=target, le="+Inf")} {hist[-1]}')
+        lines.append(f'productivity_span_duration_seconds_sum{_labels(kind=kind, op=op, target=target)} {hist[-2]:.6f}')
+        lines.append(f'productivity_span_duration_seconds_count{_labels(kind=kind, op=op, target=target)} {hist[-1]}')
+
+    families = {
+        'errors': ('productivity_span_errors_total', 'Llamadas externas con error', ('kind', 'op', 'target')),
+        'rows': ('productivity_span_rows_total', 'Filas leídas o escritas', ('kind', 'op', 'target')),
+        'bytes': ('productivity_span_bytes_total', 'Bytes de respuesta (Content-Length)', ('kind', 'op', 'target')),
+        'tokens': ('productivity_llm_tokens_total', 'Tokens de Anthropic por propósito', ('purpose', 'type')),
+        'runs': ('productivity_script_runs_total', 'Script runs de Streamlit por página', ('page',))
+    }
+    for family, (metric, help_text, label_names) in families.items():
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+        for key, value in sorted(counters.items()):
+            if key[0] == family:
+                lines.append(f'{metric}{_labels(**dict(zip(label_names, key[1:])))} {value:g}')
+
+    for name, collector in sorted(_collectors.items()):
+        try:
+            stats = collector()
+        except Exception as e:
+            print(f"Error en collector de métricas {name}: {e}")
+            continue
+        for key, value in sorted(stats.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value is not None:
+                metric = f'productivity_{name}_{key}'
+                lines += [f'# TYPE {metric} gauge', f'{metric} {value:g}']
+
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """GET /metrics -> render_prometheus()"""
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Sin log por request (lo consulta el scraper cada pocos segundos)
+
+
+def start_metrics_server() -> Optional[ThreadingHTTPServer]:
+    """Servir /metrics en METRICS_HOST:METRICS_PORT (una vez por proceso; nada si no hay puerto)"""
+    global _server, _server_failed
+    port = os.getenv('METRICS_PORT')
+    if _server is not None or _server_failed or not port:
+        return _server
+    with _setup_lock:
+        if _server is None and not _server_failed:
+            try:
+                _server = ThreadingHTTPServer((os.getenv('METRICS_HOST', '127.0.0.1'), int(port)), _MetricsHandler)
+            except (OSError, ValueError) as e:
+                # Otro proceso ya usa el puerto (p. ej. varios workers): no reintentar en cada run
+                _server_failed = True
+                print(f"Error iniciando el endpoint de métricas en el puerto {port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name='metrics-http', daemon=True).start()
+    return _server
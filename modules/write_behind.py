@@ -0,0 +1,259 @@
+"""
+Escritor en segundo plano (write-behind) para los logs de conversación y focus sessions
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from postgrest.types import ReturnMethod
+from typing import Dict, List, Tuple
+from modules import tracing
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos (un solo proceso de Streamlit)
+    fcntl = None
+
+
+class WriteBehindQueue:
+    """
+    Cola acotada de inserts que escribe un hilo de fondo.
+    Los registros se agrupan por tabla y se insertan en bloque (insert([...]))
+    cada `flush_interval` segundos, al llenar un lote o al cerrar el proceso.
+    Si el backend falla (o la cola está llena) los registros van a un journal
+    JSONL local y se reintentan en el siguiente flush exitoso; con la cola vacía
+    se reintentan cada `journal_retry_interval` segundos (y al arrancar y al cerrar).
+    El journal puede ser compartido por varios procesos: escribirlo y reclamarlo
+    para reintentar se hace con un lock de archivo (fcntl) sobre `<journal>.lock`.
+    """
+
+    def __init__(self, client, max_size: int = 1000, batch_size: int = 50,
+                 flush_interval: float = 2.0, journal_path: str = None,
+                 journal_retry_interval: float = 30.0):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.journal_path = journal_path
+        self.journal_retry_interval = journal_retry_interval
+        # Próximo reintento del journal sin registros nuevos (0: en el primer flush tras arrancar)
+        self._journal_retry_at = 0.0
+
+        self._queue: "queue.Queue[Tuple[str, Dict]]" = queue.Queue(maxsize=max_size)
+        # Serializa los flush del hilo de fondo con los flush explícitos y el journal
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # Contadores expuestos en stats(): se actualizan desde el hilo de fondo y desde quien encola
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.spilled = 0
+        self.max_depth = 0
+
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, table: str, record: Dict):
+        """Encolar un insert sin bloquear; si la cola está llena va directo al journal"""
+        try:
+            self._queue.put_nowait((table, record))
+            with self._stats_lock:
+                self.enqueued += 1
+                self.max_depth = max(self.max_depth, self._queue.qsize())
+        except queue.Full:
+            with self._flush_lock:
+                self._spill([(table, record)])
+
+    def _run(self):
+        """Bucle del hilo: vaciar la cola por intervalo o cuando se junta un lote"""
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            while self._queue.qsize() < self.batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._stop.wait(min(remaining, 0.1))
+            self.flush()
+
+    def _drain(self) -> List[Tuple[str, Dict]]:
+        """Sacar todo lo que haya en la cola"""
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def flush(self, replay: bool = False):
+        """
+        Escribir lo encolado (y el journal pendiente) en inserts por tabla.
+        Con la cola vacía el journal se reintenta igual (registros de antes de un reinicio
+        o de una caída) cada journal_retry_interval, o siempre con replay=True.
+        """
+        with self._flush_lock:
+            items = self._drain()
+            if items:
+                # El backend acaba de responder bien: buen momento para vaciar el journal
+                if self._write(items):
+                    self._replay_journal()
+            elif replay or time.monotonic() >= self._journal_retry_at:
+                self._replay_journal()
+
+    def _write(self, items: List[Tuple[str, Dict]]) -> bool:
+        """Insertar en bloque por tabla; lo que falle se guarda en el journal"""
+        by_table: Dict[str, List[Dict]] = defaultdict(list)
+        for table, record in items:
+            by_table[table].append(record)
+
+        ok = True
+        for table, records in by_table.items():
+            for start in range(0, len(records), self.batch_size):
+                batch = records[start:start + self.batch_size]
+                try:
+                    tracing.execute(self.client.table(table).insert(batch, returning=ReturnMethod.minimal))
+                    with self._stats_lock:
+                        self.written += len(batch)
+                        self.batches += 1
+                except Exception as e:
+                    print(f"Error en escritura diferida ({table}): {e}")
+                    with self._stats_lock:
+                        self.failed_batches += 1
+                    self._spill([(table, record) for record in batch])
+                    ok = False
+        return ok
+
+    def _spill(self, items: List[Tuple[str, Dict]]):
+        """Guardar registros en el journal local (llamar con _flush_lock tomado)"""
+        if not self.journal_path:
+            print(f"Escritura diferida sin journal: se descartan {len(items)} registros")
+            return
+        try:
+            lines = "".join(json.dumps({'table': table, 'record': record}, default=str) + "\n"
+                            for table, record in items)
+            with self._journal_lock():
+                # Si un proceso murió a mitad de una línea, empezar en una nueva: la línea
+                # cortada queda sola (se aparta al reintentar) y no arrastra a las siguientes
+                if not self._journal_ends_with_newline():
+                    lines = "\n" + lines
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+            with self._stats_lock:
+                self.spilled += len(items)
+        except Exception as e:
+            print(f"Error al escribir journal: {e}")
+
+    def _replay_journal(self):
+        """Reintentar los registros del journal (llamar con _flush_lock tomado)"""
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return
+        try:
+            # Leer y eliminar bajo el lock: otro proceso no puede agregar líneas que se pierdan
+            # ni reclamar las mismas entradas. Lo que vuelva a fallar se re-escribe.
+            with self._journal_lock():
+                if not os.path.exists(self.journal_path):
+                    return
+                # errors='replace': un carácter multibyte cortado no impide leer las demás líneas
+                with open(self.journal_path, 'r', encoding='utf-8', errors='replace') as f:
+                    lines = [line for line in f if line.strip()]
+                entries, bad = self._parse_journal(lines)
+                # Las líneas ilegibles (p. ej. cortadas por un proceso muerto a mitad de escritura)
+                # se apartan en `<journal>.bad` para no trabar el resto del journal
+                if bad:
+                    with open(self.journal_path + '.bad', 'a', encoding='utf-8') as f:
+                        f.write("".join(line if line.endswith("\n") else line + "\n" for line in bad))
+                    print(f"Journal: {len(bad)} líneas ilegibles movidas a {self.journal_path}.bad")
+                os.remove(self.journal_path)
+        except Exception as e:
+            print(f"Error al leer journal: {e}")
+            return
+
+        if entries and not self._write([(entry['table'], entry['record']) for entry in entries]):
+            # Backend todavía caído: no reintentar en cada tick
+            self._journal_retry_at = time.monotonic() + self.journal_retry_interval
+
+    def _journal_ends_with_newline(self) -> bool:
+        """True si el journal no existe, está vacío o su última línea está completa"""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return True
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) == b"\n"
+        except FileNotFoundError:
+            return True
+
+    @staticmethod
+    def _parse_journal(lines: List[str]) -> Tuple[List[Dict], List[str]]:
+        """Separar las entradas válidas ({table, record}) de las líneas ilegibles"""
+        entries, bad = [], []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                if not isinstance(entry, dict) or 'table' not in entry or 'record' not in entry:
+                    raise ValueError("entrada sin table/record")
+                entries.append(entry)
+            except ValueError:
+                bad.append(line)
+        return entries, bad
+
+    def _journal_pending(self) -> int:
+        """Registros pendientes en el journal"""
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return 0
+        try:
+            with self._journal_lock(shared=True):
+                with open(self.journal_path, 'r', encoding='utf-8') as f:
+                    return sum(1 for line in f if line.strip())
+        except Exception:
+            return 0
+
+    @contextmanager
+    def _journal_lock(self, shared: bool = False):
+        """
+        Lock entre procesos sobre el journal (archivo `<journal>.lock` aparte, porque
+        el journal se elimina al reclamarlo). No es reentrante: no anidar.
+        """
+        os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.journal_path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def close(self, timeout: float = 5.0):
+        """Detener el hilo y hacer el último flush (registrado en atexit)"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self.flush(replay=True)
+
+    def stats(self) -> Dict:
+        """Profundidad de la cola y contadores de escritura"""
+        with self._stats_lock:
+            counters = {
+                'max_depth': self.max_depth,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'batches': self.batches,
+                'failed_batches': self.failed_batches,
+                'spilled': self.spilled
+            }
+        return {
+            'queue_depth': self._queue.qsize(),
+            'capacity': self._queue.maxsize,
+            **counters,
+            'journal_pending': self._journal_pending()
+        }
@@ -2,6 +2,7 @@
 Página de Login y Registro
 """
 import streamlit as st
+from modules import tracing
 from modules.auth import AuthManager, check_authentication, logout
 import os
 from dotenv import load_dotenv
@@ -14,6 +15,9 @@ st.set_page_config(
     layout="centered"
 )
 
+# Trazas de este script run (ver modules/tracing.py)
+tracing.begin_run('Login', (st.session_state.get('user') or {}).get('id'))
+
 # Inicializar AuthManager
 if 'auth' not in st.session_state:
     st.session_state.auth = AuthManager(
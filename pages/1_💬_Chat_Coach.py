@@ -2,6 +2,7 @@
 Página de Chat con el Productivity Coach
 """
 import streamlit as st
+from modules import tracing
 from datetime import datetime
 from modules.auth import check_authentication, require_authentication
 
@@ -12,6 +13,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Trazas de este script run (ver modules/tracing.py)
+tracing.begin_run('Chat Coach', (st.session_state.get('user') or {}).get('id'))
+
 # Verificar autenticación
 require_authentication()
 
@@ -20,7 +24,7 @@ if 'agent' not in st.session_state:
     st.error("⚠️ Error: Vuelve a la página principal primero")
     st.stop()
 
-# Obtener contexto
+# Obtener contexto (lee el snapshot del día compartido)
 context = st.session_state.agent._get_current_context()
 
 from modules.ui_components import render_sidebar
@@ -120,9 +124,12 @@ if user_input:
         'timestamp': datetime.now().strftime('%H:%M')
     })
 
-    # Generar respuesta del agente
-    with st.spinner("Pensando..."):
-        response = st.session_state.agent.chat(user_input)
+    # Generar respuesta del agente (streaming token a token)
+    with chat_container:
+        with st.chat_message("user"):
+            st.write(user_input)
+        with st.chat_message("assistant", avatar="🎯"):
+            response = st.write_stream(st.session_state.agent.chat_stream(user_input))
 
     # Agregar respuesta del agente
     st.session_state.chat_history.append({
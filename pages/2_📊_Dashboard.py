@@ -2,7 +2,8 @@
 Dashboard de Métricas de Productividad
 """
 import streamlit as st
-from modules.dashboard_builder import DashboardBuilder
+from modules import tracing
+from modules.dashboard_builder import DashboardBuilder, HISTORY_WINDOWS, HEATMAP_DAYS
 from modules.auth import check_authentication, require_authentication
 
 st.set_page_config(
@@ -12,6 +13,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Trazas de este script run (ver modules/tracing.py)
+tracing.begin_run('Dashboard', (st.session_state.get('user') or {}).get('id'))
+
 # Verificar autenticación
 require_authentication()
 
@@ -19,13 +23,9 @@ require_authentication()
 if 'db' not in st.session_state:
     # Intentar recuperar si hay auth
     if 'auth' in st.session_state and st.session_state.user:
-        from modules.supabase_client import SupabaseClient
+        from modules.storage_backend import create_storage_backend
         import os
-        st.session_state.db = SupabaseClient(
-            os.getenv('SUPABASE_URL'), 
-            os.getenv('SUPABASE_KEY'),
-            st.session_state.user['id']
-        )
+        st.session_state.db = create_storage_backend(st.session_state.user['id'])
         # Inicializar timezone también aquí
         try:
             settings = st.session_state.db.get_user_settings()
@@ -39,11 +39,14 @@ if 'db' not in st.session_state:
             st.switch_page("app.py")
         st.stop()
 
+# Snapshot del día (compartido con el resto de páginas)
+snapshot = st.session_state.db.get_day_snapshot()
+
 # Inicializar dashboard builder
 if 'dashboard' not in st.session_state:
     # Obtener nombres de identidad personalizados
     try:
-        settings = st.session_state.db.get_user_settings()
+        settings = snapshot.settings
         id1 = settings.get('identity_1_name', 'Empresario')
         id2 = settings.get('identity_2_name', 'Profesional')
     except:
@@ -61,13 +64,22 @@ render_sidebar()
 st.title("📊 Dashboard de Consistencia")
 st.caption("Visualización de tus hábitos y progreso en ambas identidades")
 
-# Obtener estadísticas
-stats = dashboard.get_weekly_summary_stats()
+# Cargar de una vez la ventana más amplia del render (stats, gráficos y heatmap salen del mismo frame)
+dashboard.get_last_n_days_data(max(HEATMAP_DAYS, st.session_state.get('dashboard_window_days', 7)))
+
 # Obtener estadísticas
 stats = dashboard.get_weekly_summary_stats()
 
 # Obtener hábitos dinámicos (Fase 3)
-habits = st.session_state.db.get_habits()
+habits = list(snapshot.habits)
+
+# Rachas y consistencia recalculadas desde los logs (bitsets del último año), en la ventana elegida abajo
+habit_summary = dashboard.get_habit_summary(st.session_state.get('dashboard_window_days', 7)) if habits else {}
+
+
+def current_streak(habit) -> int:
+    """Racha actual según los logs (streak_count guardado no vuelve a 0 al saltarse días)"""
+    return habit_summary.get(habit['id'], {}).get('current_streak', habit['streak_count'])
 
 # Métricas principales
 st.header("📈 Resumen Semanal")
@@ -77,22 +89,22 @@ cols = st.columns(len(habits) + 3) # Prioridades (AM), Prioridades (PM), Morning
 with cols[0]:
     st.metric(
         "Prioridades (AM)",
-        f"{stats['total_daily_3']}/15",
-        delta=f"{(stats['total_daily_3']/15*100):.0f}%" if stats['total_daily_3'] > 0 else None
+        f"{stats['total_daily_3']}/{stats['daily_3_target']}",
+        delta=f"{stats['daily_3_rate']:.0f}%" if stats['total_daily_3'] > 0 else None
     )
 
 with cols[1]:
     st.metric(
         "Prioridades (PM)",
-        f"{stats['total_priorities']}/15",
-        delta=f"{(stats['total_priorities']/15*100):.0f}%" if stats['total_priorities'] > 0 else None
+        f"{stats['total_priorities']}/{stats['priorities_target']}",
+        delta=f"{stats['priorities_rate']:.0f}%" if stats['total_priorities'] > 0 else None
     )
 
 with cols[2]:
     st.metric(
         "Morning Mastery",
-        f"{stats['morning_mastery_days']}/5",
-        delta=f"{(stats['morning_mastery_days']/5*100):.0f}%" if stats['morning_mastery_days'] > 0 else None
+        f"{stats['morning_mastery_days']}/{stats['morning_mastery_target']}",
+        delta=f"{stats['morning_mastery_rate']:.0f}%" if stats['morning_mastery_days'] > 0 else None
     )
 
 # Métricas para cada hábito dinámico
@@ -101,12 +113,21 @@ for i, habit in enumerate(habits):
         with cols[i + 3]:
             st.metric(
                 habit['name'],
-                f"{habit['streak_count']} 🔥",
+                f"{current_streak(habit)} 🔥",
                 delta="Racha"
             )
 
 st.divider()
 
+# Ventana de historial para los gráficos (el historial se sincroniza incrementalmente)
+window_days = st.radio(
+    "Periodo de los gráficos",
+    list(HISTORY_WINDOWS),
+    format_func=lambda d: HISTORY_WINDOWS[d],
+    horizontal=True,
+    key="dashboard_window_days"
+)
+
 # Gráficos
 col1, col2 = st.columns(2)
 
@@ -115,13 +136,18 @@ with col1:
     
     if habits:
         for habit in habits:
-            streak = habit['streak_count']
-            # Dummy target for visual gauge (e.g. 30 days or next milestone)
+            summary = habit_summary.get(habit['id'], {})
+            streak = current_streak(habit)
+            # Meta visual: 30 días o el siguiente hito
             target = 30 if streak < 30 else streak + 10
-            
+
             st.write(f"**{habit['name']}**")
             progress = min(streak / target, 1.0)
             st.progress(progress, text=f"Racha actual: {streak} días (Meta: {target})")
+            st.caption(
+                f"Mejor racha: {summary.get('longest_streak', 0)} días · "
+                f"Consistencia ({HISTORY_WINDOWS[window_days].lower()}): {summary.get('consistency', 0):.0f}%"
+            )
     else:
         st.info("No hay hábitos configurados aún.")
 
@@ -130,12 +156,12 @@ with col1:
 
     with col2:
         st.subheader("⚖️ Balance entre Identidades")
-        balance_chart = dashboard.create_identity_balance_chart()
+        balance_chart = dashboard.create_identity_balance_chart(window_days)
         st.plotly_chart(balance_chart, use_container_width=True, key="balance_chart")
 
         # Análisis de balance (Mantenido igual)
         if stats['total_daily_3'] > 0 or stats['total_priorities'] > 0:
-            ratio = stats['total_daily_3'] / max(stats['total_priorities'], 1)
+            ratio = stats['identity_balance']
             if ratio > 1.2:
                 st.warning("⚠️ Más enfoque en Identidad #1 (Empresario). Balancea tus prioridades de tarde.")
             elif ratio < 0.8:
@@ -146,16 +172,22 @@ with col1:
     st.divider()
 
     # Gráfico de consistencia semanal
-    st.subheader("📅 Consistencia Semanal (Ejecución)")
-    consistency_chart = dashboard.create_weekly_consistency_chart()
+    st.subheader("📅 Consistencia (Ejecución)")
+    consistency_chart = dashboard.create_weekly_consistency_chart(window_days)
     st.plotly_chart(consistency_chart, use_container_width=True, key="consistency_chart")
 
-    st.divider()
-
-    # Mapa de calor (Deshabilitado por solicitud del usuario)
-    # st.subheader("🔥 Mapa de Calor - Completitud Diaria")
-    # heatmap = dashboard.create_habit_completion_heatmap()
-    # st.plotly_chart(heatmap, use_container_width=True, key="heatmap_chart")
+# Mapa de calor del último año (todas las variantes salen de la misma matriz día x métrica)
+st.divider()
+st.subheader("🔥 Mapa de Calor - Último año")
+heatmap_variants = dashboard.get_heatmap_variants()
+heatmap_variant = st.selectbox(
+    "Ver",
+    list(heatmap_variants),
+    format_func=lambda v: heatmap_variants[v],
+    key="dashboard_heatmap_variant"
+)
+heatmap = dashboard.create_habit_completion_heatmap(heatmap_variant)
+st.plotly_chart(heatmap, use_container_width=True, key="heatmap_chart")
 
 # Insights y recomendaciones
 st.divider()
@@ -165,22 +197,25 @@ insights = []
 
 # Insights Dinámicos de Hábitos
 for habit in habits:
-    if habit['streak_count'] > 7:
-        insights.append(f"🔥 **{habit['name']}:** ¡Excelente racha de {habit['streak_count']} días! Mantén el ritmo.")
-    elif habit['streak_count'] == 0:
+    summary = habit_summary.get(habit['id'], {})
+    if summary.get('missed_twice') and summary.get('longest_streak'):
+        insights.append(f"⚠️ **{habit['name']}:** Fallaste dos días seguidos. Never miss twice: hazlo hoy aunque sea en versión mínima.")
+    elif current_streak(habit) > 7:
+        insights.append(f"🔥 **{habit['name']}:** ¡Excelente racha de {current_streak(habit)} días! Mantén el ritmo.")
+    elif current_streak(habit) == 0:
         insights.append(f"🎯 **{habit['name']}:** No rompas la cadena dos veces. Hoy es un buen día para retomar.")
 
 # Insight sobre Prioridades AM
-daily_3_rate = (stats['total_daily_3'] / 21) * 100 if stats['total_daily_3'] > 0 else 0
+daily_3_rate = stats['daily_3_rate']
 if daily_3_rate < 60:
     insights.append("🎯 **Prioridades AM:** Tu tasa de completitud es baja. Enfócate en tareas más pequeñas y alcanzables")
 elif daily_3_rate >= 80:
     insights.append("✅ **Prioridades AM:** Excelente consistencia en tus tareas matutinas")
 
 # Insight sobre Morning Mastery
-if stats['morning_mastery_days'] < 3:
+if stats['morning_mastery_rate'] < 60:
     insights.append("🌅 **Morning Mastery:** El ritual matutino establece el tono del día. Intenta hacerlo más seguido")
-elif stats['morning_mastery_days'] >= 5:
+elif stats['morning_mastery_days'] >= stats['morning_mastery_target']:
     insights.append("✅ **Morning Mastery:** Excelente disciplina matutina")
 
 if insights:
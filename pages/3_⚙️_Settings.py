@@ -2,6 +2,7 @@
 Página de Configuración
 """
 import streamlit as st
+from modules import tracing
 import time
 import pytz
 import os
@@ -15,6 +16,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Trazas de este script run (ver modules/tracing.py)
+tracing.begin_run('Settings', (st.session_state.get('user') or {}).get('id'))
+
 load_dotenv()
 
 # Verificar autenticación
@@ -25,6 +29,9 @@ from modules.ui_components import render_sidebar
 # Initialize sidebar
 render_sidebar()
 
+# Snapshot del día (settings, hábitos, tracking), compartido con el resto de páginas
+snapshot = st.session_state.db.get_day_snapshot() if 'db' in st.session_state else None
+
 st.title("⚙️ Configuración")
 
 # Gestión de Identidades (Nueva Sección)
@@ -34,7 +41,7 @@ st.caption("Define el nombre de tus identidades duales para que se ajusten a tus
 # Cargar settings actuales
 if 'db' in st.session_state:
     if 'user_settings' not in st.session_state:
-        st.session_state.user_settings = st.session_state.db.get_user_settings()
+        st.session_state.user_settings = dict(snapshot.settings)
     
     current_settings = st.session_state.user_settings
     
@@ -154,7 +161,7 @@ st.caption("Personaliza los pasos de tu ritual matutino.")
 
 if 'db' in st.session_state:
     # Cargar texto actual
-    current_mm_text = st.session_state.agent.get_morning_mastery_text()
+    current_mm_text = snapshot.morning_mastery_text
     
     with st.form("mm_editor"):
         new_mm_text = st.text_area(
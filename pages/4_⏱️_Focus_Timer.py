@@ -1,12 +1,13 @@
 """
-Página de Focus Timer con Pomodoro - Actualización en tiempo real
+Página de Focus Timer con Pomodoro - Countdown en el navegador
 """
 import streamlit as st
+from modules import tracing
 import streamlit.components.v1 as components
-from streamlit_autorefresh import st_autorefresh
 from modules.timer_manager import TimerManager
+from modules.timer_component import focus_countdown
 from modules.auth import check_authentication, require_authentication
-from datetime import datetime
+from datetime import datetime, timezone as dt_timezone
 import time
 import os
 
@@ -17,19 +18,75 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Trazas de este script run (ver modules/tracing.py)
+tracing.begin_run('Focus Timer', (st.session_state.get('user') or {}).get('id'))
+
 # Verificar autenticación
 require_authentication()
 
+# Recuperar el cliente de datos si se entró directo a esta página (p. ej. tras refrescar)
+if 'db' not in st.session_state and 'auth' in st.session_state and st.session_state.user:
+    from modules.storage_backend import create_storage_backend
+    st.session_state.db = create_storage_backend(st.session_state.user['id'])
+    try:
+        settings = st.session_state.db.get_day_snapshot().settings
+        st.session_state.db.set_timezone(settings.get('timezone', os.getenv('TIMEZONE', 'America/Caracas')))
+    except:
+        pass
+
+db = st.session_state.get('db')
+
 # Inicializar timer manager
 if 'timer_manager' not in st.session_state:
     st.session_state.timer_manager = TimerManager()
 
-# Inicializar estado del timer
-if 'active_timer' not in st.session_state:
+timer_manager = st.session_state.timer_manager
+
+
+def save_timer(timer):
+    """Guardar el timer en sesión y persistirlo (sobrevive refrescos y reinicios del worker)"""
+    st.session_state.active_timer = timer
+    if db:
+        db.save_active_timer(timer_manager.to_record(timer))
+
+
+def clear_timer():
+    """Quitar el timer de la sesión y de la tabla de timers activos"""
     st.session_state.active_timer = None
+    st.session_state.notification_shown = False
+    if db:
+        db.clear_active_timer()
+
+
+def load_completed_sessions():
+    """Sesiones completadas hoy desde la base (una sola lectura por sesión del navegador)"""
+    if not db:
+        return []
+    sessions = []
+    # get_focus_sessions_today viene en orden descendente; el historial se guarda ascendente
+    for row in reversed(db.get_focus_sessions_today()):
+        try:
+            # La base devuelve UTC ('Z' o +00:00): se muestra la hora local del usuario
+            completed = datetime.fromisoformat(str(row['completed_at']).replace('Z', '+00:00'))
+            if completed.tzinfo is None:
+                completed = completed.replace(tzinfo=dt_timezone.utc)
+            completed_at = completed.astimezone(db.timezone).strftime('%H:%M')
+        except Exception:
+            completed_at = ''
+        sessions.append({
+            'task': row.get('task_name'),
+            'duration': row.get('duration_minutes') or 0,
+            'completed_at': completed_at
+        })
+    return sessions
+
+
+# Inicializar estado del timer: se rehidrata una vez por sesión, no en cada rerun
+if 'active_timer' not in st.session_state:
+    st.session_state.active_timer = timer_manager.from_record(db.get_active_timer()) if db else None
 
 if 'completed_sessions' not in st.session_state:
-    st.session_state.completed_sessions = []
+    st.session_state.completed_sessions = load_completed_sessions()
 
 if 'timer_finished' not in st.session_state:
     st.session_state.timer_finished = False
@@ -37,12 +94,6 @@ if 'timer_finished' not in st.session_state:
 if 'notification_shown' not in st.session_state:
     st.session_state.notification_shown = False
 
-timer_manager = st.session_state.timer_manager
-
-# Auto-refresh cada segundo SOLO si hay timer activo corriendo
-if st.session_state.active_timer and st.session_state.active_timer['status'] == 'running':
-    st_autorefresh(interval=1000, limit=None, key="timer_refresh")
-
 from modules.ui_components import render_sidebar
 
 # Header
@@ -162,74 +213,33 @@ if st.session_state.active_timer and st.session_state.active_timer['status'] !=
                 completed_session = {
                     'task': st.session_state.active_timer['task_name'],
                     'duration': st.session_state.active_timer['duration_minutes'],
-                    'completed_at': datetime.now().strftime('%H:%M')
+                    'completed_at': datetime.now(db.timezone if db else None).strftime('%H:%M')
                 }
                 st.session_state.completed_sessions.append(completed_session)
 
                 # Guardar en Supabase si está disponible
-                if 'db' in st.session_state:
+                if db:
                     try:
-                        st.session_state.db.log_focus_session(
+                        db.log_focus_session(
                             task_name=st.session_state.active_timer['task_name'] or 'Focus Session',
-                            timer_type='pomodoro',
+                            timer_type=st.session_state.active_timer.get('timer_type', 'pomodoro'),
                             duration_minutes=st.session_state.active_timer['duration_minutes']
                         )
                     except Exception as e:
                         pass  # Silently fail if DB not available
 
-                st.session_state.active_timer = None
-                st.session_state.notification_shown = False
+                clear_timer()
                 st.rerun()
 
         with col2:
             if st.button("🔄 Iniciar Otro", use_container_width=True):
-                st.session_state.active_timer = None
-                st.session_state.notification_shown = False
+                clear_timer()
                 st.rerun()
 
     elif st.session_state.active_timer['status'] == 'running':
-        # Timer corriendo - mostrar countdown
-        display_time = timer_manager.get_timer_display(st.session_state.active_timer)
-
-        # Calcular color basado en tiempo restante
-        percentage = remaining['percentage']
-        if percentage < 50:
-            color = "#00D4AA"  # Verde
-        elif percentage < 80:
-            color = "#FFD93D"  # Amarillo
-        else:
-            color = "#FF6B6B"  # Rojo
-
-        # Display principal del timer
-        st.markdown(f"""
-        <div style='text-align: center; padding: 30px;'>
-            <div style='
-                font-size: 100px;
-                font-weight: bold;
-                color: {color};
-                font-family: "Courier New", monospace;
-                text-shadow: 0 0 20px {color}40;
-                margin: 20px 0;
-            '>
-                {display_time}
-            </div>
-            <p style='font-size: 24px; color: #888; margin: 10px 0;'>
-                {st.session_state.active_timer['task_name'] or 'Focus Session'}
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Barra de progreso
-        st.progress(remaining['percentage'] / 100)
-
-        # Info del tiempo
-        col_info1, col_info2, col_info3 = st.columns(3)
-        with col_info1:
-            st.metric("Tiempo Restante", f"{remaining['minutes']}:{remaining['seconds']:02d}")
-        with col_info2:
-            st.metric("Progreso", f"{remaining['percentage']:.0f}%")
-        with col_info3:
-            st.metric("Duración Total", f"{st.session_state.active_timer['duration_minutes']} min")
+        # Timer corriendo - el countdown corre en el navegador y solo
+        # provoca un rerun al llegar a cero (pausa/detener son botones normales)
+        focus_countdown(st.session_state.active_timer)
 
         st.divider()
 
@@ -237,12 +247,11 @@ if st.session_state.active_timer and st.session_state.active_timer['status'] !=
         col1, col2 = st.columns(2)
         with col1:
             if st.button("⏸️ Pausar", use_container_width=True, type="secondary"):
-                st.session_state.active_timer = timer_manager.pause_timer(st.session_state.active_timer)
+                save_timer(timer_manager.pause_timer(st.session_state.active_timer))
                 st.rerun()
         with col2:
             if st.button("⏹️ Detener", use_container_width=True, type="secondary"):
-                st.session_state.active_timer = None
-                st.session_state.notification_shown = False
+                clear_timer()
                 st.rerun()
 
     elif st.session_state.active_timer['status'] == 'paused':
@@ -271,11 +280,11 @@ if st.session_state.active_timer and st.session_state.active_timer['status'] !=
         col1, col2 = st.columns(2)
         with col1:
             if st.button("▶️ Reanudar", use_container_width=True, type="primary"):
-                st.session_state.active_timer = timer_manager.resume_timer(st.session_state.active_timer)
+                save_timer(timer_manager.resume_timer(st.session_state.active_timer))
                 st.rerun()
         with col2:
             if st.button("⏹️ Detener", use_container_width=True, type="secondary"):
-                st.session_state.active_timer = None
+                clear_timer()
                 st.rerun()
 
 else:
@@ -316,10 +325,11 @@ else:
         st.info(f"⏱️ Duración seleccionada: **{duration} minutos**")
 
     if st.button("🚀 Iniciar Timer", use_container_width=True, type="primary"):
-        st.session_state.active_timer = timer_manager.create_timer(
+        save_timer(timer_manager.create_timer(
             duration_minutes=duration,
-            task_name=task_name
-        )
+            task_name=task_name,
+            timer_type=timer_type
+        ))
         st.session_state.notification_shown = False
         st.rerun()
 
@@ -412,7 +422,7 @@ if st.session_state.completed_sessions:
 st.divider()
 
 # Integración con tracking
-if 'db' in st.session_state and st.session_state.completed_sessions:
+if db and st.session_state.completed_sessions:
     st.header("📊 Guardar en Tracking")
 
     col1, col2 = st.columns(2)
@@ -2,6 +2,7 @@
 Página de Referencias - Fundamentos Teóricos
 """
 import streamlit as st
+from modules import tracing
 from modules.auth import check_authentication, require_authentication
 
 st.set_page_config(
@@ -11,6 +12,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Trazas de este script run (ver modules/tracing.py)
+tracing.begin_run('Referencias', (st.session_state.get('user') or {}).get('id'))
+
 # Verificar autenticación
 require_authentication()
 
@@ -0,0 +1,72 @@
+"""
+Fixtures compartidas de la suite (python -m pytest desde la raíz del repo)
+
+El entorno se aísla antes de importar modules/: caches y journal en un directorio
+temporal, sin archivo de trazas y con backends falsos (tools/fake_backends.py).
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORK_DIR = tempfile.mkdtemp(prefix='productivity_tests_')
+os.environ.update({
+    'LOCAL_CACHE_DIR': WORK_DIR,
+    'HISTORY_CACHE_PATH': os.path.join(WORK_DIR, 'history.db'),
+    'WRITE_BEHIND_JOURNAL': os.path.join(WORK_DIR, 'write_behind_journal.jsonl'),
+    'TRACE_LOG_PATH': ''
+})
+
+import pytest
+
+USER_ID = '00000000-0000-0000-0000-000000000001'
+TIMEZONE = 'America/Caracas'
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """SQLiteClient sobre un archivo nuevo por test"""
+    from modules.sqlite_client import SQLiteClient
+    return SQLiteClient(str(tmp_path / 'productivity.db'), USER_ID, TIMEZONE)
+
+
+# --- Supabase sobre FakePostgrest ---
+
+FAKE_KEY = 'fake-anon-key'
+FAKE_API_KEY = 'fake-anthropic-key'
+_fake_urls = itertools.count(1)
+
+
+@pytest.fixture
+def fakes():
+    """
+    FakePostgrest y FakeAnthropic registrados en modules.clients bajo una URL propia
+    del test (el registro es por proceso: así cada test tiene su cola de escritura diferida)
+    """
+    from modules import clients
+    from tools.fake_backends import install_fakes
+
+    url = f'http://fake-postgrest-{next(_fake_urls)}.local'
+    installed = install_fakes(url, FAKE_KEY, FAKE_API_KEY)
+    installed.url = url
+    yield installed
+
+    with clients._registry_lock:
+        writer = clients._registry.pop(('write_behind', url, FAKE_KEY), None)
+        clients._registry.pop(('supabase', url, FAKE_KEY), None)
+    if writer is not None:
+        writer.close()
+
+
+@pytest.fixture
+def supabase_db(fakes, tmp_path):
+    """SupabaseClient contra FakePostgrest, con un cache de historial propio del test"""
+    from modules.history_cache import HistoryCache
+    from modules.supabase_client import SupabaseClient
+
+    db = SupabaseClient(fakes.url, FAKE_KEY, USER_ID, TIMEZONE)
+    db.history = HistoryCache(str(tmp_path / 'history.db'))
+    return db
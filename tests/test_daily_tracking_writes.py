@@ -0,0 +1,102 @@
+"""
+Cada escritura del registro de hoy es un solo upsert por (user_id, date), exista o no la fila;
+leer el día en SQLite solo escribe si la fila falta
+"""
+import pytest
+
+from conftest import USER_ID
+
+TRACKING = '01_productivity_daily_tracking'
+
+WRITES = {
+    'update_daily_3': lambda db: db.update_daily_3([{'text': 'Propuesta', 'done': True}]),
+    'update_priorities': lambda db: db.update_priorities([{'text': 'Informe', 'done': False}]),
+    'mark_morning_mastery_done': lambda db: db.mark_morning_mastery_done(),
+    'save_task_feedback': lambda db: db.save_task_feedback(['Empieza por el índice'], 'morning'),
+    'save_breadcrumbs': lambda db: db.save_breadcrumbs('Retomar el informe'),
+}
+
+
+def calls_since(fakes, mark):
+    return [(op, table) for _, op, table in fakes.postgrest.calls[mark:]]
+
+
+@pytest.mark.parametrize('existing_row', [False, True], ids=['sin-fila', 'con-fila'])
+@pytest.mark.parametrize('write', list(WRITES))
+def test_write_is_one_upsert(fakes, supabase_db, write, existing_row):
+    if existing_row:
+        fakes.postgrest.tables[TRACKING].append({
+            'id': 1, 'user_id': USER_ID, 'date': supabase_db._get_today_iso(),
+            'identity_1_daily_3_completed': 0, 'morning_mastery_done': False
+        })
+
+    mark = len(fakes.postgrest.calls)
+    WRITES[write](supabase_db)
+
+    assert calls_since(fakes, mark) == [('upsert', TRACKING)]
+    assert len(fakes.postgrest.tables[TRACKING]) == 1
+
+
+def test_writes_merge_into_todays_row(fakes, supabase_db):
+    """Upserts parciales sucesivos conservan las columnas escritas antes"""
+    mark = len(fakes.postgrest.calls)
+    for write in WRITES.values():
+        write(supabase_db)
+
+    assert calls_since(fakes, mark) == [('upsert', TRACKING)] * len(WRITES)
+    [row] = fakes.postgrest.tables[TRACKING]
+    assert row['user_id'] == USER_ID
+    assert row['date'] == supabase_db._get_today_iso()
+    assert row['identity_1_daily_3_completed'] == 1
+    assert row['identity_2_priorities_list'] == ['Informe']
+    assert row['morning_mastery_done'] is True
+    assert row['identity_1_feedback'] == ['Empieza por el índice']
+    assert row['breadcrumbs_tomorrow'] == 'Retomar el informe'
+
+
+def test_write_updates_snapshot_without_reload(fakes, supabase_db):
+    """Tras un upsert confirmado el snapshot se reutiliza con lo escrito: 0 consultas extra"""
+    before = supabase_db.get_day_snapshot()
+    tasks = [{'text': 'Propuesta', 'done': True}]
+    supabase_db.update_daily_3(tasks)
+    tasks[0]['done'] = False  # el llamador sigue usando su lista
+
+    mark = len(fakes.postgrest.calls)
+    after = supabase_db.get_day_snapshot()
+    assert calls_since(fakes, mark) == []
+    assert after is not before and after.version == supabase_db.data_version
+    assert after.today['identity_1_daily_3_completed'] == 1
+    assert after.today['identity_1_daily_3_details'] == [{'text': 'Propuesta', 'done': True}]
+    assert after.settings == before.settings and after.habits == before.habits
+
+
+def test_failed_write_drops_snapshot(fakes, supabase_db, monkeypatch):
+    supabase_db.get_day_snapshot()
+    monkeypatch.setattr(supabase_db, '_execute', lambda query: (_ for _ in ()).throw(RuntimeError('down')))
+    supabase_db.update_daily_3([{'text': 'Propuesta', 'done': True}])
+    monkeypatch.undo()
+
+    mark = len(fakes.postgrest.calls)
+    supabase_db.get_day_snapshot()
+    assert ('select', TRACKING) in calls_since(fakes, mark)
+
+
+def test_sqlite_read_of_existing_row_does_not_write(sqlite_db):
+    """Leer el día no toma el lock de escritura (compite con BEGIN IMMEDIATE de mark_habit_done)"""
+    sqlite_db.update_daily_3([{'text': 'Propuesta', 'done': True}])
+    statements = []
+    sqlite_db.conn.set_trace_callback(statements.append)
+    try:
+        row = sqlite_db.get_today_tracking()
+    finally:
+        sqlite_db.conn.set_trace_callback(None)
+
+    assert row['identity_1_daily_3_completed'] == 1
+    assert [s for s in statements if not s.lstrip().upper().startswith('SELECT')] == []
+
+
+def test_sqlite_first_read_creates_the_row_once(sqlite_db):
+    assert sqlite_db.get_today_tracking()['date'] == sqlite_db._get_today_iso()
+    sqlite_db.get_today_tracking()
+    rows = sqlite_db._query(f'SELECT * FROM "{TRACKING}" WHERE user_id = ?', (USER_ID,))
+    assert len(rows) == 1
@@ -0,0 +1,95 @@
+"""
+Historial de hábitos de un año contra FakePostgrest con tope de filas por respuesta
+
+PostgREST corta cada respuesta en max-rows (1000 por defecto): tres hábitos diarios
+durante un año ya lo superan, así que la lectura tiene que paginar.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from conftest import TIMEZONE, USER_ID
+from modules.dashboard_builder import DashboardBuilder, HABIT_HISTORY_DAYS, HEATMAP_DAYS
+
+HABITS = '01_productivity_habits'
+HABIT_LOGS = '01_productivity_habit_logs'
+HABIT_IDS = ['h1', 'h2', 'h3']
+
+
+@pytest.fixture
+def streak_count():
+    """streak_count guardado de los hábitos (la racha real, sin el tope de la ventana)"""
+    return HABIT_HISTORY_DAYS
+
+
+@pytest.fixture
+def year_of_logs(fakes, supabase_db, streak_count):
+    """Tres hábitos hechos todos los días del último año, con los logs en orden aleatorio"""
+    tables = fakes.postgrest.tables
+    today = datetime.now(pytz.timezone(TIMEZONE)).date()
+    for habit_id in HABIT_IDS:
+        tables[HABITS].append({'id': habit_id, 'user_id': USER_ID, 'name': habit_id, 'active': True,
+                               'streak_count': streak_count, 'created_at': '2020-01-01T00:00:00+00:00'})
+    logs = [
+        {'habit_id': habit_id, 'user_id': USER_ID, 'date_logged': (today - timedelta(days=offset)).isoformat()}
+        for habit_id in HABIT_IDS for offset in range(HABIT_HISTORY_DAYS)
+    ]
+    random.Random(7).shuffle(logs)
+    for i, log in enumerate(logs, start=1):
+        tables[HABIT_LOGS].append({'id': i, **log})
+    return supabase_db
+
+
+def test_fake_enforces_row_cap(fakes, year_of_logs):
+    response = fakes.supabase.table(HABIT_LOGS).select('habit_id').eq('user_id', USER_ID).execute()
+    assert len(response.data) == fakes.postgrest.max_rows < len(HABIT_IDS) * HABIT_HISTORY_DAYS
+
+
+def test_habit_logs_are_paged(fakes, year_of_logs):
+    since = len(fakes.postgrest.requests)
+    logs = year_of_logs.get_habit_logs_last_n_days(HABIT_HISTORY_DAYS)
+
+    assert len(logs) == len(HABIT_IDS) * HABIT_HISTORY_DAYS
+    assert len({(log['habit_id'], log['date_logged']) for log in logs}) == len(logs)
+    pages = [r for r in fakes.postgrest.requests[since:] if r['table'] == HABIT_LOGS]
+    assert len(pages) == 2
+
+
+def test_summary_sees_the_whole_year(year_of_logs):
+    summary = DashboardBuilder(year_of_logs).get_habit_summary(30)
+
+    for habit_id in HABIT_IDS:
+        assert summary[habit_id]['current_streak'] == HABIT_HISTORY_DAYS
+        assert summary[habit_id]['longest_streak'] == HABIT_HISTORY_DAYS
+        assert summary[habit_id]['consistency'] == 100.0
+
+
+def test_heatmap_has_every_habit_cell(year_of_logs):
+    matrix = DashboardBuilder(year_of_logs).get_completion_matrix(HEATMAP_DAYS)
+
+    assert len(matrix) == HEATMAP_DAYS
+    for habit_id in HABIT_IDS:
+        assert (matrix[habit_id] == 100.0).all()
+
+
+@pytest.mark.parametrize('streak_count', [800])
+def test_streak_longer_than_the_window_keeps_stored_count(year_of_logs):
+    summary = DashboardBuilder(year_of_logs).get_habit_summary(30)
+
+    for habit_id in HABIT_IDS:
+        assert summary[habit_id]['current_streak'] == 800
+        assert summary[habit_id]['longest_streak'] == 800
+
+
+@pytest.mark.parametrize('streak_count', [800])
+def test_stored_count_ignored_when_the_run_is_inside_the_window(fakes, year_of_logs):
+    """Con un día sin hacer dentro del año la racha sale de los logs aunque streak_count sea mayor"""
+    gap = (datetime.now(pytz.timezone(TIMEZONE)).date() - timedelta(days=10)).isoformat()
+    logs = fakes.postgrest.tables[HABIT_LOGS]
+    logs[:] = [log for log in logs if log['date_logged'] != gap]
+
+    summary = DashboardBuilder(year_of_logs).get_habit_summary(30)
+    for habit_id in HABIT_IDS:
+        assert summary[habit_id]['current_streak'] == 10
@@ -0,0 +1,77 @@
+"""
+Transiciones de racha (next_streak / to_local_date) y mark_habit_done concurrente en SQLite
+"""
+import threading
+from datetime import date, datetime
+
+import pytest
+import pytz
+
+from conftest import TIMEZONE, USER_ID
+from modules.habit_streaks import next_streak, to_local_date
+from modules.sqlite_client import SQLiteClient
+
+TZ = pytz.timezone(TIMEZONE)  # UTC-4 todo el año
+TODAY = date(2026, 3, 10)
+
+
+@pytest.mark.parametrize('streak, last, expected', [
+    (0, None, 1),                     # primera vez
+    (4, TODAY, None),                 # ya completado hoy
+    (4, date(2026, 3, 9), 5),         # día consecutivo
+    (None, date(2026, 3, 9), 1),      # racha sin valor en la base
+    (4, date(2026, 3, 7), 1),         # se rompió la cadena
+    (4, date(2026, 3, 11), None),     # reloj atrasado: no suma
+])
+def test_next_streak_transitions(streak, last, expected):
+    assert next_streak(streak, last, TODAY) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2026-03-10T03:30:00Z', date(2026, 3, 9)),          # 23:30 del 9 en Caracas
+    ('2026-03-10T04:30:00+00:00', date(2026, 3, 10)),    # 00:30 del 10 en Caracas
+    ('2026-03-09T23:30:00-04:00', date(2026, 3, 9)),
+    ('2026-03-09T23:30:00', date(2026, 3, 9)),           # sin zona: hora local del usuario
+    (datetime(2026, 3, 10, 3, 30, tzinfo=pytz.utc), date(2026, 3, 9)),
+    ('2026-03-10', date(2026, 3, 10)),
+    ('2026-03-10 garbage', date(2026, 3, 10)),           # último recurso: la parte de fecha
+    ('garbage', None),
+    ('', None),
+    (None, None),
+])
+def test_to_local_date(value, expected):
+    assert to_local_date(value, TZ) == expected
+
+
+def test_streak_across_timezone_boundary():
+    """Completado ayer a las 23:30 locales (03:30 UTC de hoy) cuenta como día consecutivo"""
+    last = to_local_date('2026-03-10T03:30:00Z', TZ)
+    assert next_streak(2, last, TODAY) == 3
+    # El mismo instante leído como UTC sería "hoy" y no sumaría
+    assert next_streak(2, to_local_date('2026-03-10T03:30:00Z', pytz.utc), TODAY) is None
+
+
+def test_concurrent_mark_habit_done_counts_once(tmp_path):
+    """Dos sesiones marcando el mismo hábito a la vez: un solo log y racha 1"""
+    path = str(tmp_path / 'productivity.db')
+    sessions = [SQLiteClient(path, USER_ID, TIMEZONE) for _ in range(2)]
+    assert sessions[0].create_habit('Leer')[0]
+    habit_id = sessions[0].get_habits()[0]['id']
+
+    barrier = threading.Barrier(len(sessions))
+    results = [None] * len(sessions)
+
+    def mark(index):
+        barrier.wait()
+        results[index] = sessions[index].mark_habit_done(habit_id)
+
+    threads = [threading.Thread(target=mark, args=(i,)) for i in range(len(sessions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert all(result['success'] for result in results)
+    assert sorted(result.get('message') for result in results) == ['Ya completado hoy', '¡Racha: 1 días!']
+    assert len(sessions[0].get_habit_logs_last_n_days(1)) == 1
+    assert sessions[1].get_habits()[0]['streak_count'] == 1
@@ -0,0 +1,153 @@
+"""
+Valores de referencia calculados a mano para modules/metrics.py
+
+Semana fija: lunes 2026-03-02 a domingo 2026-03-08 (5 días hábiles, meta de tareas 15).
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from modules import metrics
+
+MONDAY = date(2026, 3, 2)
+SUNDAY = date(2026, 3, 8)
+
+
+def record(day, daily_3, priorities, code, morning):
+    return {
+        'date': day, 'identity_1_daily_3_completed': daily_3, 'identity_2_priorities_completed': priorities,
+        'code_commit_done': code, 'morning_mastery_done': morning
+    }
+
+
+# Miércoles, viernes y domingo sin registro; el sábado suma pero no tiene meta
+WEEK = [
+    record('2026-03-02', 3, 2, True, True),     # lunes: 5/6
+    record('2026-03-03', 1, 0, False, True),    # martes: 1/6
+    record('2026-03-05', 2, 3, True, False),    # jueves: 5/6
+    record('2026-03-07', 1, 1, True, True),     # sábado: 2/6
+]
+
+
+@pytest.fixture
+def week():
+    return metrics.day_frame(WEEK, MONDAY, SUNDAY)
+
+
+def test_day_frame_fills_missing_days(week):
+    assert list(week['date']) == [f'2026-03-0{d}' for d in range(2, 9)]
+    assert list(week['day']) == ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    assert list(week['weekday']) == [True] * 5 + [False] * 2
+    assert list(week['daily_3']) == [3, 1, 0, 2, 0, 1, 0]
+    assert list(week['priorities']) == [2, 0, 0, 3, 0, 1, 0]
+    assert list(week['code_done']) == [1, 0, 0, 1, 0, 1, 0]
+    assert list(week['morning_mastery']) == [1, 1, 0, 0, 0, 1, 0]
+
+
+def test_day_frame_keeps_last_duplicate():
+    frame = metrics.day_frame([record('2026-03-02', 1, 0, False, False),
+                               record('2026-03-02', 2, 1, True, False)], MONDAY, MONDAY)
+    assert (frame['daily_3'].tolist(), frame['priorities'].tolist()) == ([2], [1])
+
+
+def test_summary_week(week):
+    assert metrics.summary(week) == {
+        'days': 7,
+        'weekdays': 5,
+        'total_daily_3': 7,
+        'total_priorities': 6,
+        'code_days': 3,
+        'morning_mastery_days': 3,
+        'daily_3_target': 15,           # 5 días hábiles * 3
+        'priorities_target': 15,
+        'morning_mastery_target': 5,
+        'daily_3_rate': 46.67,          # 7 / 15
+        'priorities_rate': 40.0,        # 6 / 15
+        'morning_mastery_rate': 60.0,   # 3 / 5
+        'avg_completion_rate': 43.33,   # 13 / 30
+        'identity_balance': 1.17        # 7 / 6
+    }
+
+
+def test_summary_weekend_has_no_targets():
+    """Lo hecho en fin de semana se cuenta, pero sin días hábiles no hay meta ni tasa"""
+    result = metrics.summary(metrics.day_frame(WEEK, date(2026, 3, 7), SUNDAY))
+    assert (result['days'], result['weekdays']) == (2, 0)
+    assert (result['total_daily_3'], result['total_priorities'], result['code_days']) == (1, 1, 1)
+    assert result['daily_3_target'] == result['morning_mastery_target'] == 0
+    assert result['daily_3_rate'] == result['morning_mastery_rate'] == result['avg_completion_rate'] == 0.0
+    assert result['identity_balance'] == 1.0
+
+
+@pytest.mark.parametrize('start, end, days, weekdays', [
+    (MONDAY, SUNDAY, 7, 5),    # semana sin registros
+    (SUNDAY, MONDAY, 0, 0),    # ventana vacía (fin antes del inicio)
+])
+def test_summary_empty(start, end, days, weekdays):
+    result = metrics.summary(metrics.day_frame([], start, end))
+    assert (result['days'], result['weekdays']) == (days, weekdays)
+    assert result['daily_3_target'] == weekdays * 3
+    assert all(result[key] == 0 for key in (
+        'total_daily_3', 'total_priorities', 'code_days', 'morning_mastery_days',
+        'daily_3_rate', 'priorities_rate', 'morning_mastery_rate', 'avg_completion_rate', 'identity_balance'
+    ))
+
+
+def test_completion_rate(week):
+    assert metrics.completion_rate(week).tolist() == pytest.approx(
+        [500 / 6, 100 / 6, 0, 500 / 6, 0, 200 / 6, 0]
+    )
+
+
+def test_rolling_completion(week):
+    # Ventana de 3 días, parcial al inicio (1 y 2 días)
+    assert metrics.rolling_completion(week, window=3).tolist() == pytest.approx(
+        [500 / 6, 600 / 12, 600 / 18, 600 / 18, 500 / 18, 700 / 18, 200 / 18]
+    )
+    # Ventana de 1 día = completitud diaria
+    assert metrics.rolling_completion(week, window=1).tolist() == pytest.approx(
+        metrics.completion_rate(week).tolist()
+    )
+
+
+def test_rolling_completion_empty():
+    assert metrics.rolling_completion(metrics.day_frame([], SUNDAY, MONDAY)).tolist() == []
+
+
+@pytest.mark.parametrize('done, start, end, expected', [
+    # Lunes (dos logs), miércoles y dos fuera de la ventana: 2 de 7 días
+    (['2026-03-02', '2026-03-02', '2026-03-04', '2026-03-09', '2026-02-28'], MONDAY, SUNDAY, 28.57),
+    (['2026-03-02'], MONDAY, MONDAY, 100.0),
+    ([f'2026-03-0{d}' for d in range(2, 9)], MONDAY, SUNDAY, 100.0),
+    ([], MONDAY, SUNDAY, 0.0),
+    (['2026-03-02'], SUNDAY, MONDAY, 0.0),   # ventana vacía
+])
+def test_habit_consistency(done, start, end, expected):
+    assert metrics.habit_consistency(done, start, end) == expected
+
+
+def test_summary_by_user():
+    """Frame multi-usuario: la semana de referencia, un usuario sin registros y uno en fin de semana"""
+    week = metrics.day_frame(WEEK, MONDAY, SUNDAY)
+    empty = metrics.day_frame([], MONDAY, SUNDAY)
+    weekend = metrics.day_frame(WEEK, date(2026, 3, 7), SUNDAY)
+    frame = pd.concat([week.assign(user_id='a'), empty.assign(user_id='b'), weekend.assign(user_id='c')],
+                      ignore_index=True)
+
+    result = metrics.summary_by_user(frame)
+    assert list(result.index) == ['a', 'b', 'c']
+
+    row = result.loc['a']
+    assert (row['days'], row['weekdays'], row['total_daily_3'], row['total_priorities']) == (7, 5, 7, 6)
+    assert (row['daily_3_rate'], row['priorities_rate']) == (46.67, 40.0)
+    assert (row['morning_mastery_rate'], row['avg_completion_rate'], row['identity_balance']) == (60.0, 43.33, 1.17)
+
+    assert result.loc['b'].drop(['days', 'weekdays', 'daily_3_target', 'priorities_target',
+                                 'morning_mastery_target']).eq(0).all()
+    assert result.loc['c', 'avg_completion_rate'] == 0.0
+
+    # Mismo resultado que summary() usuario por usuario
+    for user_id, single in (('a', week), ('b', empty), ('c', weekend)):
+        expected = metrics.summary(single)
+        assert {key: pytest.approx(result.loc[user_id, key]) for key in expected} == expected
@@ -0,0 +1,18 @@
+"""
+tools/round_trip_budget.py como parte de la suite
+
+Corre en un proceso aparte: el script configura el entorno y parchea streamlit al importarse.
+"""
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def test_round_trip_budgets():
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'tools', 'round_trip_budget.py')],
+        cwd=ROOT, capture_output=True, text=True, timeout=600
+    )
+    assert result.returncode == 0, result.stdout[-4000:] + result.stderr[-2000:]
@@ -0,0 +1,245 @@
+"""
+Suite de conformidad de StorageBackend: los mismos casos contra SQLiteClient y
+SupabaseClient (sobre FakePostgrest). Un backend cumple la interfaz si pasa esta suite.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from conftest import USER_ID
+from modules.day_snapshot import DaySnapshot
+from modules.storage_backend import StorageBackend, create_storage_backend
+
+TASKS = [{'text': 'Propuesta', 'done': True}, {'text': 'Demo', 'done': False}, {'text': '', 'done': False}]
+
+
+@pytest.fixture(params=['sqlite', 'supabase'])
+def backend(request):
+    return request.getfixturevalue(f'{request.param}_db')
+
+
+def settle(db):
+    """Esperar las escrituras diferidas (SupabaseClient escribe logs desde la cola de fondo)"""
+    writer = getattr(db, 'writer', None)
+    if writer is not None:
+        writer.flush()
+
+
+def test_implements_protocol(backend):
+    assert isinstance(backend, StorageBackend)
+
+
+def test_create_storage_backend_sqlite(monkeypatch, tmp_path):
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', str(tmp_path / 'local.db'))
+    backend = create_storage_backend(USER_ID, 'Europe/Madrid')
+    assert type(backend).__name__ == 'SQLiteClient'
+    assert (backend.user_id, backend.timezone.zone) == (USER_ID, 'Europe/Madrid')
+
+    monkeypatch.setenv('STORAGE_BACKEND', 'mongo')
+    with pytest.raises(ValueError):
+        create_storage_backend(USER_ID)
+
+
+# --- Tracking diario ---
+
+def test_tracking_defaults_before_any_write(backend):
+    tracking = backend.get_today_tracking()
+    assert tracking['identity_1_daily_3_completed'] == 0
+    assert tracking['identity_2_priorities_completed'] == 0
+    assert not tracking['code_commit_done']
+    assert not tracking['morning_mastery_done']
+
+
+def test_tracking_upsert_and_read(backend):
+    backend.update_daily_3(TASKS)
+    backend.update_priorities([{'text': 'Informe', 'done': True}])
+    backend.mark_morning_mastery_done()
+    backend.update_daily_3([dict(task, done=True) for task in TASKS])  # segunda escritura: misma fila
+
+    tracking = backend.get_today_tracking()
+    assert tracking['identity_1_daily_3_details'] == [dict(task, done=True) for task in TASKS]
+    assert tracking['identity_1_daily_3_completed'] == 3
+    assert tracking['identity_1_daily_3_list'] == ['Propuesta', 'Demo', '']
+    assert tracking['identity_2_priorities_completed'] == 1
+    assert tracking['morning_mastery_done'] is True
+
+    history = backend.get_last_n_days_tracking(7)
+    assert [row['date'] for row in history] == [tracking['date']]
+    assert history[0]['identity_1_daily_3_completed'] == 3
+
+
+def test_feedback_and_breadcrumbs(backend):
+    assert backend.get_task_feedback('morning') == ['', '', '']
+    assert backend.save_task_feedback(['Uno', 'Dos', ''], 'morning')
+    assert backend.save_task_feedback(['Tarde'], 'afternoon')
+    assert backend.get_task_feedback('morning') == ['Uno', 'Dos', '']
+    assert backend.get_task_feedback('afternoon') == ['Tarde']
+
+    assert backend.get_breadcrumbs_today() == ''
+    assert backend.save_breadcrumbs('Retomar el informe')
+    assert backend.get_breadcrumbs_today() == 'Retomar el informe'
+    assert backend.get_breadcrumbs_from_yesterday() == ''
+
+
+def test_day_snapshot_follows_writes(backend):
+    first = backend.get_day_snapshot()
+    assert isinstance(first, DaySnapshot)
+    assert backend.get_day_snapshot() is first  # sin escrituras se reutiliza
+
+    version = backend.data_version
+    backend.update_daily_3(TASKS)
+    assert backend.data_version > version
+
+    snapshot = backend.get_day_snapshot()
+    assert snapshot is not first
+    assert snapshot.today['identity_1_daily_3_completed'] == 1
+
+
+def test_weekly_stats(backend):
+    backend.update_daily_3(TASKS)
+    backend.mark_morning_mastery_done()
+    stats = backend.get_weekly_stats()
+    assert stats['days'] == 7
+    assert stats['total_daily_3'] == 1
+    assert stats['total_priorities'] == 0
+    assert stats['morning_mastery_days'] == 1
+
+
+# --- Rachas ---
+
+def test_code_streak(backend):
+    assert backend.get_code_streak() == 0
+    backend.mark_code_done('09:30')
+    assert backend.get_code_streak() == 1
+    tracking = backend.get_today_tracking()
+    assert tracking['code_commit_done'] is True
+    assert tracking['code_commit_time'] == '09:30'
+
+
+# --- Hábitos y logs ---
+
+def test_habit_lifecycle(backend):
+    assert backend.get_habits() == []
+    for name in ('Leer', 'Meditar', 'Correr'):
+        assert backend.create_habit(name)[0]
+    assert backend.create_habit('Cuarto')[0] is False  # máximo 3 activos
+
+    habits = backend.get_habits()
+    assert [h['name'] for h in habits] == ['Leer', 'Meditar', 'Correr']
+    assert all(h['streak_count'] == 0 for h in habits)
+
+    assert backend.update_habit(habits[1]['id'], 'Meditar 10 min')
+    assert backend.delete_habit(habits[2]['id'])
+    assert [h['name'] for h in backend.get_habits()] == ['Leer', 'Meditar 10 min']
+
+
+def test_mark_habit_done_and_logs(backend):
+    backend.create_habit('Leer')
+    habit_id = backend.get_habits()[0]['id']
+
+    first = backend.mark_habit_done(habit_id)
+    assert first['success'] and first['streak'] == 1
+    again = backend.mark_habit_done(habit_id)
+    assert again['success'] and again['message'] == 'Ya completado hoy'
+
+    [habit] = backend.get_habits()
+    assert habit['streak_count'] == 1
+    assert habit['last_completed_at']
+
+    today = datetime.now(backend.timezone).date().isoformat()
+    logs = backend.get_habit_logs_last_n_days(7)
+    assert [(log['habit_id'], str(log['date_logged'])[:10]) for log in logs] == [(habit_id, today)]
+
+    assert backend.mark_habit_done('no-existe')['success'] is False
+
+
+def test_renaming_a_habit_resets_its_streak(backend):
+    backend.create_habit('Leer')
+    habit_id = backend.get_habits()[0]['id']
+    backend.mark_habit_done(habit_id)
+    backend.update_habit(habit_id, 'Leer 20 páginas')
+    [habit] = backend.get_habits()
+    assert habit['streak_count'] == 0
+    assert habit['last_completed_at'] is None
+
+
+# --- Focus sessions y timer activo ---
+
+def test_focus_sessions(backend):
+    assert backend.get_focus_sessions_today() == []
+    backend.log_focus_session('Propuesta', 'pomodoro', 25)
+    backend.log_focus_session('Informe', 'deep_work', 60)
+    settle(backend)
+
+    sessions = backend.get_focus_sessions_today()
+    assert sorted((s['task_name'], s['timer_type'], s['duration_minutes']) for s in sessions) == [
+        ('Informe', 'deep_work', 60), ('Propuesta', 'pomodoro', 25)
+    ]
+    # Más recientes primero
+    assert [s['completed_at'] for s in sessions] == sorted((s['completed_at'] for s in sessions), reverse=True)
+
+
+def test_active_timer_roundtrip(backend):
+    assert backend.get_active_timer() is None
+    start = datetime.now(pytz.utc).replace(microsecond=0)
+    record = {
+        'task_name': 'Propuesta', 'timer_type': 'pomodoro', 'duration_minutes': 25,
+        'start_time': start.isoformat(), 'end_time': (start + timedelta(minutes=25)).isoformat(),
+        'status': 'running', 'paused_at': None, 'paused_seconds': 0
+    }
+    assert backend.save_active_timer(record)
+    assert backend.save_active_timer({**record, 'status': 'paused', 'paused_seconds': 30})
+
+    saved = backend.get_active_timer()
+    assert {k: saved[k] for k in record} == {**record, 'status': 'paused', 'paused_seconds': 30}
+
+    assert backend.clear_active_timer()
+    assert backend.get_active_timer() is None
+
+
+# --- Conversaciones ---
+
+def test_conversations_in_chronological_order(backend):
+    assert backend.get_recent_conversations() == []
+    first = [{'role': 'user', 'content': 'Hola'}, {'role': 'assistant', 'content': '¿Qué harás hoy?'}]
+    second = [{'role': 'user', 'content': 'La propuesta'}, {'role': 'assistant', 'content': 'Empieza ya.'}]
+    backend.log_conversation('Empresario Exitoso', first)
+    backend.log_conversation(None, second)
+    settle(backend)
+
+    assert backend.get_recent_conversations(limit=10) == first + second
+    assert backend.get_recent_conversations(limit=1) == second
+
+
+# --- Settings ---
+
+def test_settings(backend):
+    settings = backend.get_user_settings()
+    assert settings['identity_1_name'] == 'Empresario Exitoso'
+    assert settings['identity_2_name'] == 'Profesional MarTech'
+
+    assert backend.update_user_settings('Fundador', 'Consultor', 'Europe/Madrid') == (True, "Configuración guardada")
+    assert backend.update_morning_mastery_text('Agua, lectura y plan')
+
+    settings = backend.get_user_settings()
+    assert (settings['identity_1_name'], settings['identity_2_name']) == ('Fundador', 'Consultor')
+    assert settings['timezone'] == 'Europe/Madrid'
+    assert backend.get_morning_mastery_text() == 'Agua, lectura y plan'
+
+
+def test_set_timezone(backend):
+    backend.set_timezone('Europe/Madrid')
+    assert backend.timezone.zone == 'Europe/Madrid'
+    backend.set_timezone('No/Existe')
+    assert backend.timezone.zone == 'Europe/Madrid'
+
+
+# --- Cache de feedback ---
+
+def test_feedback_cache(backend):
+    assert backend.get_cached_feedback([]) == {}
+    assert backend.save_cached_feedback({'k1': 'Empieza por el índice', 'k2': 'Solo abre el archivo'})
+    assert backend.save_cached_feedback({'k1': 'Versión nueva'})
+    assert backend.get_cached_feedback(['k1', 'k2', 'k3']) == {'k1': 'Versión nueva', 'k2': 'Solo abre el archivo'}
@@ -0,0 +1,125 @@
+"""
+Columnas proyectadas por cada lectura de SupabaseClient (select=, count=exact y HEAD)
+
+Si un método vuelve a pedir select=* o columnas de más, este test lo marca: los JSON
+de details/feedback/breadcrumbs solo deben viajar en las consultas que los usan.
+"""
+import pytest
+
+from conftest import USER_ID
+from modules import supabase_client as sc
+
+TRACKING = '01_productivity_daily_tracking'
+HABITS = '01_productivity_habits'
+STREAKS = '01_productivity_habit_streaks'
+SETTINGS = '01_productivity_user_settings'
+
+
+def columns(projection):
+    """'a, b,c' -> ('a', 'b', 'c') (postgrest-py quita los espacios al armar la URL)"""
+    return tuple(c.strip() for c in projection.split(',')) if projection is not None else None
+
+
+@pytest.fixture
+def seeded(fakes, supabase_db):
+    """Filas de hoy, settings, un hábito y la racha de código: las lecturas no crean nada"""
+    tables = fakes.postgrest.tables
+    tables[TRACKING].append({'id': 1, 'user_id': USER_ID, 'date': supabase_db._get_today_iso()})
+    tables[SETTINGS].append({'user_id': USER_ID, 'identity_1_name': 'Empresario'})
+    tables[HABITS].append({'id': 'h1', 'user_id': USER_ID, 'name': 'Leer', 'active': True,
+                           'created_at': '2026-01-01T00:00:00+00:00'})
+    tables[STREAKS].append({'user_id': USER_ID, 'habit_name': 'Código', 'current_streak': 2,
+                            'longest_streak': 5, 'total_completions': 9})
+    return supabase_db
+
+
+READS = {
+    'get_day_snapshot': (lambda db: db.get_day_snapshot(refresh=True), [
+        ('GET', TRACKING, sc.DAY_COLUMNS),
+        ('GET', SETTINGS, sc.SETTINGS_COLUMNS),
+        ('GET', HABITS, sc.HABIT_COLUMNS),
+        ('GET', STREAKS, 'current_streak'),
+    ]),
+    'get_today_tracking': (lambda db: db.get_today_tracking(), [('GET', TRACKING, sc.DAY_COLUMNS)]),
+    'get_last_n_days_tracking': (lambda db: db.get_last_n_days_tracking(30), [
+        ('GET', TRACKING, sc.HISTORY_SYNC_COLUMNS),
+    ]),
+    'get_focus_sessions_today': (lambda db: db.get_focus_sessions_today(), [
+        ('GET', '01_productivity_focus_sessions', sc.FOCUS_SESSION_COLUMNS),
+    ]),
+    'get_active_timer': (lambda db: db.get_active_timer(), [
+        ('GET', '01_productivity_active_timers', sc.ACTIVE_TIMER_COLUMNS),
+    ]),
+    'get_recent_conversations': (lambda db: db.get_recent_conversations(5), [
+        ('GET', '01_productivity_identity_sessions', 'conversation_log'),
+    ]),
+    'get_user_settings': (lambda db: db.get_user_settings(), [('GET', SETTINGS, sc.SETTINGS_COLUMNS)]),
+    'get_habits': (lambda db: db.get_habits(), [('GET', HABITS, sc.HABIT_COLUMNS)]),
+    'get_habit_logs_last_n_days': (lambda db: db.get_habit_logs_last_n_days(7), [
+        ('GET', '01_productivity_habit_logs', sc.HABIT_LOG_COLUMNS),
+    ]),
+    'get_code_streak': (lambda db: db.get_code_streak(), [('GET', STREAKS, 'current_streak')]),
+    'get_task_feedback': (lambda db: db.get_task_feedback('afternoon'), [
+        ('GET', TRACKING, 'identity_2_feedback'),
+    ]),
+    'get_cached_feedback': (lambda db: db.get_cached_feedback(['k1']), [
+        ('GET', '01_productivity_feedback_cache', 'cache_key, feedback'),
+    ]),
+    'get_breadcrumbs_today': (lambda db: db.get_breadcrumbs_today(), [
+        ('GET', TRACKING, 'breadcrumbs_tomorrow'),
+    ]),
+    'get_breadcrumbs_from_yesterday': (lambda db: db.get_breadcrumbs_from_yesterday(), [
+        ('GET', TRACKING, 'breadcrumbs_tomorrow'),
+    ]),
+}
+
+
+@pytest.mark.parametrize('method', list(READS))
+def test_read_projection(fakes, seeded, method):
+    read, expected = READS[method]
+    mark = len(fakes.postgrest.requests)
+    read(seeded)
+
+    recorded = [(r['method'], r['table'], columns(r['select'])) for r in fakes.postgrest.requests[mark:]]
+    assert recorded == [(m, table, columns(projection)) for m, table, projection in expected]
+
+
+def test_history_columns_exclude_json():
+    """El historial del dashboard solo trae enteros y booleanos"""
+    json_columns = {'identity_1_daily_3_details', 'identity_1_feedback', 'identity_2_priorities_details',
+                    'identity_2_feedback', 'breadcrumbs_tomorrow'}
+    assert not json_columns & set(columns(sc.HISTORY_SYNC_COLUMNS))
+
+
+def test_create_habit_counts_with_head(fakes, seeded):
+    """El límite de 3 hábitos se valida con HEAD + count=exact, sin traer filas"""
+    mark = len(fakes.postgrest.requests)
+    assert seeded.create_habit('Meditar')[0]
+
+    count, insert = fakes.postgrest.requests[mark:]
+    assert (count['method'], count['table'], columns(count['select'])) == ('HEAD', HABITS, ('id',))
+    assert 'count=exact' in count['prefer']
+    assert (insert['op'], insert['table']) == ('insert', HABITS)
+    assert 'return=minimal' in insert['prefer']
+
+
+def test_mark_code_done_reads_only_streak_counters(fakes, seeded):
+    mark = len(fakes.postgrest.requests)
+    seeded.mark_code_done('09:00')
+
+    ops = [(r['op'], r['table'], columns(r['select'])) for r in fakes.postgrest.requests[mark:]]
+    assert ops == [
+        ('upsert', TRACKING, None),
+        ('select', STREAKS, columns(sc.CODE_STREAK_COLUMNS)),
+        ('update', STREAKS, None),
+    ]
+    assert all('return=minimal' in r['prefer'] for r in fakes.postgrest.requests[mark:] if r['op'] != 'select')
+
+
+def test_no_read_selects_everything(fakes, seeded):
+    """Ninguna lectura del contrato pide select=* (o sin select)"""
+    mark = len(fakes.postgrest.requests)
+    for read, _ in READS.values():
+        read(seeded)
+    gets = [r for r in fakes.postgrest.requests[mark:] if r['method'] in ('GET', 'HEAD')]
+    assert gets and all(r['select'] not in (None, '*') for r in gets)
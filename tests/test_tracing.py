@@ -0,0 +1,62 @@
+"""
+Spans de tracing: anidamiento y generadores que ceden el control dentro de un span
+"""
+from types import SimpleNamespace
+
+from modules import tracing
+
+
+def active_span():
+    return getattr(tracing._local, 'span', None)
+
+
+def http_response(status=200, length='10'):
+    return SimpleNamespace(status_code=status, headers={'content-length': length})
+
+
+def test_nested_spans_restore_parent():
+    with tracing.span('agent', 'outer') as outer:
+        with tracing.span('postgrest', 'select', 'habits') as inner:
+            assert active_span() is inner
+            assert inner.parent is outer
+        assert active_span() is outer
+    assert active_span() is None
+
+
+def streamed(tokens, spans):
+    with tracing.span('anthropic', 'messages.stream', 'chat') as current:
+        spans.append(current)
+        for token in tokens:
+            with tracing.suspended(current):
+                yield token
+
+
+def test_generator_span_is_released_between_yields():
+    spans = []
+    stream = streamed(['a', 'b', 'c'], spans)
+
+    assert next(stream) == 'a'
+    chat = spans[0]
+    # Entre tokens el hilo hace otras llamadas: no se anotan en el span del chat
+    assert active_span() is None
+    tracing.on_http_response(http_response(status=204, length='5'))
+    with tracing.span('postgrest', 'select', 'habits') as other:
+        assert other.parent is None
+        tracing.on_http_response(http_response())
+    assert 'status' not in chat.attrs and 'bytes' not in chat.attrs
+    assert other.attrs == {'status': 200, 'bytes': 10}
+
+    assert list(stream) == ['b', 'c']
+    assert active_span() is None
+
+
+def test_generator_closed_midway_restores_thread_state():
+    spans = []
+    with tracing.span('agent', 'render') as render:
+        stream = streamed(['a', 'b'], spans)
+        assert next(stream) == 'a'
+        assert active_span() is render
+        stream.close()  # rerun de Streamlit: el consumidor abandona el stream
+        assert active_span() is render
+    assert active_span() is None
+    assert tracing.recent_spans()[-2]['target'] == 'chat'
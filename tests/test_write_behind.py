@@ -0,0 +1,74 @@
+"""
+Journal de la escritura diferida: reintento de registros guardados tras un fallo o un reinicio
+"""
+import json
+import os
+import time
+
+import pytest
+
+from modules.write_behind import WriteBehindQueue
+
+SESSIONS = '01_productivity_focus_sessions'
+
+
+def journal_line(record):
+    return json.dumps({'table': SESSIONS, 'record': record}) + "\n"
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return str(tmp_path / 'journal.jsonl')
+
+
+@pytest.fixture
+def writer(fakes, journal):
+    """Cola sin flush por intervalo durante el test: solo los flush explícitos escriben"""
+    queue = WriteBehindQueue(fakes.supabase, flush_interval=3600, journal_path=journal)
+    yield queue
+    queue.close(timeout=1)
+
+
+def test_truncated_line_does_not_block_the_journal(fakes, writer, journal):
+    """Un proceso murió a mitad de la segunda línea y después otro agregó un registro"""
+    with open(journal, 'w', encoding='utf-8') as f:
+        f.write(journal_line({'task_name': 'a'}))
+        f.write(journal_line({'task_name': 'b'})[:20])
+    writer._spill([(SESSIONS, {'task_name': 'c'})])
+
+    writer.enqueue(SESSIONS, {'task_name': 'nuevo'})
+    writer.flush()
+
+    assert sorted(r['task_name'] for r in fakes.postgrest.tables[SESSIONS]) == ['a', 'c', 'nuevo']
+    with open(journal + '.bad', encoding='utf-8') as f:
+        assert f.read() == journal_line({'task_name': 'b'})[:20] + "\n"
+    assert writer.stats()['journal_pending'] == 0
+
+
+def test_journal_is_replayed_without_new_records(fakes, journal):
+    """Registros que quedaron en el journal antes de un reinicio: se escriben al arrancar"""
+    with open(journal, 'w', encoding='utf-8') as f:
+        f.write(journal_line({'task_name': 'antes del reinicio'}))
+
+    queue = WriteBehindQueue(fakes.supabase, flush_interval=0.05, journal_path=journal)
+    try:
+        deadline = time.monotonic() + 5
+        while not fakes.postgrest.tables[SESSIONS] and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        queue.close(timeout=1)
+
+    assert [r['task_name'] for r in fakes.postgrest.tables[SESSIONS]] == ['antes del reinicio']
+    assert not os.path.exists(journal)
+
+
+def test_close_retries_the_journal(fakes, writer, journal):
+    writer.flush()  # primer reintento sin journal
+    writer._journal_retry_at = time.monotonic() + 3600
+    with open(journal, 'w', encoding='utf-8') as f:
+        f.write(journal_line({'task_name': 'pendiente'}))
+
+    writer.flush()
+    assert not fakes.postgrest.tables[SESSIONS]  # sin registros nuevos espera el próximo reintento
+    writer.close(timeout=1)
+    assert [r['task_name'] for r in fakes.postgrest.tables[SESSIONS]] == ['pendiente']
@@ -0,0 +1,545 @@
+"""
+Backends falsos en memoria para medir round trips sin red (Supabase, Auth y Anthropic)
+
+- FakePostgrest: el subconjunto de PostgREST que usa SupabaseClient (select con filtros,
+  insert/upsert, update, delete, count=exact y la RPC productivity_complete_habit).
+  Se usa como transport de httpx (MockTransport) o detrás de un servidor HTTP (tools/loadtest.py).
+- FakeAnthropic: messages.create / messages.stream con respuestas fijas y usage.
+- FakeAuthManager: misma interfaz que modules.auth.AuthManager, sin cookies ni GoTrue.
+- serve_fakes: PostgREST, Auth (GoTrue) y Messages de Anthropic (con stream SSE) detrás de
+  un servidor HTTP local, para clientes reales apuntando a localhost (tools/loadtest.py).
+
+Cada fake anota sus llamadas (con el hilo que las hizo) para poder contar por render.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import httpx
+import pytz
+
+
+# Valores por defecto de las columnas (mismos que modules/sqlite_client.py SCHEMA)
+TABLE_DEFAULTS = {
+    '01_productivity_daily_tracking': {
+        'identity_1_daily_3_completed': 0, 'identity_2_priorities_completed': 0,
+        'code_commit_done': False, 'morning_mastery_done': False
+    },
+    '01_productivity_habit_streaks': {
+        'current_streak': 0, 'longest_streak': 0, 'total_completions': 0, 'consistency_rate': 0
+    },
+    '01_productivity_habits': {'streak_count': 0, 'last_completed_at': None, 'active': True},
+    '01_productivity_active_timers': {'status': 'running', 'paused_at': None, 'paused_seconds': 0}
+}
+
+# Clave primaria (conflicto por defecto de un upsert sin on_conflict)
+PRIMARY_KEYS = {
+    '01_productivity_user_settings': ('user_id',),
+    '01_productivity_active_timers': ('user_id',),
+    '01_productivity_feedback_cache': ('cache_key',)
+}
+
+# Tablas con trigger de updated_at (migrations/005)
+UPDATED_AT_TABLES = {'01_productivity_daily_tracking'}
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _as_text(value) -> str:
+    """Valor de una fila como lo compara PostgREST en los filtros de la URL"""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _matches(value, condition: str) -> bool:
+    """Evaluar un filtro PostgREST ('eq.x', 'in.(a,b)', 'gte.x', 'is.null', ...)"""
+    negate = condition.startswith('not.')
+    if negate:
+        condition = condition[len('not.'):]
+    op, _, arg = condition.partition('.')
+    text = _as_text(value)
+
+    if op == 'eq':
+        result = text == arg
+    elif op == 'neq':
+        result = text != arg
+    elif op == 'is':
+        result = text == arg
+    elif op == 'in':
+        options = [o.strip().strip('"') for o in arg.strip('()').split(',')]
+        result = text in options
+    elif op in ('gt', 'gte', 'lt', 'lte'):
+        if value is None:
+            return False
+        try:
+            left, right = float(value), float(arg)
+        except (TypeError, ValueError):
+            left, right = text, arg  # Fechas ISO: el orden de texto es el cronológico
+        result = {'gt': left > right, 'gte': left >= right, 'lt': left < right, 'lte': left <= right}[op]
+    else:
+        raise ValueError(f"Filtro no soportado por FakePostgrest: {op}")
+    return result != negate
+
+
+class FakePostgrest:
+    """
+    PostgREST en memoria. Se llama con un httpx.Request (MockTransport) o con
+    handle(method, url, headers, body) desde un servidor HTTP.
+    `calls`: lista de (thread, op, table) de cada request; `requests`: el mismo request con
+    método, proyección (select=) y header Prefer; `latency`: segundos por request.
+    `max_rows`: tope de filas por respuesta, como db-max-rows de PostgREST (None = sin tope).
+    """
+
+    def __init__(self, latency: float = 0.0, max_rows: Optional[int] = 1000):
+        self.latency = latency
+        self.max_rows = max_rows
+        self.tables: Dict[str, List[Dict]] = defaultdict(list)
+        self.calls: List[Tuple[str, str, str]] = []
+        self.requests: List[Dict] = []
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    # --- Entradas ---
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        status, headers, body = self.handle(request.method, str(request.url), dict(request.headers), request.content)
+        return httpx.Response(status, headers=headers, content=body)
+
+    def handle(self, method: str, url: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Procesar un request; devuelve (status, headers, body)"""
+        if self.latency:
+            time.sleep(self.latency)
+        parts = urlsplit(url)
+        target = unquote(parts.path.split('/rest/v1/', 1)[-1])
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        headers = {k.lower(): v for k, v in headers.items()}
+        payload = json.loads(body) if body else None
+        prefer = headers.get('prefer', '')
+
+        with self._lock:
+            if target.startswith('rpc/'):
+                self._record(method, 'rpc', target[4:], params, prefer)
+                return self._json(200, self._rpc(target[4:], payload or {}))
+
+            op = {'GET': 'select', 'HEAD': 'count', 'POST': 'insert', 'PATCH': 'update', 'DELETE': 'delete'}[method]
+            if op == 'insert' and 'resolution=' in prefer:
+                op = 'upsert'
+            self._record(method, op, target, params, prefer)
+
+            filters = [(k, v) for k, v in params if k not in ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns')]
+            options = dict(params)
+
+            if op in ('select', 'count'):
+                rows = self._select(target, filters, options)
+                extra = {}
+                if 'count=exact' in prefer:
+                    extra['content-range'] = f"0-{max(len(rows) - 1, 0)}/{len(rows)}" if rows else '*/0'
+                if op == 'count':
+                    return 200, {'content-range': extra.get('content-range', '*/0')}, b''
+                return self._json(200, rows, extra)
+            if op in ('insert', 'upsert'):
+                records = payload if isinstance(payload, list) else [payload]
+                written = self._insert(target, records, options.get('on_conflict'), prefer)
+            elif op == 'update':
+                written = self._update(target, filters, payload or {})
+            else:
+                written = self._delete(target, filters)
+
+            if 'return=minimal' in prefer:
+                return 201 if op in ('insert', 'upsert') else 204, {}, b''
+            return self._json(201 if op in ('insert', 'upsert') else 200, written)
+
+    def _record(self, method: str, op: str, table: str, params, prefer: str):
+        thread = threading.current_thread().name
+        self.calls.append((thread, op, table))
+        self.requests.append({
+            'thread': thread, 'method': method, 'op': op, 'table': table,
+            'select': dict(params).get('select'), 'prefer': prefer
+        })
+
+    # --- Operaciones ---
+
+    def _select(self, table: str, filters, options) -> List[Dict]:
+        rows = [r for r in self.tables[table] if all(_matches(r.get(col), cond) for col, cond in filters)]
+        for clause in reversed([c for c in options.get('order', '').split(',') if c]):
+            column, _, direction = clause.partition('.')
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=direction.startswith('desc'))
+        if options.get('offset'):
+            rows = rows[int(options['offset']):]
+        if options.get('limit'):
+            rows = rows[:int(options['limit'])]
+        if self.max_rows is not None:
+            rows = rows[:self.max_rows]
+        columns = [c.strip() for c in options.get('select', '*').split(',')]
+        if columns != ['*']:
+            rows = [{c: r.get(c) for c in columns} for r in rows]
+        return [dict(r) for r in rows]
+
+    def _insert(self, table: str, records: List[Dict], on_conflict: Optional[str], prefer: str) -> List[Dict]:
+        keys = tuple(on_conflict.split(',')) if on_conflict else PRIMARY_KEYS.get(table)
+        upsert = 'resolution=' in prefer
+        written = []
+        for record in records:
+            existing = None
+            if upsert and keys:
+                existing = next((r for r in self.tables[table]
+                                 if all(_as_text(r.get(k)) == _as_text(record.get(k)) for k in keys)), None)
+            if existing is not None:
+                if 'ignore-duplicates' not in prefer:
+                    existing.update(record)
+                    self._touch(table, existing)
+                written.append(dict(existing))
+                continue
+            row = {'id': self._new_id(table), 'created_at': _now_iso(), **TABLE_DEFAULTS.get(table, {}), **record}
+            self._touch(table, row)
+            self.tables[table].append(row)
+            written.append(dict(row))
+        return written
+
+    def _update(self, table: str, filters, changes: Dict) -> List[Dict]:
+        written = []
+        for row in self.tables[table]:
+            if all(_matches(row.get(col), cond) for col, cond in filters):
+                row.update(changes)
+                self._touch(table, row)
+                written.append(dict(row))
+        return written
+
+    def _delete(self, table: str, filters) -> List[Dict]:
+        kept, removed = [], []
+        for row in self.tables[table]:
+            (removed if all(_matches(row.get(col), cond) for col, cond in filters) else kept).append(row)
+        self.tables[table] = kept
+        return removed
+
+    def _rpc(self, name: str, args: Dict):
+        """productivity_complete_habit (migrations/004) con la misma regla de rachas"""
+        if name != 'productivity_complete_habit':
+            raise ValueError(f"RPC no soportada por FakePostgrest: {name}")
+        from modules.habit_streaks import next_streak, to_local_date
+
+        tz = pytz.timezone(args.get('p_timezone') or 'America/Caracas')
+        habit = next((h for h in self.tables['01_productivity_habits']
+                      if h['id'] == args['p_habit_id'] and h['user_id'] == args['p_user_id']), None)
+        if habit is None:
+            return {'success': False, 'message': 'Hábito no encontrado'}
+
+        now = datetime.now(pytz.utc)
+        today = now.astimezone(tz).date()
+        streak = next_streak(habit.get('streak_count'), to_local_date(habit.get('last_completed_at'), tz), today)
+        if streak is None:
+            return {'success': True, 'message': 'Ya completado hoy', 'streak': habit.get('streak_count')}
+
+        habit.update(streak_count=streak, last_completed_at=now.isoformat())
+        self.tables['01_productivity_habit_logs'].append({
+            'id': self._new_id('01_productivity_habit_logs'), 'habit_id': habit['id'],
+            'user_id': habit['user_id'], 'completed_at': now.isoformat(), 'date_logged': today.isoformat()
+        })
+        return {'success': True, 'streak': streak, 'message': f'¡Racha: {streak} días!'}
+
+    # --- Utilidades ---
+
+    def _new_id(self, table: str):
+        if table == '01_productivity_habits':
+            return str(uuid.uuid4())
+        self._next_id += 1
+        return self._next_id
+
+    def _touch(self, table: str, row: Dict):
+        if table in UPDATED_AT_TABLES:
+            row['updated_at'] = _now_iso()
+
+    @staticmethod
+    def _json(status: int, data, headers: Optional[Dict] = None) -> Tuple[int, Dict[str, str], bytes]:
+        body = json.dumps(data, default=str).encode('utf-8')
+        return status, {'content-type': 'application/json', 'content-length': str(len(body)), **(headers or {})}, body
+
+    def count_calls(self, since: int = 0, exclude_threads: Tuple[str, ...] = ('write-behind',)) -> int:
+        """Requests desde el índice `since`, sin los de hilos de fondo"""
+        with self._lock:
+            return sum(1 for thread, _, _ in self.calls[since:] if thread not in exclude_threads)
+
+    def describe_calls(self, since: int = 0) -> List[str]:
+        """'op tabla' de cada request desde `since` (para reportar qué se pasó del presupuesto)"""
+        with self._lock:
+            return [f"{op} {table} [{thread}]" for thread, op, table in self.calls[since:]]
+
+
+class _FakeStream:
+    """Context manager equivalente a messages.stream(...)"""
+
+    def __init__(self, text: str, usage):
+        self.text_stream = iter([word + ' ' for word in text.split(' ')])
+        self._message = SimpleNamespace(content=[SimpleNamespace(text=text)], usage=usage)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get_final_message(self):
+        return self._message
+
+
+class FakeAnthropic:
+    """Cliente Anthropic falso: cuenta llamadas y devuelve texto y usage fijos"""
+
+    def __init__(self, latency: float = 0.0, reply: str = "Respuesta de prueba del coach."):
+        self.latency = latency
+        self.reply = reply
+        self.calls: List[Tuple[str, str]] = []   # (thread, 'create' | 'stream')
+        self._lock = threading.Lock()
+        self.messages = SimpleNamespace(create=self._create, stream=self._stream)
+
+    def _usage(self, kwargs):
+        prompt_chars = len(json.dumps(kwargs.get('messages', []), default=str))
+        return SimpleNamespace(input_tokens=prompt_chars // 4, output_tokens=len(self.reply) // 4,
+                               cache_creation_input_tokens=0, cache_read_input_tokens=0)
+
+    def _record(self, kind: str):
+        with self._lock:
+            self.calls.append((threading.current_thread().name, kind))
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _create(self, **kwargs):
+        self._record('create')
+        return SimpleNamespace(content=[SimpleNamespace(text=self.reply)], usage=self._usage(kwargs))
+
+    def _stream(self, **kwargs):
+        self._record('stream')
+        return _FakeStream(self.reply, self._usage(kwargs))
+
+    def count_calls(self, since: int = 0) -> int:
+        with self._lock:
+            return len(self.calls[since:])
+
+
+class FakeAuthManager:
+    """AuthManager sin GoTrue ni cookies: usuario fijo y contador de llamadas"""
+
+    def __init__(self, user: Dict):
+        self.user = user
+        self.calls: List[str] = []
+
+    def restore_session_from_cookies(self) -> Optional[Dict]:
+        self.calls.append('restore_session')
+        return self.user
+
+    def sign_in(self, email: str, password: str):
+        self.calls.append('sign_in')
+        return True, "Inicio de sesión exitoso", self.user
+
+    def sign_up(self, email: str, password: str):
+        self.calls.append('sign_up')
+        return True, "Usuario registrado exitosamente."
+
+    def sign_out(self):
+        self.calls.append('sign_out')
+        return True, "Sesión cerrada exitosamente"
+
+    def get_current_user(self) -> Optional[Dict]:
+        self.calls.append('get_user')
+        return self.user
+
+    def reset_password(self, email: str):
+        self.calls.append('reset_password')
+        return True, "Email enviado"
+
+    def save_session(self, access_token: str, refresh_token: str):
+        self.calls.append('save_session')
+
+    def clear_session(self):
+        self.calls.append('clear_session')
+
+
+def fake_user_id(email: str) -> str:
+    """user_id determinista por email (el mismo en el servidor falso y en el generador de carga)"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f'productivity-coach:{email.lower()}'))
+
+
+class FakeGoTrue:
+    """Endpoints de Supabase Auth que usa AuthManager: login con password, usuario y logout"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    @staticmethod
+    def _user(email: str) -> Dict:
+        return {
+            'id': fake_user_id(email), 'aud': 'authenticated', 'role': 'authenticated', 'email': email,
+            'app_metadata': {'provider': 'email'}, 'user_metadata': {},
+            'created_at': '2026-01-01T00:00:00Z', 'last_sign_in_at': _now_iso()
+        }
+
+    def handle(self, method: str, url: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        if self.latency:
+            time.sleep(self.latency)
+        path = urlsplit(url).path.split('/auth/v1/', 1)[-1]
+        payload = json.loads(body) if body else {}
+
+        if path == 'token':
+            email = payload.get('email') or 'loadtest@example.com'
+            return FakePostgrest._json(200, {
+                'access_token': f'fake-access-{uuid.uuid4().hex}', 'token_type': 'bearer',
+                'expires_in': 3600, 'expires_at': int(time.time()) + 3600,
+                'refresh_token': uuid.uuid4().hex, 'user': self._user(email)
+            })
+        if path == 'user':
+            return FakePostgrest._json(200, self._user('loadtest@example.com'))
+        if path == 'logout':
+            return 204, {}, b''
+        return FakePostgrest._json(404, {'msg': f'Endpoint de auth no soportado: {path}'})
+
+
+class FakeMessagesAPI:
+    """
+    POST /v1/messages de Anthropic: respuesta JSON o stream SSE.
+    `latency`: segundos hasta el primer token; `token_delay`: segundos entre tokens.
+    """
+
+    def __init__(self, latency: float = 0.0, token_delay: float = 0.0, tokens: int = 40,
+                 reply: str = "Respuesta de prueba del coach."):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.tokens = tokens
+        self.reply = reply
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _message(self, payload: Dict, text: str, output_tokens: int) -> Dict:
+        return {
+            'id': f'msg_{uuid.uuid4().hex[:24]}', 'type': 'message', 'role': 'assistant',
+            'model': payload.get('model', 'fake-model'),
+            'content': [{'type': 'text', 'text': text}] if text else [],
+            'stop_reason': 'end_turn' if text else None, 'stop_sequence': None,
+            'usage': {'input_tokens': len(json.dumps(payload.get('messages', []))) // 4,
+                      'output_tokens': output_tokens,
+                      'cache_creation_input_tokens': 0, 'cache_read_input_tokens': 0}
+        }
+
+    def handle(self, body: bytes):
+        """(status, headers, body) o, para stream=true, (status, headers, iterador de bytes SSE)"""
+        payload = json.loads(body) if body else {}
+        with self._lock:
+            self.calls += 1
+        words = (self.reply.split(' ') * (self.tokens // max(len(self.reply.split(' ')), 1) + 1))[:self.tokens]
+
+        if not payload.get('stream'):
+            time.sleep(self.latency + self.token_delay * len(words))
+            return FakePostgrest._json(200, self._message(payload, ' '.join(words), len(words)))
+
+        def events():
+            def event(name: str, data: Dict) -> bytes:
+                return f"event: {name}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+
+            time.sleep(self.latency)
+            yield event('message_start', {'type': 'message_start', 'message': self._message(payload, '', 1)})
+            yield event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                                'content_block': {'type': 'text', 'text': ''}})
+            for i, word in enumerate(words):
+                if i and self.token_delay:
+                    time.sleep(self.token_delay)
+                yield event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                                    'delta': {'type': 'text_delta', 'text': word + ' '}})
+            yield event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+            yield event('message_delta', {'type': 'message_delta',
+                                          'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                                          'usage': {'output_tokens': len(words)}})
+            yield event('message_stop', {'type': 'message_stop'})
+
+        return 200, {'content-type': 'text/event-stream', 'cache-control': 'no-cache'}, events()
+
+
+class _FakeRequestHandler(BaseHTTPRequestHandler):
+    """Enruta /rest/v1 a FakePostgrest, /auth/v1 a FakeGoTrue y /v1/messages a FakeMessagesAPI"""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive: los pools de httpx reutilizan conexiones
+
+    def _dispatch(self):
+        length = int(self.headers.get('content-length') or 0)
+        body = self.rfile.read(length) if length else b''
+        services = self.server.services
+        url = f"http://{self.headers.get('host', 'localhost')}{self.path}"
+
+        if self.path.startswith('/rest/v1/'):
+            status, headers, payload = services.postgrest.handle(self.command, url, dict(self.headers), body)
+        elif self.path.startswith('/auth/v1/'):
+            status, headers, payload = services.gotrue.handle(self.command, url, dict(self.headers), body)
+        elif self.path.startswith('/v1/messages'):
+            status, headers, payload = services.messages.handle(body)
+        else:
+            status, headers, payload = FakePostgrest._json(404, {'message': f'Ruta no soportada: {self.path}'})
+
+        self.send_response(status)
+        for name, value in headers.items():
+            if name.lower() != 'content-length':
+                self.send_header(name, value)
+        if isinstance(payload, bytes):
+            self.send_header('content-length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        # Stream SSE con chunked encoding
+        self.send_header('transfer-encoding', 'chunked')
+        self.end_headers()
+        for chunk in payload:
+            self.wfile.write(f"{len(chunk):x}\r\n".encode('ascii') + chunk + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = _dispatch
+
+    def log_message(self, format, *args):
+        pass  # Sin una línea por request en stderr
+
+
+def serve_fakes(host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                llm_latency: float = 0.0, token_delay: float = 0.0, tokens: int = 40) -> ThreadingHTTPServer:
+    """
+    Servidor HTTP con PostgREST, Auth y Messages falsos (un hilo por conexión).
+    Queda escuchando en server.server_address; los fakes están en server.services.
+    """
+    server = ThreadingHTTPServer((host, port), _FakeRequestHandler)
+    server.daemon_threads = True
+    server.services = SimpleNamespace(
+        postgrest=FakePostgrest(latency=latency),
+        gotrue=FakeGoTrue(latency=latency),
+        messages=FakeMessagesAPI(latency=llm_latency, token_delay=token_delay, tokens=tokens)
+    )
+    return server
+
+
+def install_fakes(url: str, key: str, api_key: str, latency: float = 0.0,
+                  llm_latency: float = 0.0) -> SimpleNamespace:
+    """
+    Registrar un Supabase con FakePostgrest y un FakeAnthropic en modules.clients,
+    de modo que SupabaseClient y ProductivityAgent los reciban al pedir sus clientes.
+    """
+    from supabase import ClientOptions, create_client
+    from modules import clients, tracing
+
+    postgrest = FakePostgrest(latency=latency)
+    http_client = httpx.Client(transport=httpx.MockTransport(postgrest),
+                               event_hooks={'response': [tracing.on_http_response]})
+    supabase = create_client(url, key, options=ClientOptions(httpx_client=http_client))
+    anthropic = FakeAnthropic(latency=llm_latency)
+
+    with clients._registry_lock:
+        clients._registry[('supabase', url, key)] = supabase
+        clients._registry[('anthropic', api_key)] = anthropic
+    return SimpleNamespace(postgrest=postgrest, anthropic=anthropic, supabase=supabase)
@@ -0,0 +1,403 @@
+"""
+Prueba de carga multi-sesión contra PostgREST, Auth y Messages falsos (¿cuántos usuarios aguanta un worker?)
+
+Simula N sesiones concurrentes en un solo proceso, como un worker de Streamlit con un hilo de
+script por sesión. Cada sesión repite el flujo: login -> página principal -> toggles de tareas
+-> mensaje de chat -> dashboard -> focus timer (inicio, reruns y fin), con tiempo de "pensar"
+entre acciones. Las acciones llaman a los mismos módulos que los scripts de las páginas
+(AuthManager, SupabaseClient, ProductivityAgent, DashboardBuilder, TimerManager) con los
+clientes reales de supabase y anthropic apuntando por HTTP a los fakes de tools/fake_backends.py.
+Los fakes corren en otro proceso para no competir por el GIL con el worker medido.
+
+No incluye el costo de Streamlit de serializar deltas al navegador: AppTest no permite correr
+sesiones concurrentes en un mismo proceso (ver tools/round_trip_budget.py para una sesión).
+
+Uso:
+    python tools/loadtest.py --sessions 20 --iterations 3
+    python tools/loadtest.py --sessions 50 --db-latency 0.02 --llm-latency 0.8 --token-delay 0.03
+    python tools/loadtest.py --sessions 10 --json loadtest.json
+
+Reporta throughput, p50/p95/p99 por acción y memoria por sesión (RSS del proceso).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Caches locales en un directorio temporal y sin archivo de trazas (las URLs se fijan en main)
+WORK_DIR = tempfile.mkdtemp(prefix='productivity_loadtest_')
+FAKE_KEY = 'loadtest-anon-key'
+FAKE_API_KEY = 'loadtest-anthropic-key'
+os.environ.update({
+    'STORAGE_BACKEND': 'supabase',
+    'SUPABASE_KEY': FAKE_KEY,
+    'ANTHROPIC_API_KEY': FAKE_API_KEY,
+    'LOCAL_CACHE_DIR': WORK_DIR,
+    'HISTORY_CACHE_PATH': os.path.join(WORK_DIR, 'history.db'),
+    'WRITE_BEHIND_JOURNAL': os.path.join(WORK_DIR, 'write_behind_journal.jsonl'),
+    'TRACE_LOG_PATH': ''
+})
+
+from tools.fake_backends import fake_user_id, serve_fakes
+
+TIMEZONE = 'America/Caracas'
+PASSWORD = 'loadtest-password'
+CHAT_MESSAGES = ['¿Cómo voy hoy?', '¿Qué debería hacer ahora?', 'Necesito motivación', 'Estoy atascado, ¿qué hago?']
+TASKS = ['Llamar a 3 prospectos', 'Escribir propuesta comercial', 'Preparar demo del cliente']
+
+
+def session_email(index: int) -> str:
+    return f'loadtest{index:05d}@example.com'
+
+
+# --- Servidor de fakes (proceso aparte) ---
+
+def _seed(postgrest, sessions: int):
+    """Settings y dos hábitos por usuario (el tracking del día lo crea la app al entrar)"""
+    for index in range(sessions):
+        user_id = fake_user_id(session_email(index))
+        postgrest.tables['01_productivity_user_settings'].append({
+            'user_id': user_id, 'identity_1_name': 'Empresario', 'identity_2_name': 'Profesional',
+            'timezone': TIMEZONE, 'morning_mastery_text': 'Ritual matutino'
+        })
+        for h, name in enumerate(['Leer', 'Ejercicio']):
+            postgrest.tables['01_productivity_habits'].append({
+                'id': f'{user_id[:-4]}{h:04d}', 'user_id': user_id, 'name': name, 'streak_count': 0,
+                'last_completed_at': None, 'active': True, 'created_at': '2026-01-01T00:00:00+00:00'
+            })
+
+
+def _run_fake_server(ready, sessions: int, db_latency: float, llm_latency: float,
+                     token_delay: float, tokens: int):
+    server = serve_fakes(latency=db_latency, llm_latency=llm_latency, token_delay=token_delay, tokens=tokens)
+    _seed(server.services.postgrest, sessions)
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+# --- Cookies en memoria (reemplazo del componente del navegador) ---
+
+class MemoryCookies:
+    """Interfaz de extra_streamlit_components.CookieManager sin navegador"""
+
+    def __init__(self):
+        self.cookies: Dict[str, str] = {}
+
+    def set(self, name: str, value: str, expires_at=None, key=None):
+        self.cookies[name] = value
+
+    def get_all(self) -> Dict[str, str]:
+        return dict(self.cookies)
+
+    def delete(self, name: str, key=None):
+        self.cookies.pop(name, None)
+
+
+# --- Sesión simulada ---
+
+class LoadSession:
+    """Estado de una sesión del navegador (lo que la app guarda en st.session_state)"""
+
+    def __init__(self, index: int, recorder: 'Recorder', think_time: float, timer_reruns: int):
+        self.index = index
+        self.email = session_email(index)
+        self.recorder = recorder
+        self.think_time = think_time
+        self.timer_reruns = timer_reruns
+        self.random = random.Random(index)
+        self.state: Dict = {}
+
+    def pause(self):
+        """Tiempo de 'pensar' del usuario entre acciones"""
+        if self.think_time:
+            time.sleep(self.think_time * self.random.uniform(0.5, 1.5))
+
+    def login(self):
+        """Página de Login + primer render de app.py (clientes de la sesión)"""
+        from modules.auth import AuthManager
+        from modules.storage_backend import create_storage_backend
+        from modules.agent import ProductivityAgent
+        from supabase import create_client
+
+        # Mismo __init__ que AuthManager, con las cookies en memoria en vez del componente
+        auth = AuthManager.__new__(AuthManager)
+        auth.client = create_client(os.environ['SUPABASE_URL'], os.environ['SUPABASE_KEY'])
+        auth.cookie_manager = MemoryCookies()
+        success, message, user = auth.sign_in(self.email, PASSWORD)
+        if not success:
+            raise RuntimeError(message)
+
+        db = create_storage_backend(user_id=user['id'])
+        db.set_timezone(db.get_user_settings().get('timezone', TIMEZONE))
+        agent = ProductivityAgent(api_key=os.environ['ANTHROPIC_API_KEY'], db_client=db,
+                                  timezone=str(db.timezone.zone))
+        self.state.update(auth=auth, user=user, db=db, agent=agent)
+
+    def main_page(self):
+        """Render de app.py: snapshot del día y contexto del agente"""
+        db, agent = self.state['db'], self.state['agent']
+        snapshot = db.get_day_snapshot()
+        agent._get_current_context()
+        snapshot.get_task_feedback('morning')
+        snapshot.get_task_feedback('afternoon')
+        return snapshot
+
+    def toggle_task(self):
+        """Checkbox de una tarea del Daily 3 (auto-guardado) + rerun de la página"""
+        db = self.state['db']
+        details = list(db.get_day_snapshot().today.get('identity_1_daily_3_details') or [])
+        details = [dict(task) for task in details if isinstance(task, dict)]
+        while len(details) < 3:
+            details.append({'text': TASKS[len(details)], 'done': False})
+        slot = self.random.randrange(3)
+        details[slot]['done'] = not details[slot].get('done', False)
+        db.update_daily_3(details)
+        self.main_page()
+
+    def chat_message(self):
+        """Mensaje en Chat Coach consumido en streaming (registra también el primer token)"""
+        agent = self.state['agent']
+        agent._get_current_context()
+        started = time.perf_counter()
+        first_token = None
+        for _ in agent.chat_stream(self.random.choice(CHAT_MESSAGES)):
+            if first_token is None:
+                first_token = time.perf_counter() - started
+        if first_token is not None:
+            self.recorder.add('chat_first_token', first_token)
+
+    def dashboard(self):
+        """Render completo de la página Dashboard (ventana de 7 días)"""
+        from modules.dashboard_builder import DashboardBuilder, HEATMAP_DAYS
+
+        db = self.state['db']
+        snapshot = db.get_day_snapshot()
+        if 'dashboard' not in self.state:
+            settings = snapshot.settings
+            self.state['dashboard'] = DashboardBuilder(db, settings.get('identity_1_name', 'Empresario'),
+                                                       settings.get('identity_2_name', 'Profesional'))
+        dashboard = self.state['dashboard']
+        dashboard.get_last_n_days_data(max(HEATMAP_DAYS, 7))
+        dashboard.get_weekly_summary_stats()
+        if snapshot.habits:
+            dashboard.get_habit_summary(7)
+        dashboard.create_identity_balance_chart(7)
+        dashboard.create_weekly_consistency_chart(7)
+        dashboard.get_heatmap_variants()
+        dashboard.create_habit_completion_heatmap('total')
+
+    def focus_timer_start(self):
+        """Entrar a Focus Timer (rehidratar timer y sesiones) e iniciar un pomodoro"""
+        from modules.timer_manager import TimerManager
+
+        db = self.state['db']
+        manager = self.state.setdefault('timer_manager', TimerManager())
+        manager.from_record(db.get_active_timer())
+        db.get_focus_sessions_today()
+        timer = manager.create_timer(manager.timer_presets['pomodoro'], TASKS[0])
+        db.save_active_timer(manager.to_record(timer))
+        self.state['active_timer'] = timer
+        manager.get_remaining_time(timer)
+
+    def focus_timer_rerun(self):
+        """Rerun de Focus Timer con el timer corriendo (el contador vive en el navegador)"""
+        self.state['timer_manager'].get_remaining_time(self.state['active_timer'])
+
+    def focus_timer_finish(self):
+        """Finalizar y guardar la sesión de foco"""
+        db, timer = self.state['db'], self.state.pop('active_timer')
+        db.log_focus_session(timer['task_name'], timer['timer_type'], timer['duration_minutes'])
+        db.clear_active_timer()
+
+    def run(self, iterations: int, deadline: Optional[float]):
+        self.recorder.timed('login', self.login)
+        for _ in range(iterations):
+            if deadline and time.monotonic() > deadline:
+                break
+            steps: List[Callable] = [self.main_page, self.toggle_task, self.toggle_task, self.chat_message,
+                                     self.dashboard, self.focus_timer_start]
+            steps += [self.focus_timer_rerun] * self.timer_reruns + [self.focus_timer_finish]
+            for step in steps:
+                self.pause()
+                if not self.recorder.timed(step.__name__, step):
+                    break  # Tras un error la sesión recarga desde el principio del flujo
+
+
+# --- Métricas ---
+
+class Recorder:
+    """Latencias y errores por acción (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.first_errors: Dict[str, str] = {}
+
+    def add(self, action: str, seconds: float):
+        with self._lock:
+            self.samples[action].append(seconds)
+
+    def timed(self, action: str, fn: Callable) -> bool:
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            with self._lock:
+                self.errors[action] += 1
+                self.first_errors.setdefault(action, f"{type(e).__name__}: {e}")
+            return False
+        self.add(action, time.perf_counter() - started)
+        return True
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Percentil con interpolación lineal (mismo criterio que numpy.percentile)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def rss_bytes() -> int:
+    """RSS actual del proceso (Linux: /proc; en otros sistemas el pico de getrusage)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+# --- Runner ---
+
+def warm_up():
+    """Importar módulos y crear recursos compartidos del proceso antes de medir memoria base"""
+    from modules import agent, dashboard_builder, storage_backend, timer_manager  # noqa: F401
+    from modules.clients import get_anthropic_client, get_llm_executor
+    get_anthropic_client(os.environ['ANTHROPIC_API_KEY'])
+    get_llm_executor()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=10, help='Sesiones concurrentes')
+    parser.add_argument('--iterations', type=int, default=3, help='Vueltas del flujo por sesión')
+    parser.add_argument('--duration', type=float, default=0, help='Tope de segundos (0 = sin tope)')
+    parser.add_argument('--ramp-up', type=float, default=5.0, help='Segundos para arrancar todas las sesiones')
+    parser.add_argument('--think-time', type=float, default=0.5, help='Pausa media entre acciones (s)')
+    parser.add_argument('--timer-reruns', type=int, default=3, help='Reruns con el timer corriendo por vuelta')
+    parser.add_argument('--db-latency', type=float, default=0.01, help='Latencia por request a PostgREST/Auth (s)')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Latencia al primer token del LLM (s)')
+    parser.add_argument('--token-delay', type=float, default=0.02, help='Segundos entre tokens del stream')
+    parser.add_argument('--tokens', type=int, default=40, help='Tokens por respuesta del LLM')
+    parser.add_argument('--json', help='Guardar el reporte en este archivo JSON')
+    args = parser.parse_args()
+
+    # El modelo del agente está marcado como deprecado en el SDK: un aviso por mensaje de chat
+    warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+    # Fakes en otro proceso; el worker medido solo habla HTTP con ellos
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=_run_fake_server, daemon=True,
+        args=(ready, args.sessions, args.db_latency, args.llm_latency, args.token_delay, args.tokens)
+    )
+    server.start()
+    base_url = f'http://127.0.0.1:{ready.get(timeout=30)}'
+    os.environ['SUPABASE_URL'] = base_url
+    os.environ['ANTHROPIC_BASE_URL'] = base_url
+
+    warm_up()
+    baseline_rss = rss_bytes()
+
+    recorder = Recorder()
+    sessions = [LoadSession(i, recorder, args.think_time, args.timer_reruns) for i in range(args.sessions)]
+    started = time.monotonic()
+    deadline = started + args.duration if args.duration else None
+    threads = []
+    for i, session in enumerate(sessions):
+        thread = threading.Thread(target=session.run, args=(args.iterations, deadline),
+                                  name=f'session-{i}', daemon=True)
+        threads.append(thread)
+        thread.start()
+        time.sleep(args.ramp_up / max(args.sessions, 1))
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    # Memoria con todas las sesiones vivas (sus clientes, agentes y dashboards siguen en memoria)
+    final_rss = rss_bytes()
+
+    # Vaciar la cola de escritura diferida antes de apagar los fakes
+    from modules.clients import get_write_behind_queue
+    write_behind = get_write_behind_queue(os.environ['SUPABASE_URL'], os.environ['SUPABASE_KEY'])
+    write_behind.close()
+    server.terminate()
+
+    actions = {}
+    for action, values in recorder.samples.items():
+        actions[action] = {
+            'count': len(values),
+            'errors': recorder.errors.get(action, 0),
+            'p50_ms': round(_percentile(values, 50) * 1000, 1),
+            'p95_ms': round(_percentile(values, 95) * 1000, 1),
+            'p99_ms': round(_percentile(values, 99) * 1000, 1),
+            'max_ms': round(max(values) * 1000, 1)
+        }
+    for action, count in recorder.errors.items():
+        actions.setdefault(action, {'count': 0, 'errors': count, 'p50_ms': 0, 'p95_ms': 0, 'p99_ms': 0, 'max_ms': 0})
+
+    completed = sum(a['count'] for name, a in actions.items() if name != 'chat_first_token')
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'args': vars(args),
+        'elapsed_s': round(elapsed, 2),
+        'throughput_actions_per_s': round(completed / elapsed, 2) if elapsed else 0,
+        'errors': sum(recorder.errors.values()),
+        'baseline_rss_mb': round(baseline_rss / 1e6, 1),
+        'final_rss_mb': round(final_rss / 1e6, 1),
+        'rss_per_session_kb': round((final_rss - baseline_rss) / max(args.sessions, 1) / 1e3, 1),
+        'actions': actions,
+        'write_behind': write_behind.stats(),
+        'first_errors': recorder.first_errors
+    }
+
+    print(f"\n{args.sessions} sesiones x {args.iterations} vueltas en {report['elapsed_s']} s "
+          f"(db {args.db_latency * 1000:.0f} ms, LLM {args.llm_latency * 1000:.0f} ms + "
+          f"{args.tokens} tokens x {args.token_delay * 1000:.0f} ms)")
+    print(f"{'acción':<22} {'n':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for action, stats in actions.items():
+        print(f"{action:<22} {stats['count']:>6} {stats['errors']:>5} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    print(f"\nthroughput: {report['throughput_actions_per_s']} acciones/s  errores: {report['errors']}")
+    print(f"escritura diferida: {report['write_behind']}")
+    print(f"memoria: base {report['baseline_rss_mb']} MB, final {report['final_rss_mb']} MB, "
+          f"~{report['rss_per_session_kb']} KB por sesión")
+    for action, error in recorder.first_errors.items():
+        print(f"primer error en {action}: {error}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"reporte -> {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Presupuesto de round trips por render e interacción (Streamlit AppTest + backends falsos)
+
+Corre app.py y cada página con SupabaseClient/ProductivityAgent apuntando a FakePostgrest y
+FakeAnthropic (tools/fake_backends.py) y falla si un escenario hace más consultas a la base
+o llamadas al LLM que su presupuesto. Sirve para detectar regresiones N+1 antes de producción.
+
+Uso: python tools/round_trip_budget.py [--verbose]
+Sale con código 1 si algún escenario se pasa del presupuesto. La suite de tests lo
+corre en un proceso aparte (tests/test_round_trip_budget.py), así que python -m pytest
+también falla ante una regresión.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Entorno aislado: backends falsos, caches en un directorio temporal y sin archivo de trazas
+WORK_DIR = tempfile.mkdtemp(prefix='round_trip_budget_')
+FAKE_URL = 'http://fake-postgrest.local'
+FAKE_KEY = 'fake-anon-key'
+FAKE_API_KEY = 'fake-anthropic-key'
+os.environ.update({
+    'STORAGE_BACKEND': 'supabase',
+    'SUPABASE_URL': FAKE_URL,
+    'SUPABASE_KEY': FAKE_KEY,
+    'ANTHROPIC_API_KEY': FAKE_API_KEY,
+    'LOCAL_CACHE_DIR': WORK_DIR,
+    'HISTORY_CACHE_PATH': os.path.join(WORK_DIR, 'history.db'),
+    'WRITE_BEHIND_JOURNAL': os.path.join(WORK_DIR, 'write_behind_journal.jsonl'),
+    'TRACE_LOG_PATH': ''
+})
+
+import pytz
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from tools.fake_backends import FakeAuthManager, install_fakes
+
+USER = {'id': '00000000-0000-0000-0000-000000000001', 'email': 'budget@example.com'}
+TIMEZONE = 'America/Caracas'
+HABIT_ID = '00000000-0000-0000-0000-0000000000aa'
+
+# Presupuestos: escenario -> (máx. consultas a la base, máx. llamadas al LLM)
+# Son las cuentas medidas hoy, no metas: fijan el estado actual para que una regresión
+# falle. Al bajar una cuenta con una optimización, bajar también su presupuesto.
+# - Checkbox: 1 upsert; el snapshot se actualiza en memoria con lo escrito.
+# - Prioridades: upsert de tareas, cache de feedback (lectura y escritura), upsert del feedback.
+BUDGETS: Dict[str, Tuple[int, int]] = {
+    'app: primer render': (7, 0),
+    'app: re-render': (0, 0),
+    'app: marcar tarea (checkbox)': (1, 0),
+    'app: guardar prioridades mañana': (4, 1),
+    'chat: primer render': (0, 0),
+    'dashboard: primer render': (2, 0),
+    'dashboard: re-render': (0, 0),
+    'settings: primer render': (1, 0),
+    'focus timer: primer render': (2, 0),
+    'focus timer: tick': (0, 0),
+    'referencias: primer render': (0, 0),
+}
+
+
+def page_path(prefix: str) -> str:
+    """Ruta de una página por su prefijo numérico (los nombres llevan emojis)"""
+    return glob.glob(os.path.join(ROOT, 'pages', f'{prefix}_*.py'))[0]
+
+
+def seed(postgrest):
+    """Datos de un usuario con settings, un hábito y la primera tarea del día escrita"""
+    today = datetime.now(pytz.timezone(TIMEZONE)).date().isoformat()
+    postgrest.tables['01_productivity_user_settings'].append({
+        'user_id': USER['id'], 'identity_1_name': 'Empresario', 'identity_2_name': 'Profesional',
+        'timezone': TIMEZONE, 'morning_mastery_text': 'Ritual'
+    })
+    postgrest.tables['01_productivity_habits'].append({
+        'id': HABIT_ID, 'user_id': USER['id'], 'name': 'Leer', 'streak_count': 0,
+        'last_completed_at': None, 'active': True, 'created_at': '2026-01-01T00:00:00+00:00'
+    })
+    postgrest.tables['01_productivity_daily_tracking'].append({
+        'id': 1, 'user_id': USER['id'], 'date': today,
+        'identity_1_daily_3_completed': 0,
+        'identity_1_daily_3_details': [{'text': 'Escribir propuesta', 'done': False},
+                                       {'text': '', 'done': False}, {'text': '', 'done': False}],
+        'identity_2_priorities_completed': 0, 'identity_2_priorities_details': [],
+        'code_commit_done': False, 'morning_mastery_done': False,
+        'updated_at': '2026-01-01T00:00:00+00:00'
+    })
+
+
+def patch_streamlit():
+    """Lo que AppTest no puede renderizar fuera de un servidor real"""
+    # st.page_link necesita el registro de páginas del servidor
+    st.page_link = lambda *args, **kwargs: None
+    # En AppTest st.rerun() repite la corrida con el botón aún presionado (bucle infinito);
+    # se corta la corrida y el escenario hace el rerun con un run() aparte
+    st.rerun = st.stop
+    # Los custom components requieren pyarrow en AppTest; el contador del navegador no cuenta round trips
+    import modules.timer_component
+    modules.timer_component.focus_countdown = lambda *args, **kwargs: None
+
+
+def new_app(path: str) -> AppTest:
+    """AppTest con un usuario autenticado y AuthManager falso"""
+    at = AppTest.from_file(path, default_timeout=60)
+    at.session_state['user'] = dict(USER)
+    at.session_state['auth'] = FakeAuthManager(dict(USER))
+    return at
+
+
+def rerender(at: AppTest) -> AppTest:
+    """
+    Re-render sin interacción en una AppTest nueva con el mismo session_state.
+    AppTest no puede re-enviar un st.radio/st.selectbox con format_func
+    ('7' is not in list), así que se copia el estado en vez de llamar at.run() otra vez.
+    """
+    fresh = AppTest.from_file(at._script_path, default_timeout=at.default_timeout)
+    for key, value in at.session_state.filtered_state.items():
+        fresh.session_state[key] = value
+    return fresh.run()
+
+
+class BudgetRunner:
+    """Corre escenarios y compara las llamadas contra BUDGETS"""
+
+    def __init__(self, fakes, verbose: bool = False):
+        self.fakes = fakes
+        self.verbose = verbose
+        self.results: List[Tuple[str, int, int, Optional[str]]] = []
+
+    def measure(self, name: str, action: Callable[[], AppTest]):
+        """Ejecutar `action` y registrar las consultas/llamadas que hizo"""
+        db_mark = len(self.fakes.postgrest.calls)
+        llm_mark = len(self.fakes.anthropic.calls)
+        at = action()
+        error = None
+        if at is not None and at.exception:
+            error = at.exception[0].message.splitlines()[0]
+
+        db_calls = self.fakes.postgrest.count_calls(db_mark)
+        llm_calls = self.fakes.anthropic.count_calls(llm_mark)
+        self.results.append((name, db_calls, llm_calls, error))
+        if self.verbose:
+            for call in self.fakes.postgrest.describe_calls(db_mark):
+                print(f"    {name}: {call}")
+        return at
+
+    def report(self) -> bool:
+        """Tabla de resultados; True si todo está dentro del presupuesto"""
+        ok = True
+        print(f"{'escenario':<36} {'db':<8} {'llm':<8}  estado")
+        for name, db_calls, llm_calls, error in self.results:
+            max_db, max_llm = BUDGETS[name]
+            within = db_calls <= max_db and llm_calls <= max_llm and error is None
+            ok = ok and within
+            status = 'ok' if within else ('ERROR: ' + error if error else 'SOBRE PRESUPUESTO')
+            print(f"{name:<36} {f'{db_calls}/{max_db}':<8} {f'{llm_calls}/{max_llm}':<8}  {status}")
+        return ok
+
+
+def run_scenarios(runner: BudgetRunner):
+    # Página principal: render, re-render sin cambios, checkbox y guardar prioridades
+    app = new_app(os.path.join(ROOT, 'app.py'))
+    runner.measure('app: primer render', app.run)
+    runner.measure('app: re-render', app.run)
+    runner.measure('app: marcar tarea (checkbox)', lambda: app.checkbox(key='d3_check_0').check().run())
+    save = next(b for b in app.button if b.label == 'Guardar Prioridades Mañana')
+    runner.measure('app: guardar prioridades mañana', lambda: save.click().run().run())
+
+    # El resto de páginas reutiliza db y agente de la sesión, como al navegar en la app
+    shared_state = {key: app.session_state[key] for key in ('db', 'agent')}
+
+    def page(prefix: str) -> AppTest:
+        at = new_app(page_path(prefix))
+        for key, value in shared_state.items():
+            at.session_state[key] = value
+        return at
+
+    chat = page('1')
+    runner.measure('chat: primer render', chat.run)
+
+    dashboard = page('2')
+    runner.measure('dashboard: primer render', dashboard.run)
+    runner.measure('dashboard: re-render', lambda: rerender(dashboard))
+
+    settings = page('3')
+    runner.measure('settings: primer render', settings.run)
+
+    # Focus timer: el tick es un rerun con el timer corriendo (el contador vive en el navegador)
+    timer = page('4')
+    runner.measure('focus timer: primer render', timer.run)
+    from modules.timer_manager import TimerManager
+    timer.session_state['active_timer'] = TimerManager().create_timer(25, 'Escribir propuesta')
+    runner.measure('focus timer: tick', lambda: rerender(timer))
+
+    references = page('5')
+    runner.measure('referencias: primer render', references.run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help='Listar cada consulta por escenario')
+    args = parser.parse_args()
+
+    fakes = install_fakes(FAKE_URL, FAKE_KEY, FAKE_API_KEY)
+    seed(fakes.postgrest)
+    patch_streamlit()
+
+    runner = BudgetRunner(fakes, verbose=args.verbose)
+    run_scenarios(runner)
+    sys.exit(0 if runner.report() else 1)
+
+
+if __name__ == '__main__':
+    main()